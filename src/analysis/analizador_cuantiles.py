@@ -0,0 +1,29 @@
+from motor_analisis import cuantiles_streaming, PERCENTILES
+
+ARCHIVO_CSV = "resultados_definitivos.csv"
+
+def analizar_resultados():
+    print(f"📦 Calculando percentiles reales de {ARCHIVO_CSV} (lectura por trozos)...")
+
+    # 1. PERCENTILES por (Escenario, Config, Variable) con el sketch en streaming
+    try:
+        resumen = cuantiles_streaming(ARCHIVO_CSV, PERCENTILES)
+    except Exception as e:
+        print(f"❌ Error leyendo: {e}")
+        return
+
+    resumen = resumen.round(2)
+
+    print("\n--- PERCENTILES DEL COSTE ---")
+    print(resumen[resumen['Variable'] == 'Objetivo'].drop(columns='Variable').to_string(index=False))
+
+    if not resumen['exacto'].all():
+        print("\nℹ️  Algunos grupos superan la capacidad del sketch: sus percentiles son aproximados")
+
+    # Lo leen grafico_escalabilidad.py y grafico_tipologia.py
+    output = "resumen_cuantiles.csv"
+    resumen.to_csv(output, sep=";", index=False)
+    print(f"\n✅ Guardado en '{output}'")
+
+if __name__ == "__main__":
+    analizar_resultados()
@@ -0,0 +1,134 @@
+import pandas as pd
+import numpy as np
+import glob
+import re
+import os
+
+# Trayectorias que escribe el batch (TRAYECTORIAS = True): un CSV por trabajo
+# "<instancia>__<config>.csv" con columnas t;incumbente;cota (coma decimal)
+CARPETA_TRAYECTORIAS = "trayectorias"
+
+# Instantes (s) en los que se evalúa la curva de convergencia
+MALLA = [1, 2, 5, 10, 20, 30, 60, 90, 120, 180, 240, 300]
+
+# Tiempo hasta objetivo: primera vez que la incumbente queda a menos de un
+# EPSILON relativo de la mejor conocida para esa instancia...
+EPSILON = 0.01
+# ...y primera vez que el gap (incumbente - cota) / incumbente baja de esto
+GAP_OBJETIVO = 0.05
+
+SALIDA_CURVAS = "resumen_convergencia.csv"
+SALIDA_TTT = "tiempo_hasta_objetivo.csv"
+
+def limpiar_nombre(nombre):
+    clean = re.sub(r'_iter\d+', '', nombre)
+    return clean
+
+def limite_config(config):
+    """Segundos del límite de una config ('Limite_300s' -> 300)."""
+    m = re.search(r'(\d+)s$', config)
+    return float(m.group(1)) if m else float('inf')
+
+def cargar_trayectorias():
+    """Una trayectoria por instancia: la de la ejecución con mayor límite.
+
+    Con 20/60/300 s la de 300 s ya contiene las otras dos, así que las
+    ejecuciones cortas no aportan información nueva a la curva.
+    """
+    por_instancia = {}
+    for ruta in glob.glob(os.path.join(CARPETA_TRAYECTORIAS, "*__*.csv")):
+        instancia, config = os.path.splitext(os.path.basename(ruta))[0].rsplit("__", 1)
+        previa = por_instancia.get(instancia)
+        if previa is None or limite_config(config) > limite_config(previa[0]):
+            por_instancia[instancia] = (config, ruta)
+
+    filas = []
+    for instancia, (config, ruta) in sorted(por_instancia.items()):
+        df = pd.read_csv(ruta, sep=';', decimal=',')
+        # Más allá del límite no se sabe nada, salvo que la búsqueda terminase
+        # (incumbente = cota): entonces el valor final vale para siempre
+        ultimo = df.iloc[-1] if len(df) else None
+        terminada = ultimo is not None and ultimo['incumbente'] == ultimo['cota']
+        df['Horizonte'] = float('inf') if terminada else limite_config(config)
+        df['Instancia'] = instancia
+        df['Escenario'] = limpiar_nombre(instancia)
+        df['Config'] = config
+        filas.append(df)
+    if not filas:
+        return pd.DataFrame(columns=['t', 'incumbente', 'cota', 'Horizonte', 'Instancia', 'Escenario', 'Config'])
+    return pd.concat(filas, ignore_index=True)
+
+def valor_en(tray, columna, malla):
+    """Función escalón: último valor conocido de 'columna' en cada instante.
+
+    NaN antes del primer valor y después del horizonte de la ejecución.
+    """
+    malla = np.asarray(malla, dtype=float)
+    serie = tray[['t', columna]].dropna()
+    valores = serie[columna].to_numpy()
+    if not len(valores):
+        return np.full(len(malla), np.nan)
+    pos = np.searchsorted(serie['t'].to_numpy(), malla, side='right') - 1
+    salida = np.where(pos >= 0, valores[np.clip(pos, 0, None)], np.nan)
+    salida[malla > tray['Horizonte'].iloc[0]] = np.nan
+    return salida
+
+def primer_instante(tray, condicion):
+    cumple = tray.loc[condicion, 't']
+    return cumple.iloc[0] if len(cumple) else np.nan
+
+def analizar_trayectorias():
+    print(f"📈 Leyendo trayectorias de '{CARPETA_TRAYECTORIAS}'...")
+    df = cargar_trayectorias()
+    if df.empty:
+        print("❌ No hay trayectorias (¿batch con TRAYECTORIAS = True y backend CBC?)")
+        return
+
+    curvas = []
+    ttt = []
+    for (escenario, instancia), tray in df.groupby(['Escenario', 'Instancia'], sort=True):
+        tray = tray.sort_values('t', kind='stable')
+        curvas.append(pd.DataFrame({
+            'Escenario': escenario,
+            'Instancia': instancia,
+            't': MALLA,
+            'incumbente': valor_en(tray, 'incumbente', MALLA),
+            'cota': valor_en(tray, 'cota', MALLA),
+        }))
+
+        mejor = tray['incumbente'].min()
+        gap = (tray['incumbente'] - tray['cota']) / tray['incumbente'].abs().clip(lower=1e-9)
+        ttt.append({
+            'Escenario': escenario,
+            'Instancia': instancia,
+            'Mejor': mejor,
+            'T_Primera': primer_instante(tray, tray['incumbente'].notna()),
+            'T_Objetivo': primer_instante(tray, tray['incumbente'] <= mejor + EPSILON * abs(mejor)),
+            'T_Gap': primer_instante(tray, gap <= GAP_OBJETIVO),
+        })
+
+    # --- CURVA MEDIA POR ESCENARIO ---
+    # 'n' = instancias con incumbente en ese instante (la media es sobre ellas)
+    curvas = pd.concat(curvas, ignore_index=True)
+    resumen = curvas.groupby(['Escenario', 't']).agg(
+        media=('incumbente', 'mean'),
+        std=('incumbente', 'std'),
+        n=('incumbente', 'count'),
+        cota_media=('cota', 'mean'),
+    ).round(2)
+
+    print("\n--- CURVAS DE CONVERGENCIA (media de la incumbente) ---")
+    print(resumen['media'].unstack('t'))
+    resumen.to_csv(SALIDA_CURVAS, sep=";")
+    print(f"\n✅ Guardado en '{SALIDA_CURVAS}'")
+
+    # --- TIEMPO HASTA OBJETIVO ---
+    ttt = pd.DataFrame(ttt)
+    ttt.to_csv(SALIDA_TTT, sep=";", index=False)
+    tabla = ttt.groupby('Escenario')[['T_Primera', 'T_Objetivo', 'T_Gap']].agg(['mean', 'median', 'count']).round(2)
+    print(f"\n--- TIEMPO HASTA OBJETIVO (incumbente a {EPSILON:.0%} de la mejor / gap <= {GAP_OBJETIVO:.0%}) ---")
+    print(tabla)
+    print(f"\n✅ Guardado en '{SALIDA_TTT}'")
+
+if __name__ == "__main__":
+    analizar_trayectorias()
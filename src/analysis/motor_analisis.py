@@ -0,0 +1,191 @@
+import pandas as pd
+import numpy as np
+import re
+import os
+
+from sketch_cuantiles import SketchCuantiles, CAPACIDAD
+
+# ==========================================
+# MOTOR DE ANÁLISIS DE RESULTADOS
+# ==========================================
+# Una sola carga del CSV del batch (motor C de pandas, columnas tipadas, coma
+# decimal parseada por el propio lector) y una sola agrupación por
+# (Escenario, Config) de la que salen todas las tablas: medias, desviaciones,
+# extremos, cuantiles y conteos de éxito. analizador_medias.py y
+# analizador_medias_con_conteos.py son ahora envoltorios de este módulo.
+
+ARCHIVO_CSV = "resultados_definitivos.csv"
+
+COLUMNAS = ["Archivo", "Pedidos", "Camiones", "Config", "Estado", "Objetivo", "Gap", "Tiempo"]
+NUMERICAS = ["Objetivo", "Gap", "Tiempo"]
+
+# Textos que escribe el batch cuando no hay número (y la propia cabecera,
+# que puede aparecer repetida si se han concatenado varios CSV)
+NO_NUMERICOS = ["Error", "N/A", "N/A (No bounds)", "N/A (Error)"]
+
+# Éxito: Gap <= 1% (0.011 por el redondeo); "difícil": Gap >= 100%
+GAP_OPTIMO = 0.011
+GAP_DIFICIL = 0.999
+
+CUANTILES = [0.25, 0.5, 0.75]
+ESTADISTICOS = ['count', 'mean', 'std', 'min', 'max']
+
+SALIDA_ESTADISTICAS = "resumen_estadisticas.csv"
+
+# Cuantiles en streaming (ver sketch_cuantiles.py): el CSV se lee por trozos
+# de TROZO filas, sin cargarlo entero
+PERCENTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+TROZO = 1_000_000
+SALIDA_CUANTILES = "resumen_cuantiles.csv"
+
+# ==========================================
+# 1. CARGA
+# ==========================================
+LECTURA = dict(
+    sep=';', decimal=',', header=None, names=COLUMNAS, engine='c',
+    usecols=['Archivo', 'Config'] + NUMERICAS,
+    dtype={'Archivo': 'category', 'Config': 'category'},
+    na_values={col: NO_NUMERICOS + [col] for col in NUMERICAS},
+    keep_default_na=False,
+)
+
+def cargar_resultados(ruta=ARCHIVO_CSV):
+    """DataFrame tipado del CSV del batch, sin cabeceras y con 'Escenario'.
+
+    Archivo y Config se cargan como categorías (cada nombre se guarda una vez
+    aunque haya millones de filas) y Pedidos/Camiones/Estado no se leen.
+    """
+    return _preparar(pd.read_csv(ruta, **LECTURA))
+
+def leer_trozos(ruta=ARCHIVO_CSV, trozo=TROZO):
+    """Igual que cargar_resultados, pero de 'trozo' en 'trozo' filas."""
+    for df in pd.read_csv(ruta, chunksize=trozo, **LECTURA):
+        yield _preparar(df)
+
+def _preparar(df):
+    # Cabeceras (la primera línea y las de CSV concatenados)
+    cabeceras = df['Archivo'] == 'Archivo'
+    if cabeceras.any():
+        df = df[~cabeceras]
+        df['Archivo'] = df['Archivo'].cat.remove_unused_categories()
+        df['Config'] = df['Config'].cat.remove_unused_categories()
+
+    # Números: el lector ya los da como float; sólo si queda algún texto
+    # inesperado la columna llega como object y se convierte aquí.
+    # Un Gap sin cota ("N/A ...") queda como NaN: no cuenta como óptimo ni
+    # entra en las medias (antes se rellenaba con 0, es decir, "óptimo")
+    for col in NUMERICAS:
+        if df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col].str.replace(',', '.', regex=False), errors='coerce')
+        df[col] = df[col].astype(np.float64)
+        if col != 'Gap':
+            df[col] = df[col].fillna(0)
+
+    df['Escenario'] = escenarios(df['Archivo'])
+    return df
+
+def limpiar_nombre(nombre):
+    nombre_sin_ruta = os.path.basename(str(nombre))
+    return re.sub(r'_iter\d+', '', nombre_sin_ruta).replace('.dat', '').replace('.txt', '').replace('.npz', '')
+
+def escenarios(archivos):
+    """Escenario de cada fila, limpiando cada nombre de archivo distinto una sola vez."""
+    nombres = np.array([limpiar_nombre(a) for a in archivos.cat.categories], dtype=object)
+    unicos, codigos = np.unique(nombres, return_inverse=True)
+    return pd.Categorical.from_codes(codigos[archivos.cat.codes.to_numpy()], unicos)
+
+# ==========================================
+# 2. AGREGACIÓN
+# ==========================================
+def resumir(df, cuantiles=CUANTILES):
+    """Tabla por (Escenario, Config) con todos los estadísticos.
+
+    Columnas (MultiIndex): (variable, estadístico) para Objetivo, Gap y Tiempo
+    con count/mean/std/min/max/q25/q50/q75, más ('Conteos', N_Optimos /
+    N_GapAlto / Total_Iteraciones / %_Exito).
+    """
+    df = df.assign(
+        N_Optimos=(df['Gap'] <= GAP_OPTIMO).astype(np.int64),
+        N_GapAlto=(df['Gap'] >= GAP_DIFICIL).astype(np.int64),
+    )
+    grupos = df.groupby(['Escenario', 'Config'], observed=True, sort=True)
+
+    resumen = grupos[NUMERICAS].agg(ESTADISTICOS)
+    conteos = grupos[['N_Optimos', 'N_GapAlto']].sum()
+    conteos['Total_Iteraciones'] = grupos.size()
+    conteos['%_Exito'] = conteos['N_Optimos'] / conteos['Total_Iteraciones'] * 100
+    conteos.columns = pd.MultiIndex.from_product([['Conteos'], conteos.columns])
+
+    cuantiles = cuantiles or []
+    partes = [resumen, conteos]
+    if cuantiles:
+        q = grupos[NUMERICAS].quantile(cuantiles).unstack(level=-1)
+        q.columns = pd.MultiIndex.from_tuples([(var, f"q{round(p * 100)}") for var, p in q.columns])
+        partes.append(q)
+
+    tabla = pd.concat(partes, axis=1)
+    orden = [(var, est) for var in NUMERICAS for est in ESTADISTICOS + [f"q{round(p * 100)}" for p in cuantiles]]
+    return tabla[orden + list(conteos.columns)]
+
+def cuantiles_streaming(ruta=ARCHIVO_CSV, percentiles=PERCENTILES, trozo=TROZO, capacidad=CAPACIDAD):
+    """Percentiles reales por (Escenario, Config, Variable) leyendo el CSV por trozos.
+
+    Una fila por grupo y variable con n, media, std, min, p05..p95, max y
+    'exacto' (True si el grupo cabía entero en el sketch: con ~30 iteraciones
+    por escenario siempre es así).
+    """
+    sketches = {}
+    for df in leer_trozos(ruta, trozo):
+        columnas = {var: df[var].to_numpy() for var in NUMERICAS}
+        for (escenario, config), filas in df.groupby(['Escenario', 'Config'], observed=True).indices.items():
+            for var in NUMERICAS:
+                clave = (escenario, config, var)
+                if clave not in sketches:
+                    sketches[clave] = SketchCuantiles(capacidad)
+                sketches[clave].agregar(columnas[var][filas])
+
+    etiquetas = [f"p{round(p * 100):02d}" for p in percentiles]
+    filas = []
+    for (escenario, config, var), sk in sorted(sketches.items()):
+        fila = {'Escenario': escenario, 'Config': config, 'Variable': var,
+                'n': sk.n, 'media': sk.media(), 'std': sk.std(), 'min': sk.min}
+        fila.update(zip(etiquetas, sk.cuantiles(percentiles)))
+        fila.update({'max': sk.max, 'exacto': sk.exacto})
+        filas.append(fila)
+    return pd.DataFrame(filas, columns=['Escenario', 'Config', 'Variable', 'n', 'media', 'std', 'min']
+                        + etiquetas + ['max', 'exacto'])
+
+# ==========================================
+# 3. VISTAS (formato de las tablas de siempre)
+# ==========================================
+def tabla_medias(resumen):
+    """resumen_medias_tfg.csv: count/mean/std/min/max de Objetivo, Gap y Tiempo."""
+    return resumen[[(var, est) for var in NUMERICAS for est in ESTADISTICOS]]
+
+def tabla_conteos(resumen):
+    """resumen_final_conteos.csv: medias, conteos de éxito y %_Exito."""
+    tabla = pd.DataFrame({
+        'Coste_Medio': resumen[('Objetivo', 'mean')],
+        'Tiempo_Medio': resumen[('Tiempo', 'mean')],
+        'Gap_Medio': resumen[('Gap', 'mean')],
+        'N_Optimos': resumen[('Conteos', 'N_Optimos')],
+        'N_GapAlto': resumen[('Conteos', 'N_GapAlto')],
+        'Total_Iteraciones': resumen[('Conteos', 'Total_Iteraciones')],
+        '%_Exito': resumen[('Conteos', '%_Exito')],
+    })
+    return tabla
+
+if __name__ == "__main__":
+    # Todas las tablas con una sola lectura del CSV
+    print(f"📊 Cargando {ARCHIVO_CSV}...")
+    df = cargar_resultados(ARCHIVO_CSV)
+    resumen = resumir(df)
+    print(f"   {len(df)} filas, {len(resumen)} grupos (Escenario, Config)")
+
+    tabla_medias(resumen).round(2).to_csv("resumen_medias_tfg.csv", sep=";")
+    tabla_conteos(resumen).round(2).to_csv("resumen_final_conteos.csv", sep=";")
+    resumen.round(2).to_csv(SALIDA_ESTADISTICAS, sep=";")
+
+    # Percentiles para los diagramas de caja (src/plots/)
+    cuantiles_streaming(ARCHIVO_CSV).round(2).to_csv(SALIDA_CUANTILES, sep=";", index=False)
+    print(f"\n✅ Guardado en 'resumen_medias_tfg.csv', 'resumen_final_conteos.csv', '{SALIDA_ESTADISTICAS}' y '{SALIDA_CUANTILES}'")
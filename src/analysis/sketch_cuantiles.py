@@ -0,0 +1,90 @@
+import numpy as np
+
+# ==========================================
+# SKETCH DE CUANTILES EN STREAMING (KLL)
+# ==========================================
+# Resume una secuencia de valores en memoria acotada y devuelve cualquier
+# cuantil. Mientras no se han visto más de 'capacidad' valores los guarda
+# todos y los cuantiles son EXACTOS (los mismos que pandas/NumPy); a partir de
+# ahí compacta por niveles (Karnin-Lang-Liberty, 2016): cada compactación
+# ordena un nivel y sube la mitad de sus elementos, alternos, al siguiente,
+# donde cuentan el doble. El error en rango queda en torno a 1/capacidad.
+
+CAPACIDAD = 2000
+
+class SketchCuantiles:
+    def __init__(self, capacidad=CAPACIDAD, semilla=0):
+        self.capacidad = capacidad
+        self.niveles = [np.empty(0)]
+        self.rng = np.random.default_rng(semilla)
+        self.n = 0
+        self.suma = 0.0
+        self.suma2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def exacto(self):
+        """True mientras no se ha descartado ningún valor."""
+        return len(self.niveles) == 1
+
+    def _capacidad(self, h):
+        # Los niveles altos (pesos grandes) guardan más; los bajos, menos
+        return max(2, int(np.ceil(self.capacidad * (2 / 3) ** (len(self.niveles) - 1 - h))))
+
+    def agregar(self, valores):
+        """Añade un bloque de valores (array o lista); los NaN se ignoran."""
+        v = np.asarray(valores, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        if not len(v):
+            return
+        self.n += len(v)
+        self.suma += float(v.sum())
+        self.suma2 += float(np.dot(v, v))
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+        self.niveles[0] = np.concatenate([self.niveles[0], v])
+        self._compactar()
+
+    def _compactar(self):
+        h = 0
+        while h < len(self.niveles):
+            if len(self.niveles[h]) > self._capacidad(h):
+                if h + 1 == len(self.niveles):
+                    self.niveles.append(np.empty(0))
+                nivel = np.sort(self.niveles[h])
+                # Si el nivel es impar, el último se queda donde está
+                resto = nivel[len(nivel) - len(nivel) % 2:]
+                elegidos = nivel[self.rng.integers(2):len(nivel) - len(resto):2]
+                self.niveles[h + 1] = np.concatenate([self.niveles[h + 1], elegidos])
+                self.niveles[h] = resto
+            h += 1
+
+    def media(self):
+        return self.suma / self.n if self.n else np.nan
+
+    def std(self):
+        """Desviación típica muestral (ddof=1, como pandas)."""
+        if self.n < 2:
+            return np.nan
+        var = (self.suma2 - self.suma * self.suma / self.n) / (self.n - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+    def cuantiles(self, ps):
+        """Cuantiles en las probabilidades 'ps' (0..1)."""
+        ps = np.asarray(ps, dtype=np.float64)
+        if not self.n:
+            return np.full(len(ps), np.nan)
+        if self.exacto:
+            # Interpolación lineal, igual que pandas.quantile
+            return np.quantile(self.niveles[0], ps)
+        valores = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(nivel), 2.0 ** h) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(valores, kind='stable')
+        valores, acumulado = valores[orden], np.cumsum(pesos[orden])
+        posiciones = np.searchsorted(acumulado, ps * acumulado[-1], side='left')
+        q = valores[np.minimum(posiciones, len(valores) - 1)]
+        # Los extremos se conocen exactamente
+        q[ps <= 0] = self.min
+        q[ps >= 1] = self.max
+        return q
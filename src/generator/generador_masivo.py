@@ -1,165 +1,220 @@
-import random
 import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 
 # ==========================================
 # CONFIGURACIÓN GENERAL
 # ==========================================
 CARPETA_SALIDA = "." # Donde se guardarán los .dat
 
+# Semilla de la batería: con la misma semilla se obtienen exactamente los
+# mismos ficheros (cada instancia deriva la suya de ésta y de su nombre).
+SEMILLA_BASE = 2024
+
 # Datos fijos de base (Clientes y sus distancias aproximadas)
 NUM_CLIENTES = 15
 CLIENTES = [f"C{i+1}" for i in range(NUM_CLIENTES)]
-DISTANCIAS_BASE = {c: random.randint(5, 100) for c in CLIENTES}
+_rng_base = np.random.default_rng(SEMILLA_BASE)
+DISTANCIAS_BASE = dict(zip(CLIENTES, _rng_base.integers(5, 100, size=NUM_CLIENTES, endpoint=True).tolist()))
+
+# Tipos de camión: [PesoMax, VolMax, CosteFijo, ADR]
+TIPOS_CAMION = np.array([
+    (3500, 25, 700, 1), # Grande
+    (2500, 18, 550, 0), # Mediano
+    (1000, 10, 350, 0)  # Pequeño
+])
+
+# Probabilidad de que un pedido sea ADR según el perfil
+PROB_ADR = {
+    "adr_extremo": 0.6,  # 60% probabilidad de ser ADR
+    "adr_medio": 0.5,    # 50% probabilidad de ser ADR
+    "adr_bajo": 0.25,    # 25% probabilidad de ser ADR
+    "pesado": 0.0,
+    "normal": 0.1,       # 10% probabilidad ADR
+}
+
+FECHA_HOY = 45984
+
+# Formato de salida: "dat" (texto AMPL), "npz" (binario por columnas, ver
+# src/model/formato_npz.py; se carga sin parsear) o "ambos"
+FORMATO = "dat"
+
+def semilla_instancia(nombre_archivo):
+    """Semilla estable de una instancia: SEMILLA_BASE + nombre (sin carpeta)."""
+    return [SEMILLA_BASE, zlib.crc32(os.path.basename(nombre_archivo).encode("utf-8"))]
 
 # ==========================================
 # MOTOR DE GENERACIÓN
 # ==========================================
-def generar_archivo_dat(nombre_archivo, num_pedidos, num_camiones, perfil="normal"):
-    print(f"Generando {nombre_archivo} ({perfil})...")
-    
-    with open(nombre_archivo, "w", encoding="utf-8") as f:
-        f.write(f"# Escenario generado automaticamente: {perfil}\n\n")
-        
+def bloque_param(nombre, claves, valores):
+    """Texto de un 'param nombre := ...;' con una línea por elemento."""
+    return f"param {nombre} :=\n" + "".join(f"  '{k}' {v}\n" for k, v in zip(claves, valores)) + ";\n"
+
+def guardar_npz(nombre_archivo, pedidos, camiones, dist, tipos, adr_max, pmax, peso, vol, es_adr, cliente, fecha, t, alpha):
+    """Misma instancia en formato .npz, escrita por src/model/formato_npz.py (un único esquema)."""
+    # Import diferido: generar sólo .dat no necesita el modelo
+    carpeta_modelo = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model")
+    if carpeta_modelo not in sys.path:
+        sys.path.insert(0, carpeta_modelo)
+    from instancia import DatosInstancia
+    from formato_npz import guardar_npz as escribir_npz
+
+    datos = DatosInstancia(
+        pedidos=pedidos, vol=vol, pes=peso, fecha=fecha, adr=es_adr, t=t, cli=cliente,
+        clientes=CLIENTES, dist_c=dist,
+        camiones=camiones, V=tipos[:, 1], W=tipos[:, 0], ADRmax=adr_max, Pmax=pmax, F=tipos[:, 2],
+        alpha=alpha, s=100, fecha_hoy=FECHA_HOY,
+    )
+    escribir_npz(datos, os.path.splitext(nombre_archivo)[0] + ".npz")
+
+def generar_archivo_dat(nombre_archivo, num_pedidos, num_camiones, perfil="normal", semilla=None, verbose=True, formato=None):
+    """Genera una instancia .dat (y/o .npz, según 'formato' o FORMATO).
+
+    Todo se muestrea en bloque con NumPy a partir de 'semilla' (por defecto,
+    la derivada del nombre del fichero) y el texto se escribe de una vez.
+    """
+    formato = formato or FORMATO
+    if verbose:
+        print(f"Generando {nombre_archivo} ({perfil})...")
+    rng = np.random.default_rng(semilla if semilla is not None else semilla_instancia(nombre_archivo))
+
+    lista_pedidos = [f"P{i+1}" for i in range(num_pedidos)]
+    lista_camiones = [f"T{j+1}" for j in range(num_camiones)]
+
+    # --- Clientes: pequeña variación aleatoria en la distancia
+    dist = np.maximum(1, np.array(list(DISTANCIAS_BASE.values())) + rng.integers(-5, 5, size=NUM_CLIENTES, endpoint=True))
+
+    # --- Camiones (Simulamos flota heterogénea)
+    tipos = TIPOS_CAMION[rng.integers(0, len(TIPOS_CAMION), size=num_camiones)]
+    adr_max = np.where(tipos[:, 3] == 1, 5, 0) # Si es ADR, permite 5 puntos, si no 0
+    pmax = rng.integers(4, 10, size=num_camiones, endpoint=True) # Paradas máximas entre 4 y 10
+
+    # --- Pedidos (Aquí aplicamos el "perfil")
+    if perfil == "pesado":
+        peso = rng.integers(500, 1200, size=num_pedidos, endpoint=True) # Pedidos muy pesados
+        vol = rng.integers(3, 6, size=num_pedidos, endpoint=True)
+    else:
+        peso = rng.integers(100, 300, size=num_pedidos, endpoint=True)
+        vol = rng.integers(1, 3, size=num_pedidos, endpoint=True)
+    es_adr = (rng.random(num_pedidos) < PROB_ADR.get(perfil, PROB_ADR["normal"])).astype(int)
+    cliente = rng.integers(0, NUM_CLIENTES, size=num_pedidos)
+    fecha = FECHA_HOY + (rng.random(num_pedidos) >= 0.7) # 70% para hoy, 30% mañana
+    t = np.full(num_pedidos, 350) # Coste mensajería fijo
+
+    alpha = 0.5 if perfil != "caro" else 1.5  # Si el escenario es "caro", sube el coste km
+
+    if formato in ("npz", "ambos"):
+        guardar_npz(nombre_archivo, lista_pedidos, lista_camiones, dist, tipos, adr_max, pmax,
+                    peso, vol, es_adr, cliente, fecha, t, alpha)
+    if formato == "npz":
+        return nombre_archivo
+
+    partes = [
+        f"# Escenario generado automaticamente: {perfil}\n\n",
         # 1. PARÁMETROS GLOBALES
-        alpha = 0.5 if perfil != "caro" else 1.5  # Si el escenario es "caro", sube el coste km
-        f.write(f"param alpha := {alpha};\n")
-        f.write("param fecha_hoy := 45984;\n")
-        f.write("param s := 100;\n\n")
-        
+        f"param alpha := {alpha};\n",
+        f"param fecha_hoy := {FECHA_HOY};\n",
+        "param s := 100;\n\n",
         # 2. SETS (Conjuntos)
-        # Pedidos
-        lista_pedidos = [f"P{i+1}" for i in range(num_pedidos)]
-        f.write(f"set I := {' '.join(lista_pedidos)};\n")
-        
-        # Clientes
-        f.write(f"set C := {' '.join(CLIENTES)};\n")
-        
-        # Camiones
-        lista_camiones = [f"T{j+1}" for j in range(num_camiones)]
-        f.write(f"set J := {' '.join(lista_camiones)};\n\n")
-        
+        f"set I := {' '.join(lista_pedidos)};\n",
+        f"set C := {' '.join(CLIENTES)};\n",
+        f"set J := {' '.join(lista_camiones)};\n\n",
         # 3. PARÁMETROS DE CLIENTES
-        f.write("param dist_c :=\n")
-        for c in CLIENTES:
-            # Pequeña variación aleatoria en la distancia
-            dist = max(1, DISTANCIAS_BASE[c] + random.randint(-5, 5))
-            f.write(f"  '{c}' {dist}\n")
-        f.write(";\n\n")
-        
-        # 4. PARÁMETROS DE CAMIONES (Simulamos flota heterogénea)
-        # Tipos: [PesoMax, VolMax, CosteFijo, ADR]
-        tipos_camion = [
-            (3500, 25, 700, 1), # Grande
-            (2500, 18, 550, 0), # Mediano
-            (1000, 10, 350, 0)  # Pequeño
-        ]
-        
-        datos_camiones = {}
-        for t in lista_camiones:
-            tipo = random.choice(tipos_camion)
-            datos_camiones[t] = tipo
-
-        # Escribir param F (Coste Fijo)
-        f.write("param F :=\n")
-        for t, data in datos_camiones.items():
-            f.write(f"  '{t}' {data[2]}\n")
-        f.write(";\n")
-
-        # Escribir param ADRmax (Capacidad ADR)
-        f.write("param ADRmax :=\n")
-        for t, data in datos_camiones.items():
-            limit = 5 if data[3] == 1 else 0 # Si es ADR, permite 5 puntos, si no 0
-            f.write(f"  '{t}' {limit}\n")
-        f.write(";\n")
-
-        # Escribir W (Peso) y V (Volumen) y Pmax
-        f.write("param W :=\n")
-        for t, data in datos_camiones.items(): f.write(f"  '{t}' {data[0]}\n")
-        f.write(";\n")
-        
-        f.write("param V :=\n")
-        for t, data in datos_camiones.items(): f.write(f"  '{t}' {data[1]}\n")
-        f.write(";\n")
-
-        f.write("param Pmax :=\n") # Paradas máximas aleatorias entre 4 y 10
-        for t in lista_camiones: f.write(f"  '{t}' {random.randint(4, 10)}\n")
-        f.write(";\n\n")
-
-        # 5. PARÁMETROS DE PEDIDOS (Aquí aplicamos el "perfil")
-        datos_pedidos = {}
-        for p in lista_pedidos:
-            # Lógica según el perfil
-            es_adr = 0
-            peso = random.randint(100, 300)
-            vol = random.randint(1, 3)
-            
-            if perfil == "adr_extremo":
-                if random.random() < 0.6: es_adr = 1 # 60% probabilidad de ser ADR
-            elif perfil == "adr_medio":
-                if random.random() < 0.5: es_adr = 1 # 50% probabilidad de ser ADR
-            elif perfil == "adr_bajo":
-                if random.random() < 0.25: es_adr = 1 # 25% probabilidad de ser ADR
-            elif perfil == "pesado":
-                peso = random.randint(500, 1200) # Pedidos muy pesados
-                vol = random.randint(3, 6)
-            else: # Normal
-                if random.random() < 0.1: es_adr = 1 # 10% probabilidad ADR
-
-            cliente = random.choice(CLIENTES)
-            datos_pedidos[p] = {
-                "pes": peso, "vol": vol, "adr": es_adr, "cli": cliente,
-                "t": 350, # Coste mensajería fijo
-                "fecha": 45984 + (0 if random.random() < 0.7 else 1) # 70% para hoy, 30% mañana
-            }
-
-        # Escribir params de pedidos
-        for param in ["pes", "vol", "adr", "t", "fecha", "cli"]:
-            f.write(f"param {param} :=\n")
-            for p, d in datos_pedidos.items():
-                val = d[param]
-                if param == "cli": val = f"'{val}'"
-                f.write(f"  '{p}' {val}\n")
-            f.write(";\n")
+        bloque_param("dist_c", CLIENTES, dist.tolist()), "\n",
+        # 4. PARÁMETROS DE CAMIONES
+        bloque_param("F", lista_camiones, tipos[:, 2].tolist()),
+        bloque_param("ADRmax", lista_camiones, adr_max.tolist()),
+        bloque_param("W", lista_camiones, tipos[:, 0].tolist()),
+        bloque_param("V", lista_camiones, tipos[:, 1].tolist()),
+        bloque_param("Pmax", lista_camiones, pmax.tolist()), "\n",
+        # 5. PARÁMETROS DE PEDIDOS
+        bloque_param("pes", lista_pedidos, peso.tolist()),
+        bloque_param("vol", lista_pedidos, vol.tolist()),
+        bloque_param("adr", lista_pedidos, es_adr.tolist()),
+        bloque_param("t", lista_pedidos, t.tolist()),
+        bloque_param("fecha", lista_pedidos, fecha.tolist()),
+        bloque_param("cli", lista_pedidos, [f"'{CLIENTES[k]}'" for k in cliente.tolist()]),
+    ]
+
+    # Una sola escritura con buffer grande
+    with open(nombre_archivo, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("".join(partes))
+    return nombre_archivo
+
+# ==========================================
+# BATERÍAS COMPLETAS (EN PARALELO)
+# ==========================================
+def trabajos_bateria(escenarios, num_iteraciones, carpeta):
+    """Lista de (nombre, pedidos, camiones, perfil) de toda la batería."""
+    return [
+        (os.path.join(carpeta, f"run_{etiqueta}_iter{i:02d}.dat"), pedidos, camiones, perfil)
+        for i in range(1, num_iteraciones + 1)
+        for etiqueta, pedidos, camiones, perfil in escenarios
+    ]
+
+def _generar_trabajo(trabajo):
+    nombre, pedidos, camiones, perfil = trabajo
+    return generar_archivo_dat(nombre, pedidos, camiones, perfil, verbose=False)
+
+def generar_bateria(escenarios, num_iteraciones=30, carpeta="bateria_pruebas", procesos=None):
+    """Genera iteraciones x escenarios instancias repartidas entre procesos.
+
+    Como cada fichero tiene su propia semilla, el resultado no depende del
+    número de procesos ni del orden en que terminen.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    trabajos = trabajos_bateria(escenarios, num_iteraciones, carpeta)
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        for trabajo in trabajos:
+            _generar_trabajo(trabajo)
+        return len(trabajos)
+
+    hechos = 0
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for futuro in as_completed([pool.submit(_generar_trabajo, t) for t in trabajos]):
+            futuro.result()
+            hechos += 1
+            if hechos % 50 == 0: print(f"   {hechos}/{len(trabajos)}...")
+    return hechos
 
 # ==========================================
 # EJECUCIÓN: CREAR LOS ESCENARIOS
 # ==========================================
+# (etiqueta, pedidos, camiones, perfil) -> run_<etiqueta>_iterNN.dat
+ESCENARIOS = [
+    # ("40p_05c", 40, 5, "normal"),
+    # ("60p_05c", 60, 5, "normal"),
+    # ("80p_05c", 80, 5, "normal"),
+    # ("100p_05c", 100, 5, "normal"),
+    # ("100p_10c", 100, 10, "normal"),
+    #
+    # ("200p_10c", 200, 10, "normal"),
+    # ("400p_10c", 400, 10, "normal"),
+    # ("400p_20c", 400, 20, "normal"),
+    # ("400p_25c", 400, 25, "normal"),
+    # ("400p_30c", 400, 30, "normal"),
+    # ("400p_40c", 400, 40, "normal"),
+    #
+    # ("200p_ADRE", 200, 15, "adr_extremo"),
+    # ("200p_ADRM", 200, 15, "adr_medio"),
+    # ("200p_ADRB", 200, 15, "adr_bajo"),
+
+    ("200p_normal", 200, 15, "normal"),
+    ("200p_ADR", 200, 15, "adr_extremo"),
+    ("200p_pesado", 200, 15, "pesado"),
+]
+
 if __name__ == "__main__":
     NUM_ITERACIONES = 30
-    
+    PROCESOS = None # None = todos los núcleos; 1 = secuencial
+
+    print(f"--- Generando {NUM_ITERACIONES} instancias por escenario (semilla {SEMILLA_BASE}) ---")
+
     # Crea una carpeta para no inundar el directorio principal
-    if not os.path.exists("bateria_pruebas"):
-        os.makedirs("bateria_pruebas")
-
-    print(f"--- Generando {NUM_ITERACIONES} instancias por escenario ---")
-
-    # Bucle para generar las 30 copias con semillas aleatorias distintas
-    for i in range(1, NUM_ITERACIONES + 1):
-        # Formato de nombre: "escenario_iteracion.dat"
-        # Usamos f"{i:02d}" para que salga 01, 02... y se ordenen bien.
-        '''
-        generar_archivo_dat(f"bateria_pruebas/run_40p_05c_iter{i:02d}.dat", 40, 5, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_60p_05c_iter{i:02d}.dat", 60, 5, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_80p_05c_iter{i:02d}.dat", 80, 5, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_100p_05c_iter{i:02d}.dat", 100, 5, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_100p_10c_iter{i:02d}.dat", 100, 10, "normal")
-        
-        generar_archivo_dat(f"bateria_pruebas/run_200p_10c_iter{i:02d}.dat", 200, 10, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_400p_10c_iter{i:02d}.dat", 400, 10, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_400p_20c_iter{i:02d}.dat", 400, 20, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_400p_25c_iter{i:02d}.dat", 400, 25, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_400p_30c_iter{i:02d}.dat", 400, 30, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_400p_40c_iter{i:02d}.dat", 400, 40, "normal")
-        
-        generar_archivo_dat(f"bateria_pruebas/run_200p_ADRE_iter{i:02d}.dat", 200, 15, "adr_extremo")
-        generar_archivo_dat(f"bateria_pruebas/run_200p_ADRM_iter{i:02d}.dat", 200, 15, "adr_medio")
-        generar_archivo_dat(f"bateria_pruebas/run_200p_ADRB_iter{i:02d}.dat", 200, 15, "adr_bajo")
-        '''
-
-        generar_archivo_dat(f"bateria_pruebas/run_200p_normal_iter{i:02d}.dat", 200, 15, "normal")
-        generar_archivo_dat(f"bateria_pruebas/run_200p_ADR_iter{i:02d}.dat", 200, 15, "adr_extremo")
-        generar_archivo_dat(f"bateria_pruebas/run_200p_pesado_iter{i:02d}.dat", 200, 15, "pesado")
-        
-        if i % 5 == 0: print(f"Generate {i}...")
-
-    print("\n✅ ¡Listo! Los archivos generados se encuentran en 'bateria_pruebas'.")
\ No newline at end of file
+    total = generar_bateria(ESCENARIOS, NUM_ITERACIONES, "bateria_pruebas", PROCESOS)
+
+    print(f"\n✅ ¡Listo! {total} archivos generados en 'bateria_pruebas'.")
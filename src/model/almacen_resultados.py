@@ -0,0 +1,134 @@
+# ====================================================
+#   ALMACÉN DE RESULTADOS (SQLite)
+#   Reanudable y a prueba de cortes; el CSV se exporta desde aquí
+# ====================================================
+
+import csv
+import hashlib
+import json
+import sqlite3
+import time
+
+COLUMNAS_CSV = ["Archivo", "Pedidos", "Camiones", "Config", "Estado", "Objetivo", "Gap", "Tiempo"]
+
+# ----------------------------------------------------
+# 1) CLAVES
+# ----------------------------------------------------
+# Un resultado se identifica por (hash de la instancia, config, solver):
+#   - hash: SHA-256 del contenido del fichero (renombrar o mover la batería
+#     no invalida lo ya resuelto; regenerarla con otros datos, sí)
+#   - config: etiqueta de la fila del CSV ("Limite_60s")
+#   - solver: motor, backend y opciones que cambian el resultado, incluidos
+#     el límite y el ratio de la configuración ("milp/cbc+warmstart|sec=60,ratio=0.01"):
+#     cambiar el ratio de una etiqueta no reutiliza filas viejas
+
+def hash_fichero(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+# ----------------------------------------------------
+# 2) ALMACÉN
+# ----------------------------------------------------
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    hash      TEXT NOT NULL,
+    config    TEXT NOT NULL,
+    solver    TEXT NOT NULL,
+    archivo   TEXT NOT NULL,
+    pedidos   TEXT,
+    camiones  TEXT,
+    estado    TEXT,
+    objetivo  TEXT,
+    gap       TEXT,
+    tiempo    TEXT,
+    metricas  TEXT,
+    fecha     REAL,
+    PRIMARY KEY (hash, config, solver)
+)
+"""
+
+class AlmacenResultados:
+    """Resultados del batch en SQLite.
+
+    Las filas se guardan tal cual van al CSV (ya con coma decimal), así que
+    exportar_csv() reproduce exactamente el formato de siempre. Las escrituras
+    se acumulan con agregar() y se confirman en bloque con confirmar(): si el
+    batch se corta, sólo se pierde el último bloque sin confirmar.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.conn = sqlite3.connect(ruta)
+        # WAL: confirmar no reescribe la base entera y un corte no la corrompe
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(ESQUEMA)
+        self.conn.commit()
+        self.pendientes = []
+
+    def completados(self, solvers):
+        """Conjunto de (hash, config, solver) ya resueltos con alguno de esos solvers."""
+        solvers = list(solvers)
+        marcas = ", ".join("?" * len(solvers))
+        cur = self.conn.execute(f"SELECT hash, config, solver FROM resultados WHERE solver IN ({marcas})", solvers)
+        return set(cur.fetchall())
+
+    def agregar(self, hash_instancia, solver, fila, metricas=None):
+        """Encola una fila del CSV (lista de 8 valores) para el próximo confirmar()."""
+        archivo, pedidos, camiones, config, estado, objetivo, gap, tiempo = fila
+        self.pendientes.append((
+            hash_instancia, config, solver, archivo, str(pedidos), str(camiones),
+            estado, objetivo, gap, tiempo,
+            json.dumps(metricas, ensure_ascii=False) if metricas is not None else None,
+            time.time(),
+        ))
+
+    def confirmar(self):
+        """Escribe las filas pendientes en una única transacción."""
+        if not self.pendientes:
+            return 0
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.pendientes,
+            )
+        n = len(self.pendientes)
+        self.pendientes = []
+        return n
+
+    def _filas(self, columnas, claves=None):
+        """Filas (en orden de inserción) con esas columnas; sólo las de 'claves' si se da.
+
+        'claves' es un conjunto de (hash, config, solver): el batch pasa las
+        de la batería actual, para que el CSV no mezcle baterías distintas
+        que comparten almacén.
+        """
+        consulta = f"SELECT hash, config, solver, {columnas} FROM resultados ORDER BY rowid"
+        for fila in self.conn.execute(consulta):
+            if claves is None or fila[:3] in claves:
+                yield fila[3:]
+
+    def exportar_csv(self, ruta, claves=None):
+        """CSV con el formato Archivo;Pedidos;...;Tiempo (todas las filas, o las de 'claves')."""
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(COLUMNAS_CSV)
+            n = 0
+            for fila in self._filas("archivo, pedidos, camiones, config, estado, objetivo, gap, tiempo", claves):
+                writer.writerow(fila)
+                n += 1
+        return n
+
+    def exportar_metricas(self, ruta, claves=None):
+        """Una línea JSON por fila con las métricas del trabajo."""
+        with open(ruta, "w", encoding="utf-8") as f:
+            for (metricas,) in self._filas("metricas", claves):
+                if metricas is not None:
+                    f.write(metricas + "\n")
+
+    def cerrar(self):
+        self.confirmar()
+        self.conn.close()
@@ -0,0 +1,185 @@
+# ====================================================
+#   BACKENDS DE SOLVER
+#   Misma interfaz para CBC (fichero LP + proceso) y HiGHS (en proceso)
+# ====================================================
+
+import importlib.util
+import math
+import time
+from contextlib import redirect_stdout
+
+from pyomo.environ import SolverFactory
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
+
+# ----------------------------------------------------
+# 1) INTERFAZ COMÚN
+# ----------------------------------------------------
+# Cada backend expone:
+#   resolver(instance, sec=None, warmstart=False, **extra) -> results
+#     - extra: opciones propias del backend (CBC: 'flujo' para leer su log en
+#       vivo, 'logfile'...); los demás backends las ignoran
+#     - results con la forma de SolverResults de Pyomo (lo que espera
+#       obtener_datos_resultado: solver.status/termination_condition y
+#       problem[0].upper_bound/lower_bound)
+#     - si hay solución, queda cargada en las variables de la instancia
+#     - duales=True (sólo LP): los precios sombra quedan en el Suffix
+#       'dual' (IMPORT) de la instancia, igual con los dos backends
+#   con_solucion: True si la última resolución dejó una solución cargada
+#   ultimos_tiempos = {"total": s, "solver": s, "overhead": s}
+#     "solver" es lo que el propio solver dice haber tardado; "overhead" el
+#     resto (escribir el LP, lanzar el proceso, leer resultados...).
+
+class BackendCBC:
+    """CBC por SolverFactory: escribe un LP, lanza cbc y lee la solución."""
+    nombre = "cbc"
+
+    def __init__(self, sec, ratio, hilos=None, ejecutable=None):
+        self.opt = SolverFactory("cbc", executable=ejecutable) if ejecutable else SolverFactory("cbc")
+        self.opt.options['sec'] = sec
+        self.opt.options['ratio'] = ratio
+        if hilos is not None:
+            self.opt.options['threads'] = hilos
+        self.con_solucion = False
+        self.ultimos_tiempos = {}
+
+    @property
+    def options(self):
+        return self.opt.options
+
+    def resolver(self, instance, sec=None, warmstart=False, flujo=None, duales=False, **extra):
+        """'flujo' (p. ej. log_cbc.FlujoLog) recibe la salida de CBC en vivo."""
+        if sec is not None:
+            self.opt.options['sec'] = sec
+        if duales:
+            extra['suffixes'] = ['dual']
+        inicio = time.time()
+        if flujo is None:
+            results = self.opt.solve(instance, tee=False, warmstart=warmstart, load_solutions=False, **extra)
+        else:
+            # El tee de Pyomo escribe en sys.stdout: se desvía al flujo
+            with redirect_stdout(flujo):
+                results = self.opt.solve(instance, tee=True, warmstart=warmstart, load_solutions=False, **extra)
+        self.con_solucion = len(results.solution) > 0
+        if self.con_solucion:
+            instance.solutions.load_from(results)
+        total = time.time() - inicio
+        solver = results.solver.wallclock_time
+        if not isinstance(solver, (int, float)) or solver < 0:
+            solver = total
+        self.ultimos_tiempos = {"total": total, "solver": solver, "overhead": max(0.0, total - solver)}
+        return results
+
+
+class BackendGLPK(BackendCBC):
+    """GLPK (glpsol) por SolverFactory, como CBC. No admite incumbente inicial ni hilos."""
+    nombre = "glpk"
+
+    def __init__(self, sec, ratio, hilos=None, ejecutable=None):
+        self.opt = SolverFactory("glpk", executable=ejecutable) if ejecutable else SolverFactory("glpk")
+        self.opt.options['tmlim'] = math.ceil(sec)
+        self.opt.options['mipgap'] = ratio
+        self.con_solucion = False
+        self.ultimos_tiempos = {}
+
+    def resolver(self, instance, sec=None, warmstart=False, duales=False, **extra):
+        if sec is not None:
+            self.opt.options['tmlim'] = math.ceil(sec)
+        return super().resolver(instance, warmstart=False, duales=duales, **extra)
+
+class BackendHiGHS:
+    """HiGHS en el propio proceso (appsi, persistente).
+
+    Sin ficheros ni subprocesos. Si se vuelve a resolver el mismo objeto
+    modelo (p. ej. una PlantillaModelo con parámetros nuevos), sólo se
+    transmiten los cambios en lugar de reconstruir el problema.
+    """
+    nombre = "highs"
+
+    def __init__(self, sec, ratio, hilos=None):
+        from pyomo.contrib.appsi.solvers import Highs
+
+        self.opt = Highs()
+        self.opt.config.time_limit = sec
+        self.opt.config.mip_gap = ratio
+        self.opt.config.load_solution = False
+        if hilos is not None:
+            self.opt.highs_options['threads'] = hilos
+        self._ultima_instancia, self._reloj_previo = None, 0.0
+        self.con_solucion = False
+        self.ultimos_tiempos = {}
+
+    def resolver(self, instance, sec=None, warmstart=False, duales=False, **extra):
+        if sec is not None:
+            self.opt.config.time_limit = sec
+        self.opt.config.warmstart = warmstart
+        inicio = time.time()
+        res = self.opt.solve(instance)
+        self.con_solucion = res.best_feasible_objective is not None
+        if self.con_solucion:
+            res.solution_loader.load_vars()
+            if duales:
+                for restriccion, precio in res.solution_loader.get_duals().items():
+                    instance.dual[restriccion] = precio
+        total = time.time() - inicio
+        # El reloj de HiGHS es acumulado mientras se reutiliza el mismo modelo
+        reloj = res.wallclock_time
+        if reloj is None:
+            solver = total
+        elif instance is self._ultima_instancia and reloj >= self._reloj_previo:
+            solver = reloj - self._reloj_previo
+        else:
+            solver = reloj
+        self._ultima_instancia, self._reloj_previo = instance, reloj or 0.0
+        self.ultimos_tiempos = {"total": total, "solver": solver, "overhead": max(0.0, total - solver)}
+        return resultados_legacy(res)
+
+
+def resultados_legacy(res):
+    """Traduce un resultado appsi al SolverResults clásico (estilo CBC)."""
+    results = SolverResults()
+    nombre = res.termination_condition.name
+    results.solver.termination_condition = getattr(TerminationCondition, nombre, TerminationCondition.unknown)
+    if nombre == "optimal":
+        results.solver.status = SolverStatus.ok
+    elif nombre in ("maxTimeLimit", "maxIterations", "interrupted"):
+        results.solver.status = SolverStatus.aborted
+    else:
+        results.solver.status = SolverStatus.warning
+    ub = res.best_feasible_objective
+    lb = res.best_objective_bound
+    results.problem.upper_bound = ub if ub is not None else float('inf')
+    results.problem.lower_bound = lb if lb is not None else -float('inf')
+    return results
+
+# ----------------------------------------------------
+# 2) REGISTRO
+# ----------------------------------------------------
+BACKENDS = {
+    "cbc": BackendCBC,
+    "highs": BackendHiGHS,
+    "glpk": BackendGLPK,
+}
+
+# Backends persistentes: uno por proceso y nombre, reutilizado entre trabajos
+_PERSISTENTES = {}
+
+def crear_backend(nombre, sec, ratio, hilos=None, **extra):
+    """Backend configurado. Los persistentes se reutilizan dentro del proceso."""
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+    if nombre in ("cbc", "glpk"):
+        return BACKENDS[nombre](sec, ratio, hilos, **extra)
+    backend = _PERSISTENTES.get(nombre)
+    if backend is None:
+        backend = _PERSISTENTES[nombre] = BACKENDS[nombre](sec, ratio, hilos, **extra)
+    else:
+        backend.opt.config.time_limit = sec
+        backend.opt.config.mip_gap = ratio
+    return backend
+
+def disponible(nombre, ejecutable=None):
+    """True si el backend puede usarse en esta máquina (módulo o ejecutable instalado)."""
+    if nombre == "highs":
+        return importlib.util.find_spec("highspy") is not None
+    opt = SolverFactory(nombre, executable=ejecutable) if ejecutable else SolverFactory(nombre)
+    return bool(opt.available(exception_flag=False))
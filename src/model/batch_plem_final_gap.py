@@ -1,15 +1,30 @@
 import os
 import glob
 import time
-import csv
 import sys
 import shutil
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Importación segura del modelo
 try:
-    from pyomo.environ import SolverFactory, value
-    from model import model 
+    from pyomo.environ import value
+    from model import romper_simetria
+    from log_cbc import FlujoLog, estado_en, guardar_trayectoria
+    from heuristica import plan_greedy, plan_canonico, aplicar_warmstart, plan_desde_instancia
+    from motor_lns import resolver_lns
+    from motor_columnas import resolver_columnas
+    from descomposicion import resolver_descomposicion
+    from portafolio import resolver_portafolio, PORTAFOLIO
+    from instancia import leer_datos, construir_modelo
+    from formato_npz import tamanos_npz
+    from parser_dat import tamanos_dat, FormatoNoSoportado
+    from plantilla import instancia_desde_plantilla
+    from backends import crear_backend
+    from instrumentacion import Fases, memoria_pico, tamano_modelo
+    from almacen_resultados import AlmacenResultados, hash_fichero
+    from cache_soluciones import CacheSoluciones, clave_cache, plan_a_posiciones, plan_desde_posiciones
+    from cotas import cota_lagrangiana
     print("✅ Modelo importado correctamente.")
 except ImportError as e:
     print("❌ ERROR: No se pudo importar 'model.py'.")
@@ -19,6 +34,31 @@ except ImportError as e:
 # CONFIGURACIÓN
 # ==========================================
 SALIDA_CSV = "resultados_definitivos.csv"
+# Almacén de resultados (SQLite): cada trabajo terminado se guarda con la
+# clave (hash de la instancia, config, solver). Al relanzar una batería
+# cortada, con REANUDAR se saltan los trabajos ya resueltos. El CSV y las
+# métricas se exportan desde aquí al terminar (o al interrumpir el batch),
+# sólo con las filas de esta batería: el almacén puede compartirse entre
+# carpetas y configuraciones.
+ALMACEN = "resultados.sqlite"
+REANUDAR = True
+# Las filas se confirman en bloque: cada LOTE_ESCRITURA trabajos o cada
+# SEGUNDOS_ESCRITURA segundos, lo que llegue antes
+LOTE_ESCRITURA = 20
+SEGUNDOS_ESCRITURA = 30
+# Métricas por trabajo (una línea JSON por fila del CSV): backend, tiempo del
+# solver y sobrecoste (escritura del LP, arranque del proceso, lectura...),
+# tiempo de cada fase (t_analisis, t_carga, t_preparacion, t_resolucion,
+# t_extraccion), memoria pico y tamaño del modelo enviado al solver
+SALIDA_METRICAS = "metricas_trabajos.jsonl"
+# Contar no-ceros recorre todas las filas del modelo (~0,1 s en 400x40)
+MEDIR_TAMANO = True
+# Trayectorias de convergencia (backend CBC): la salida de CBC se parsea en
+# vivo y cada nueva incumbente o cota se guarda con su segundo en
+# CARPETA_TRAYECTORIAS/<instancia>__<config>.csv. Las lee
+# src/analysis/analizador_trayectorias.py.
+TRAYECTORIAS = True
+CARPETA_TRAYECTORIAS = "trayectorias"
 
 # Búsqueda de CBC
 if os.path.exists("cbc.exe"):
@@ -26,6 +66,18 @@ if os.path.exists("cbc.exe"):
 else:
     RUTA_CBC = r"C:\Solvers\cbc-2.10.12\bin\cbc.exe"
 
+# Ejecución paralela
+# PROCESOS = 1 mantiene el modo secuencial de siempre. Con PROCESOS > 1 cada
+# trabajo (instancia, configuración) se resuelve en un proceso independiente
+# y sólo el proceso principal escribe en el CSV.
+PROCESOS = 1
+# Tope de hilos CBC sumando todos los trabajos simultáneos, repartido entre
+# los procesos. None = cada CBC con un hilo, como en la ejecución secuencial
+# de siempre (y como mucho un proceso por núcleo). Sin este tope, 32 CBC
+# compitiendo por la CPU harían que los límites de tiempo dejasen de ser
+# comparables con los de la ejecución secuencial.
+HILOS_CBC_TOTALES = None
+
 # Configuraciones
 CONFIGURACIONES = [
     {"sec": 20,  "ratio": 0.01, "tag": "Limite_20s"},
@@ -33,17 +85,111 @@ CONFIGURACIONES = [
     {"sec": 300, "ratio": 0.01, "tag": "Limite_300s"}
 ]
 
+# Modo "anytime": en lugar de resolver cada instancia una vez por configuración,
+# se resuelve una sola vez hasta el mayor punto de control y se reconstruyen las
+# filas Limite_<seg>s a partir de la incumbente y la cota que CBC va anotando en
+# su log. Mismo CSV, un 40% menos de tiempo de CBC con 20/60/300 s.
+# (Sólo con el motor CBC: es su log el que se analiza.)
+MODO_ANYTIME = False
+PUNTOS_CONTROL = [c["sec"] for c in CONFIGURACIONES]
+
+# Arranque en caliente: se construye un plan greedy (milisegundos) y se pasa a
+# CBC como incumbente inicial, de modo que nunca empieza sin cota superior.
+WARMSTART = False
+
+# Ruptura de simetría (motor CBC): orden lexicográfico de z y de la carga dentro
+# de cada clase de camiones idénticos (mismos V, W, ADRmax y F). Útil en las
+# flotas grandes, donde hay decenas de camiones intercambiables.
+SIMETRIA = False
+
+# Plantilla reutilizable: en baterías con muchas instancias de la misma forma
+# (|I|, |J|, |C|) el modelo se construye una vez por forma y en cada instancia
+# sólo se actualizan los parámetros mutables. Cada proceso guarda sus
+# plantillas. No se combina con SIMETRIA (sus filas dependen de los datos).
+PLANTILLA = False
+
+# Motor de resolución:
+#   "milp" -> modelo completo con el BACKEND elegido (por defecto; "cbc" es alias)
+#   "lns"  -> ALNS: parte del plan greedy y re-optimiza vecindarios con el BACKEND
+#             (pensado para 400 pedidos y 25-40 camiones, donde CBC agota el límite)
+#   "columnas" -> generación de columnas (motor_columnas.py): ALNS que siembra
+#             cargas por tipo de camión, maestro LP con el BACKEND, cota propia
+#             y maestro entero que recombina las cargas; soluciones como "lns"
+#             pero con cota (aún lejos del óptimo en flotas grandes)
+#   "descomposicion" -> bloques de pedidos resueltos en paralelo y unidos con
+#             una reparación (descomposicion.py); para carteras de miles de
+#             pedidos. No construye el modelo completo (con 5.000 pedidos
+#             sólo eso cuesta ~40 s); los bloques van en PROCESOS_BLOQUES procesos
+#   "portafolio" -> los miembros de PORTAFOLIO (portafolio.py: CBC, HiGHS, GLPK,
+#             semillas...) en carrera, cada uno en su proceso y desde el
+#             mismo greedy; el primero que demuestra el óptimo para a los
+#             demás. El ganador queda en las métricas ('ganador')
+MOTOR = "milp"
+# Procesos del pool de bloques de "descomposicion" en cada trabajo. None = los
+# núcleos que le tocan a cada uno de los PROCESOS trabajos (nº de núcleos //
+# PROCESOS); con 1, los bloques se resuelven en el propio proceso del trabajo.
+PROCESOS_BLOQUES = None
+
+# Backend del solver (ver backends.py):
+#   "cbc"   -> SolverFactory("cbc"): fichero LP + proceso cbc por cada resolución
+#   "highs" -> HiGHS en el propio proceso y persistente (sin ficheros ni
+#              subprocesos); en instancias pequeñas el sobrecoste domina, y con
+#              PLANTILLA sólo se le envían los parámetros que cambian
+#   "glpk"  -> SolverFactory("glpk") (glpsol), como CBC pero sin incumbente inicial
+# El modo anytime siempre usa CBC (se basa en su log).
+BACKEND = "cbc"
+
+# Caché de soluciones (motor MILP): por hash de los datos de la instancia y
+# las opciones del solver. Si ya se resolvió con un límite igual o mayor, la
+# fila sale de la caché al instante (con la trayectoria guardada se
+# reconstruye el estado en el límite pedido); con un límite mayor se resuelve
+# partiendo de la solución guardada. Pensado para repetir baterías y
+# análisis; para medir tiempos, déjalo desactivado.
+CACHE = False
+CARPETA_CACHE = "cache_soluciones"
+CACHE_MAX_MB = 200
+
+# Cota lagrangiana (cotas.py): si el solver no devuelve cota inferior ("N/A
+# (No bounds)", "inf") o el motor no tiene (ALNS), el gap se calcula frente a
+# una cota lagrangiana que se obtiene en menos de medio segundo. En las
+# métricas, 'cota' = "lagrangiana" marca esas filas.
+COTA_LAGRANGIANA = True
+
 # ==========================================
 # FUNCIONES
 # ==========================================
 def analizar_instancia(filepath):
+    """(pedidos, camiones) exactos: tamaño de los sets I y J.
+
+    En los .dat del generador sólo se leen las primeras líneas (los sets van
+    al principio); el fichero completo se lee una única vez, al construir
+    el modelo.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            txt = f.read()
-            return txt.count("'P"), txt.count("'T")
-    except:
+        if filepath.endswith(".npz"):
+            return tamanos_npz(filepath)
+        try:
+            return tamanos_dat(filepath)
+        except FormatoNoSoportado:
+            datos = leer_datos(filepath)
+            return datos.num_pedidos, datos.num_camiones
+    except Exception:
         return 0, 0
 
+def calcular_gap(ub, lb):
+    """Gap relativo (UB - LB) / |UB| con el formato del CSV (coma decimal)."""
+    if ub is None or lb is None:
+         # A veces están en 'solution' en lugar de 'problem'
+         return "N/A (No bounds)"
+    if ub == float('inf') or lb == -float('inf'):
+         return "inf"
+    # Calcular Gap
+    # Para minimización: (UB - LB) / UB
+    # Evitar división por cero
+    denom = abs(ub) if abs(ub) > 1e-9 else 1.0
+    gap_val = abs(ub - lb) / denom
+    return str(round(gap_val, 6)).replace('.', ',')
+
 def obtener_datos_resultado(results, instance):
     """Extrae Objetivo y Gap usando el objeto en memoria."""
     
@@ -78,33 +224,348 @@ def obtener_datos_resultado(results, instance):
             # Lower Bound (LB) = Mejor límite teórico
             ub = results.problem[0].upper_bound
             lb = results.problem[0].lower_bound
-            
-            if ub is None or lb is None:
-                 # A veces están en 'solution' en lugar de 'problem'
-                 gap_str = "N/A (No bounds)"
-            elif ub == float('inf') or lb == -float('inf'):
-                 gap_str = "inf"
-            else:
-                # Calcular Gap
-                # Para minimización: (UB - LB) / UB
-                # Evitar división por cero
-                denom = abs(ub) if abs(ub) > 1e-9 else 1.0
-                gap_val = abs(ub - lb) / denom
-                gap_str = str(round(gap_val, 6)).replace('.', ',')
-                
+            gap_str = calcular_gap(ub, lb)
         except Exception as e:
             gap_str = "N/A (Error)"
 
     return estado_final, obj_val, gap_str
 
 CARPETA_DATOS = "bateria_pruebas"
+# Si una instancia tiene también versión .npz, se carga ésa (sin parsear texto)
+PREFERIR_NPZ = True
+
+def repartir_hilos(num_trabajos):
+    """Devuelve (procesos, hilos por CBC) respetando HILOS_CBC_TOTALES.
+
+    Hilos None = no se fija la opción 'threads' (un hilo, lo de siempre).
+    """
+    hilos_totales = HILOS_CBC_TOTALES or os.cpu_count() or 1
+    procesos = max(1, min(PROCESOS, num_trabajos, hilos_totales))
+    if HILOS_CBC_TOTALES is None:
+        return procesos, None
+    return procesos, max(1, HILOS_CBC_TOTALES // procesos)
+
+def crear_solver(sec, ratio, hilos=None, backend=None):
+    backend = backend or BACKEND
+    extra = {"ejecutable": RUTA_CBC} if backend == "cbc" else {}
+    opt = crear_backend(backend, sec, ratio, hilos, **extra)
+    if opt.nombre == "cbc":
+        # 'sec' en segundos de reloj: por defecto CBC cuenta tiempo de CPU,
+        # sumado entre hilos, y con varios el límite se acortaría
+        opt.options['timeMode'] = "elapsed"
+    return opt
+
+def cargar_instancia(archivo_uso, datos=None):
+    """Modelo de una instancia (.dat/.npz) a partir de sus datos ya leídos o del fichero.
+
+    Los .dat se leen con parser_dat (una pasada, sin DataPortal) y el modelo
+    se construye con construir_modelo, equivalente a model.create_instance.
+    """
+    datos = datos or leer_datos(archivo_uso)
+    if PLANTILLA:
+        return instancia_desde_plantilla(datos)
+    return construir_modelo(datos)
+
+def preparar_instancia(instance, plan=None):
+    """Aplica SIMETRIA y WARMSTART (o el 'plan' dado) a una instancia recién construida."""
+    if SIMETRIA and not PLANTILLA:
+        romper_simetria(instance)
+    if plan is None and WARMSTART:
+        plan = plan_greedy(instance)
+    if plan is not None:
+        if SIMETRIA and not PLANTILLA:
+            plan = plan_canonico(instance, plan)
+        aplicar_warmstart(instance, plan)
+
+def clave_solver(sec, ratio):
+    """Parte 'solver' de la clave del almacén: motor, backend, opciones, límite y ratio."""
+    if MODO_ANYTIME:
+        clave = "anytime/cbc"
+    else:
+        clave = f"{'milp' if MOTOR == 'cbc' else MOTOR}/{BACKEND}"
+    if MOTOR == "portafolio":
+        clave = "portafolio/" + "+".join(m["nombre"] for m in PORTAFOLIO)
+    if WARMSTART and MOTOR not in ("lns", "columnas", "descomposicion", "portafolio"):  # siempre parten del greedy
+        clave += "+warmstart"
+    if SIMETRIA and not PLANTILLA:
+        clave += "+simetria"
+    return f"{clave}|sec={sec},ratio={ratio}"
+
+def claves_configuracion():
+    """{etiqueta de fila: clave 'solver'} de la batería actual."""
+    if MODO_ANYTIME:
+        return {f"Limite_{seg}s": clave_solver(seg, CONFIGURACIONES[0]["ratio"]) for seg in PUNTOS_CONTROL}
+    return {config["tag"]: clave_solver(config["sec"], config["ratio"]) for config in CONFIGURACIONES}
+
+def fila_csv(archivo, pedidos, camiones, etiqueta, estado, obj, gap, duracion):
+    return [
+        archivo, pedidos, camiones,
+        etiqueta, estado,
+        str(obj).replace(".", ","),
+        gap,
+        str(duracion).replace(".", ",")
+    ]
+
+def resolver_trabajo(archivo, archivo_uso, pedidos, camiones, config, hilos=None):
+    """Resuelve una (instancia, configuración) y devuelve (filas, métricas).
+
+    Se ejecuta tanto en el proceso principal como en los trabajadores del
+    pool: cada llamada crea su propia instancia y su propio solver.
+    """
+    fases = Fases()
+    usar_cache = CACHE and MOTOR in ("milp", "cbc")
+    with fases("carga"):
+        datos = leer_datos(archivo_uso) if usar_cache or COTA_LAGRANGIANA or MOTOR in ("columnas", "descomposicion", "portafolio") else None
+
+    # La caché se consulta sólo con los datos: en un acierto no se construye el modelo
+    plan_previo = None
+    if usar_cache:
+        cache = CacheSoluciones(CARPETA_CACHE, CACHE_MAX_MB)
+        clave = clave_cache(datos, opciones_cache(config))
+        entrada = cache.buscar(clave)
+        if entrada is not None:
+            acierto = desde_cache(entrada, config["sec"])
+            if acierto is not None:
+                estado, obj, gap, duracion = acierto
+                metricas = {"cache": "acierto", "sec_cache": entrada["sec"], "archivo": archivo, "config": config["tag"], "motor": MOTOR}
+                gap = completar_gap(datos, obj, gap, metricas, fases)
+                metricas.update(instrumentar(None, fases))
+                if MEDIR_TAMANO and entrada.get("tamano"):
+                    metricas.update(entrada["tamano"])  # el del modelo que se resolvió
+                return [fila_csv(archivo, pedidos, camiones, config["tag"], estado, obj, gap, duracion)], [metricas]
+            if entrada.get("plan") is not None:
+                plan_previo = plan_desde_posiciones(entrada["plan"], datos, posicional=PLANTILLA)
+
+    with fases("carga"):
+        instance = cargar_instancia(archivo_uso, datos) if MOTOR != "descomposicion" else None
+
+    inicio = time.time()
+    if plan_previo is not None:
+        estado, obj, gap, metricas = MOTORES[MOTOR](instance, config, hilos, fases, plan=plan_previo, datos=datos)
+        metricas["cache"] = "arranque"
+    else:
+        estado, obj, gap, metricas = MOTORES[MOTOR](instance, config, hilos, fases, datos=datos)
+    duracion = round(time.time() - inicio, 2)
+    gap = completar_gap(datos, obj, gap, metricas, fases)
+
+    if usar_cache and metricas.get("con_solucion"):
+        cache.guardar(clave, {
+            "sec": config["sec"], "estado": estado, "objetivo": obj, "gap": gap, "duracion": duracion,
+            "plan": plan_a_posiciones(plan_desde_instancia(instance), datos, posicional=PLANTILLA),
+            "eventos": metricas.get("trayectoria"),
+            "tamano": tamano_modelo(instance) if MEDIR_TAMANO else None,
+        })
+
+    eventos = metricas.pop("trayectoria", None)
+    if eventos is not None:
+        metricas["eventos"] = len(eventos)
+        escribir_trayectoria(archivo, config["tag"], eventos)
+    metricas.update(archivo=archivo, config=config["tag"], motor=MOTOR)
+    metricas.update(instrumentar(instance, fases))
+    return [fila_csv(archivo, pedidos, camiones, config["tag"], estado, obj, gap, duracion)], [metricas]
+
+def opciones_cache(config):
+    """Lo que, además de los datos, define una entrada de la caché (sin 'sec')."""
+    return {"motor": "milp", "backend": BACKEND, "ratio": config["ratio"], "simetria": SIMETRIA and not PLANTILLA}
+
+def desde_cache(entrada, sec):
+    """(estado, obj, gap, duración) de una entrada válida para el límite 'sec'.
+
+    Sirve si la búsqueda terminó antes de 'sec', o si se obtuvo con el mismo
+    límite o con uno mayor. Con uno mayor, si
+    la búsqueda no había terminado antes de 'sec' y hay trayectoria, se
+    devuelve la incumbente y la cota que había en ese segundo (como el modo
+    anytime); sin trayectoria, la solución final (mejor o igual). Si la
+    entrada se obtuvo con un límite menor, devuelve None: hay que resolver.
+    """
+    final = entrada["estado"], entrada["objetivo"], entrada["gap"], entrada["duracion"]
+    terminado = "maxTimeLimit" not in entrada["estado"]
+    if terminado and entrada["duracion"] <= sec:
+        return final
+    if entrada["sec"] < sec:
+        return None
+    if entrada["sec"] == sec or not entrada.get("eventos"):
+        return final
+    inc, cota = estado_en([tuple(e) for e in entrada["eventos"]], sec)
+    return "aborted/maxTimeLimit", inc if inc is not None else "Error", calcular_gap(inc, cota), sec
+
+def sin_cota(gap):
+    return gap == "inf" or str(gap).startswith("N/A")
+
+def completar_gap(datos, obj, gap, metricas, fases, cota=None):
+    """Con COTA_LAGRANGIANA, el gap frente a la cota lagrangiana si el solver no dio cota.
+
+    'cota' permite reutilizar una ya calculada para la misma instancia.
+    """
+    if not COTA_LAGRANGIANA or not sin_cota(gap) or not isinstance(obj, (int, float)):
+        return gap
+    if cota is None:
+        with fases("cota"):
+            resultado = cota_lagrangiana(datos, ub=obj)
+        cota = resultado["cota"]
+        metricas["it_cota"] = resultado["iteraciones"]
+    metricas.update(cota="lagrangiana", cota_lagrangiana=round(cota, 4))
+    return calcular_gap(obj, cota)
+
+def escribir_trayectoria(archivo, etiqueta, eventos):
+    os.makedirs(CARPETA_TRAYECTORIAS, exist_ok=True)
+    nombre = os.path.splitext(os.path.basename(archivo))[0]
+    guardar_trayectoria(os.path.join(CARPETA_TRAYECTORIAS, f"{nombre}__{etiqueta}.csv"), eventos)
+
+def instrumentar(instance, fases):
+    """Tiempos por fase, memoria pico y (si MEDIR_TAMANO) tamaño del modelo."""
+    metricas = fases.como_dict()
+    metricas.update(memoria_pico())
+    if MEDIR_TAMANO and instance is not None:
+        metricas.update(tamano_modelo(instance))
+    return metricas
+
+def metricas_backend(opt):
+    t = opt.ultimos_tiempos
+    return {"backend": opt.nombre, "t_solver": round(t["solver"], 4), "t_overhead": round(t["overhead"], 4)}
+
+def motor_milp(instance, config, hilos, fases, plan=None, datos=None):
+    opt = crear_solver(config["sec"], config["ratio"], hilos)
+    with fases("preparacion"):
+        preparar_instancia(instance, plan)
+    flujo = FlujoLog() if TRAYECTORIAS and opt.nombre == "cbc" else None
+    with fases("resolucion"):
+        results = opt.resolver(instance, warmstart=WARMSTART or plan is not None, flujo=flujo) # Silencioso
+
+    # --- EXTRACCIÓN MEJORADA ---
+    with fases("extraccion"):
+        estado, obj, gap = obtener_datos_resultado(results, instance)
+    # ---------------------------
+    metricas = metricas_backend(opt)
+    metricas["con_solucion"] = opt.con_solucion
+    if flujo is not None:
+        metricas["trayectoria"] = flujo.cerrar()
+    return estado, obj, gap, metricas
+
+def motor_lns(instance, config, hilos, fases, datos=None):
+    opt = crear_solver(config["sec"], config["ratio"], hilos)
+    with fases("resolucion"):
+        plan, resumen = resolver_lns(instance, opt, config["sec"])
+    print(f"[ALNS {resumen['mejoras']}/{resumen['iteraciones']} mejoras]", end=" ", flush=True)
+    metricas = {"backend": opt.nombre, "iteraciones": resumen["iteraciones"], "mejoras": resumen["mejoras"],
+                "resueltos": resumen["resueltos"]}
+    # Ningún subproblema dio solución: el plan es el greedy sin tocar, no un resultado del ALNS
+    estado = "ok/feasible" if resumen["resueltos"] else "warning/noSolution"
+    # Sin cota inferior propia: con COTA_LAGRANGIANA se certifica con cotas.py
+    return estado, plan["objetivo"], "N/A (LNS)", metricas
+
+def motor_columnas(instance, config, hilos, fases, plan=None, datos=None):
+    opt = crear_solver(config["sec"], config["ratio"], hilos)
+    with fases("preparacion"):
+        inicial = plan_a_posiciones(plan or plan_greedy(instance), datos, posicional=PLANTILLA)
+    with fases("resolucion"):
+        plan, resumen = resolver_columnas(datos, opt, config["sec"], inicial)
+    with fases("extraccion"):
+        aplicar_warmstart(instance, plan_desde_posiciones(plan, datos, posicional=PLANTILLA))
+    print(f"[CG {resumen['rondas']} rondas, {resumen['columnas']} columnas]", end=" ", flush=True)
+    metricas = {"backend": opt.nombre, "rondas": resumen["rondas"], "columnas": resumen["columnas"],
+                "convergido": resumen["convergido"], "con_solucion": True}
+    gap = calcular_gap(plan["objetivo"], resumen["cota"])
+    estado = "ok/optimal" if float(gap.replace(",", ".")) <= config["ratio"] else "ok/feasible"
+    return estado, plan["objetivo"], gap, metricas
+
+def motor_descomposicion(instance, config, hilos, fases, datos=None):
+    extra = {"ejecutable": RUTA_CBC} if BACKEND == "cbc" else {}
+    procesos = PROCESOS_BLOQUES or max(1, (os.cpu_count() or 1) // PROCESOS)
+    with fases("resolucion"):
+        plan, resumen = resolver_descomposicion(datos, config["sec"], config["ratio"], procesos=procesos,
+                                                backend=BACKEND, **extra)
+    if instance is not None:  # p. ej. desde servicio.py, que lee la asignación de la instancia
+        with fases("extraccion"):
+            # El plan viene por nombres; con PLANTILLA la instancia va por posiciones
+            aplicar_warmstart(instance, plan_desde_posiciones(plan_a_posiciones(plan, datos), datos, posicional=PLANTILLA))
+    print(f"[{resumen['bloques']} bloques, reparación -{resumen['mejora']}]", end=" ", flush=True)
+    metricas = {"backend": BACKEND, "con_solucion": True,
+                **{k: resumen[k] for k in ("bloques", "procesos", "sec_bloque", "mejora", "t_bloques", "t_reparacion")}}
+    # Sin cota propia: con COTA_LAGRANGIANA se certifica con cotas.py
+    return "ok/feasible", plan["objetivo"], "N/A (Descomposición)", metricas
+
+def motor_portafolio(instance, config, hilos, fases, plan=None, datos=None):
+    with fases("preparacion"):
+        inicial = plan_a_posiciones(plan or plan_greedy(instance), datos, posicional=PLANTILLA)
+    with fases("resolucion"):
+        plan, resumen = resolver_portafolio(datos, config["sec"], config["ratio"], inicial, hilos=hilos, ruta_cbc=RUTA_CBC)
+    with fases("extraccion"):
+        aplicar_warmstart(instance, plan_desde_posiciones(plan, datos, posicional=PLANTILLA))
+    print(f"[🏁 {resumen['ganador']} ({resumen['parada']})]", end=" ", flush=True)
+    metricas = {"backend": "portafolio", "ganador": resumen["ganador"], "parada": resumen["parada"],
+                "corredores": resumen["corredores"], "omitidos": resumen["omitidos"], "con_solucion": True}
+    gap = "0,0" if resumen["estado"] == "ok/optimal" else calcular_gap(plan["objetivo"], resumen["cota"])
+    return resumen["estado"], plan["objetivo"], gap, metricas
+
+MOTORES = {
+    "milp": motor_milp,
+    "cbc": motor_milp,
+    "lns": motor_lns,
+    "columnas": motor_columnas,
+    "descomposicion": motor_descomposicion,
+    "portafolio": motor_portafolio,
+}
+
+def resolver_anytime(archivo, archivo_uso, pedidos, camiones, config, hilos=None):
+    """Una sola resolución hasta max(PUNTOS_CONTROL); una fila por punto.
+
+    En cada punto se toma la incumbente y la cota que había en el log de CBC
+    en ese segundo. Si CBC ya había terminado antes, la fila es la final.
+    """
+    puntos = sorted(PUNTOS_CONTROL)
+    fases = Fases()
+    with fases("carga"):
+        datos = leer_datos(archivo_uso) if COTA_LAGRANGIANA else None
+        instance = cargar_instancia(archivo_uso, datos)
+    opt = crear_solver(puntos[-1], config["ratio"], hilos, backend="cbc")
+    # Tiempos del log en segundos de reloj, no de CPU, para que casen con 'sec'
+    opt.options['timeMode'] = "elapsed"
+    with fases("preparacion"):
+        preparar_instancia(instance)
+
+    flujo = FlujoLog()
+    inicio = time.time()
+    with fases("resolucion"):
+        results = opt.resolver(instance, warmstart=WARMSTART, flujo=flujo)
+    duracion = round(time.time() - inicio, 2)
+    eventos = flujo.cerrar()
+    if TRAYECTORIAS:
+        # Es la trayectoria de una ejecución con el mayor límite
+        escribir_trayectoria(archivo, f"Limite_{puntos[-1]}s", eventos)
+
+    with fases("extraccion"):
+        estado, obj, gap = obtener_datos_resultado(results, instance)
+    fin_cbc = eventos[-1][0] if eventos else duracion
+    terminado = "maxTimeLimit" not in estado
+
+    # Filas sin cota de CBC: una sola cota lagrangiana por instancia
+    cota = None
+    falta_cota = [inc is not None and cota_cbc is None for inc, cota_cbc in (estado_en(eventos, seg) for seg in puntos)]
+    if COTA_LAGRANGIANA and (sin_cota(gap) or any(falta_cota)):
+        with fases("cota"):
+            cota = cota_lagrangiana(datos, ub=obj if isinstance(obj, (int, float)) else None)["cota"]
+
+    comunes = dict(metricas_backend(opt), motor="anytime", eventos=len(eventos), **instrumentar(instance, fases))
+    filas = []
+    metricas = []
+    for seg in puntos:
+        m = dict(comunes, archivo=archivo, config=f"Limite_{seg}s")
+        metricas.append(m)
+        etiqueta = f"Limite_{seg}s"
+        if terminado and fin_cbc <= seg:
+            filas.append(fila_csv(archivo, pedidos, camiones, etiqueta, estado, obj, completar_gap(datos, obj, gap, m, fases, cota), duracion))
+        else:
+            inc, cota_cbc = estado_en(eventos, seg)
+            gap_seg = completar_gap(datos, inc, calcular_gap(inc, cota_cbc), m, fases, cota)
+            filas.append(fila_csv(
+                archivo, pedidos, camiones, etiqueta, "aborted/maxTimeLimit",
+                inc if inc is not None else "Error", gap_seg, seg
+            ))
+    return filas, metricas
+
 def ejecutar_batch():
     print(f"\n--- INICIANDO EJECUCIÓN (Buscando en '{CARPETA_DATOS}') ---")
-    
-    # El CSV se guardará fuera, junto al script, para que sea fácil de ver
-    with open(SALIDA_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter=";")
-        writer.writerow(["Archivo", "Pedidos", "Camiones", "Config", "Estado", "Objetivo", "Gap", "Tiempo"])
 
     # CAMBIO 2: Usar os.path.join para buscar DENTRO de la carpeta
     # Esto busca "bateria_pruebas/*.dat" y "bateria_pruebas/*.txt"
@@ -114,7 +575,13 @@ def ejecutar_batch():
     archivos = glob.glob(patron_dat) + glob.glob(patron_txt)
     
     # Filtramos para asegurarnos de no coger basura
-    archivos = [f for f in archivos if "model.py" not in f and "batch" not in f]
+    archivos = [f for f in archivos if "model.py" not in f and "batch" not in f and not f.endswith("_temp.dat")]
+
+    # Versiones binarias (formato_npz.py): un .npz junto a su .dat se usa en
+    # su lugar (el CSV sigue mostrando el .dat); un .npz suelto, tal cual
+    binarios = {os.path.splitext(f)[0]: f for f in glob.glob(os.path.join(CARPETA_DATOS, "*.npz"))}
+    con_dat = {os.path.splitext(f)[0] for f in archivos}
+    archivos += [f for base, f in binarios.items() if base not in con_dat]
     
     if not archivos:
         print(f"❌ ERROR: No encontré archivos .dat en la carpeta '{CARPETA_DATOS}'.")
@@ -122,58 +589,115 @@ def ejecutar_batch():
 
     # Ordenamos para que se ejecuten en orden (iter01, iter02...)
     archivos.sort()
-    
+
+    almacen = AlmacenResultados(ALMACEN)
+    solvers = claves_configuracion()
+    hechos = almacen.completados(set(solvers.values())) if REANUDAR else set()
+
+    # Preparamos la lista de trabajos (instancia x configuración)
+    trabajos = []
+    temporales = []
+    t_analisis = {}
+    hashes = {}
+    saltados = 0
     for archivo in archivos:
-        pedidos, camiones = analizar_instancia(archivo)
-        print(f"\n📂 {archivo} (P~{pedidos}, C~{camiones})")
+        origen = archivo
+        if PREFERIR_NPZ and os.path.splitext(archivo)[0] in binarios:
+            origen = binarios[os.path.splitext(archivo)[0]]
+        inicio = time.perf_counter()
+        pedidos, camiones = analizar_instancia(origen)
+        t_analisis[archivo] = round(time.perf_counter() - inicio, 4)
+        hashes[archivo] = hash_fichero(archivo)
+
+        if MODO_ANYTIME:
+            etiquetas = [[f"Limite_{seg}s" for seg in PUNTOS_CONTROL]]
+        else:
+            etiquetas = [[config["tag"]] for config in CONFIGURACIONES]
+        pendientes = [e for e in etiquetas if not all((hashes[archivo], tag, solvers[tag]) in hechos for tag in e)]
+        saltados += len(etiquetas) - len(pendientes)
+        if not pendientes:
+            continue
         
         # Fix temporal para .txt
-        archivo_uso = archivo
-        es_temp = False
+        archivo_uso = origen
         
-        # Si hubiera que convertir txt, hay que tener cuidado con la ruta
-        if archivo.endswith(".txt"):
-            nombre_temp = os.path.join(CARPETA_DATOS, "temp.dat") # Temp dentro de la misma carpeta
+        # Si hubiera que convertir txt, hay que tener cuidado con la ruta.
+        # Un temporal por instancia: en paralelo no pueden compartir "temp.dat"
+        if archivo_uso.endswith(".txt"):
+            nombre_temp = os.path.splitext(archivo)[0] + "_temp.dat" # Temp dentro de la misma carpeta
             shutil.copy(archivo, nombre_temp)
             archivo_uso = nombre_temp
-            es_temp = True
-
-        for config in CONFIGURACIONES:
-            etiqueta = config["tag"]
-            print(f"   > {etiqueta}...", end=" ", flush=True)
-            
-            try:
-                instance = model.create_instance(archivo_uso)
-                opt = SolverFactory("cbc", executable=RUTA_CBC)
-                opt.options['sec'] = config["sec"]
-                opt.options['ratio'] = config["ratio"]
-                
-                inicio = time.time()
-                results = opt.solve(instance, tee=False) # Silencioso
-                duracion = round(time.time() - inicio, 2)
-                
-                # --- EXTRACCIÓN MEJORADA ---
-                estado, obj, gap = obtener_datos_resultado(results, instance)
-                # ---------------------------
-
-                print(f"✅ Z={obj} | Gap={gap}")
-                
-                with open(SALIDA_CSV, "a", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f, delimiter=";")
-                    writer.writerow([
-                        archivo, pedidos, camiones, 
-                        etiqueta, estado, 
-                        str(obj).replace(".", ","), 
-                        gap, 
-                        str(duracion).replace(".", ",")
-                    ])
-                    
-            except Exception as e:
-                print(f"❌ FALLO: {e}")
-        
-        if es_temp: os.remove("temp.dat")
+            temporales.append(nombre_temp)
+
+        if MODO_ANYTIME:
+            config = {"ratio": CONFIGURACIONES[0]["ratio"], "tag": "Anytime"}
+            trabajos.append((resolver_anytime, archivo, archivo_uso, pedidos, camiones, config))
+        else:
+            for config in CONFIGURACIONES:
+                if [config["tag"]] in pendientes:
+                    trabajos.append((resolver_trabajo, archivo, archivo_uso, pedidos, camiones, config))
+
+    if saltados:
+        print(f"⏭️  {saltados} trabajos ya resueltos en '{ALMACEN}'; se saltan")
+
+    procesos, hilos = repartir_hilos(max(1, len(trabajos)))
+
+    # Un único escritor (este proceso) guarda en el almacén; el CSV se
+    # exporta al final, junto al script, para que sea fácil de ver.
+    ultimo_commit = time.time()
+
+    def registrar(filas, metricas):
+        nonlocal ultimo_commit
+        for fila, m in zip(filas, metricas):
+            m["t_analisis"] = t_analisis.get(m["archivo"])
+            almacen.agregar(hashes[fila[0]], solvers[fila[3]], fila, m)
+        if len(almacen.pendientes) >= LOTE_ESCRITURA or time.time() - ultimo_commit >= SEGUNDOS_ESCRITURA:
+            almacen.confirmar()
+            ultimo_commit = time.time()
+
+    try:
+        if procesos == 1:
+            ultimo = None
+            for funcion, archivo, archivo_uso, pedidos, camiones, config in trabajos:
+                if archivo != ultimo:
+                    print(f"\n📂 {archivo} (P~{pedidos}, C~{camiones})")
+                    ultimo = archivo
+                print(f"   > {config['tag']}...", end=" ", flush=True)
+                try:
+                    filas, metricas = funcion(archivo, archivo_uso, pedidos, camiones, config, hilos)
+                except Exception as e:
+                    print(f"❌ FALLO: {e}")
+                    continue
+                print(" | ".join(f"✅ Z={fila[5]} Gap={fila[6]}" for fila in filas))
+                registrar(filas, metricas)
+        else:
+            print(f"⚙️  {len(trabajos)} trabajos en {procesos} procesos ({hilos or 1} hilos CBC cada uno)")
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                futuros = {
+                    pool.submit(funcion, *args, hilos): args
+                    for funcion, *args in trabajos
+                }
+                for futuro in as_completed(futuros):
+                    archivo, _, _, _, config = futuros[futuro]
+                    try:
+                        filas, metricas = futuro.result()
+                    except Exception as e:
+                        print(f"📂 {archivo} > {config['tag']} ❌ FALLO: {e}")
+                        continue
+                    print(f"📂 {archivo} > {config['tag']} " + " | ".join(f"✅ Z={fila[5]} Gap={fila[6]}" for fila in filas))
+                    registrar(filas, metricas)
+    finally:
+        for nombre_temp in temporales:
+            if os.path.exists(nombre_temp): os.remove(nombre_temp)
+        # También si se interrumpe: lo ya resuelto queda guardado y exportado
+        almacen.confirmar()
+        # Sólo las filas de esta batería (el almacén puede guardar otras)
+        bateria = {(hashes[a], tag, clave) for a in hashes for tag, clave in solvers.items()}
+        n = almacen.exportar_csv(SALIDA_CSV, bateria)
+        almacen.exportar_metricas(SALIDA_METRICAS, bateria)
+        almacen.cerrar()
 
-    print(f"\n--- FIN. Abre '{SALIDA_CSV}' en Excel ---")
+    print(f"\n--- FIN. {n} filas. Abre '{SALIDA_CSV}' en Excel (métricas en '{SALIDA_METRICAS}') ---")
 
 if __name__ == "__main__":
     ejecutar_batch()
\ No newline at end of file
@@ -0,0 +1,130 @@
+# ====================================================
+#   CACHÉ DE SOLUCIONES EN DISCO
+#   Direccionada por contenido: hash de los datos + opciones del solver
+# ====================================================
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# ----------------------------------------------------
+# 1) CLAVES
+# ----------------------------------------------------
+# La clave depende sólo de lo que define el problema y cómo se resuelve, no
+# del fichero: la misma instancia en dos baterías (o en .dat y en memoria)
+# comparte entrada. El límite de tiempo NO forma parte de la clave: cada
+# entrada guarda con qué límite se obtuvo y el llamante decide si le sirve.
+
+CAMPOS_ARRAY = ("vol", "pes", "fecha", "adr", "t", "cli", "dist_c", "V", "W", "ADRmax", "Pmax", "F")
+
+def hash_datos(datos):
+    """SHA-256 de un DatosInstancia (nombres, arrays y globales)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([datos.pedidos, datos.clientes, datos.camiones], default=str).encode())
+    for campo in CAMPOS_ARRAY:
+        arr = np.ascontiguousarray(getattr(datos, campo))
+        h.update(campo.encode())
+        h.update(str(arr.dtype).encode())
+        h.update(arr.tobytes())
+    h.update(repr((float(datos.alpha), float(datos.s), float(datos.fecha_hoy))).encode())
+    return h.hexdigest()
+
+def clave_cache(datos, opciones):
+    """Clave de una (instancia, opciones); 'opciones' sin el límite de tiempo."""
+    texto = hash_datos(datos) + json.dumps(opciones, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+# ----------------------------------------------------
+# 2) PLANES EN POSICIONES
+# ----------------------------------------------------
+# El plan se guarda con índices posicionales (fila de pedido / camión en los
+# arrays de DatosInstancia), así vale igual para construir_modelo (índices por
+# nombre) que para PlantillaModelo (índices 0..n-1).
+
+def plan_a_posiciones(plan, datos, posicional=False):
+    if posicional:
+        pos_i = pos_j = lambda k: int(k)
+    else:
+        idx_i = {p: k for k, p in enumerate(datos.pedidos)}
+        idx_j = {c: k for k, c in enumerate(datos.camiones)}
+        pos_i, pos_j = idx_i.__getitem__, idx_j.__getitem__
+    return {
+        "x": sorted([pos_i(i), pos_j(j)] for i, j in plan["x"]),
+        "y": sorted(pos_i(i) for i in plan["y"]),
+        "z": sorted(pos_j(j) for j in plan["z"]),
+        "objetivo": plan["objetivo"],
+    }
+
+def plan_desde_posiciones(guardado, datos, posicional=False):
+    if posicional:
+        nom_i = nom_j = int
+    else:
+        nom_i, nom_j = datos.pedidos.__getitem__, datos.camiones.__getitem__
+    return {
+        "x": {(nom_i(a), nom_j(b)) for a, b in guardado["x"]},
+        "y": {nom_i(a) for a in guardado["y"]},
+        "z": {nom_j(b) for b in guardado["z"]},
+        "objetivo": guardado["objetivo"],
+    }
+
+# ----------------------------------------------------
+# 3) CACHÉ
+# ----------------------------------------------------
+class CacheSoluciones:
+    """Un fichero JSON por clave en 'carpeta', con expulsión LRU por tamaño.
+
+    Cada entrada es un dict libre; el batch guarda sec, estado, objetivo, gap,
+    duración, plan (en posiciones) y, si la hay, la trayectoria del log.
+    La fecha de modificación del fichero hace de "último uso": se actualiza
+    en cada acierto y al guardar se borran las entradas más antiguas hasta
+    quedar por debajo de 'tamano_max_mb'. Es seguro entre procesos: las
+    escrituras son atómicas y un fichero que desaparece es un fallo de caché.
+    """
+
+    def __init__(self, carpeta, tamano_max_mb=200):
+        self.carpeta = carpeta
+        self.tamano_max = tamano_max_mb * 1024 * 1024
+        os.makedirs(carpeta, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, clave + ".json")
+
+    def buscar(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                entrada = json.load(f)
+            os.utime(ruta)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entrada
+
+    def guardar(self, clave, entrada):
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self._expulsar()
+
+    def _expulsar(self):
+        ficheros = []
+        for nombre in os.listdir(self.carpeta):
+            if not nombre.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.carpeta, nombre))
+            except FileNotFoundError:
+                continue
+            ficheros.append((st.st_mtime, st.st_size, nombre))
+        total = sum(tam for _, tam, _ in ficheros)
+        for _, tam, nombre in sorted(ficheros):
+            if total <= self.tamano_max:
+                break
+            try:
+                os.remove(os.path.join(self.carpeta, nombre))
+            except FileNotFoundError:
+                pass
+            total -= tam
@@ -0,0 +1,150 @@
+# ====================================================
+#   COTAS INFERIORES (RELAJACIÓN LAGRANGIANA)
+#   Gap certificado aunque el solver no devuelva cota
+# ====================================================
+
+import time
+
+import numpy as np
+
+from instancia import coeficientes
+
+# ----------------------------------------------------
+# 1) RELAJACIÓN
+# ----------------------------------------------------
+# Se relajan las restricciones de asignación de cada pedido con
+# multiplicadores lambda_i:
+#   hoy:     sum_j x_ij + y_i == 1   (lambda libre)
+#   futuro:  sum_j x_ij       <= 1   (lambda <= 0)
+# y el problema se separa en:
+#   - un término por pedido de hoy: min(0, t_i - s*delta_i - lambda_i)  (mensajería)
+#   - una mochila por camión: min(0, F_j + KP_j), con
+#       KP_j = min sum_i (u_i - s*delta_i - lambda_i) x_ij
+#     sujeto a volumen, peso, ADR y paradas del camión j
+# Cada KP_j se acota por abajo con la mejor de cuatro relajaciones que se
+# resuelven ordenando: sólo paradas (los Pmax_j más negativos), mochila
+# fraccionaria en volumen, en peso, y ADR (mochila fraccionaria en ADRmax para
+# los pedidos ADR + paradas para el resto). Cualquier lambda da una cota
+# válida; el subgradiente busca la mejor.
+
+ITERACIONES = 300
+TIEMPO_MAX = 0.5       # segundos
+THETA_INICIAL = 2.0
+PACIENCIA = 15         # iteraciones sin mejora antes de dividir theta entre 2
+THETA_MIN = 1e-3
+
+# El coste reducido r_i = u_i - s*delta_i - lambda_i es el mismo en todos los
+# camiones: basta un orden de los pedidos por iteración, común a las |J|
+# columnas, en lugar de ordenar cada camión por separado.
+
+def _mochila_fraccionaria(r, A, peso, capacidad):
+    """Cota y solución de min sum r_i x_ij, sum peso_i x_ij <= capacidad_j, 0 <= x <= 1.
+
+    Sólo cuentan los pedidos admisibles (A, |I| x |J|) con r_i < 0.
+    """
+    orden = np.argsort(r / peso, kind='stable')
+    util = A[orden] & (r[orden] < 0)[:, None]
+    carga = util * peso[orden][:, None]
+    previo = np.cumsum(carga, axis=0) - carga
+    toma = np.clip((capacidad[None, :] - previo) / peso[orden][:, None], 0.0, 1.0) * util
+    X = np.empty_like(toma)
+    X[orden] = toma
+    return r[orden] @ toma, X
+
+def _paradas(r, A, pmax):
+    """Cota y solución de min sum r_i x_ij con como mucho pmax_j pedidos."""
+    orden = np.argsort(r, kind='stable')
+    util = A[orden] & (r[orden] < 0)[:, None]
+    toma = (util & (np.cumsum(util, axis=0) <= pmax[None, :])).astype(np.float64)
+    X = np.empty_like(toma)
+    X[orden] = toma
+    return r[orden] @ toma, X
+
+def _adr_paradas(r, A, es_adr, vol_adr, adr_max, pmax):
+    """Pedidos ADR: mochila fraccionaria en ADRmax; el resto: sólo paradas.
+
+    Cada parte es una relajación de lo que el camión lleva de ese tipo, así
+    que la suma también acota.
+    """
+    cota_adr, X_adr = _mochila_fraccionaria(r, A & es_adr[:, None], np.where(es_adr, vol_adr, 1.0), adr_max)
+    cota_resto, X_resto = _paradas(r, A & ~es_adr[:, None], pmax)
+    return cota_adr + cota_resto, X_adr + X_resto
+
+def _evaluar(lam, c, mensajeria, A, datos, hoy, libre, pmax):
+    """Valor L(lambda) y subgradiente."""
+    r = c - lam
+    es_adr = datos.adr * datos.vol > 0
+    cotas, soluciones = zip(
+        _paradas(r, A, pmax),
+        _mochila_fraccionaria(r, A, datos.vol, datos.V),
+        _mochila_fraccionaria(r, A, datos.pes, datos.W),
+        _adr_paradas(r, A, es_adr, datos.adr * datos.vol, datos.ADRmax, pmax),
+    )
+    # Por camión, la relajación que da la cota más alta (y su solución)
+    cotas = np.vstack(cotas)
+    mejor = cotas.argmax(axis=0)
+    columnas = np.arange(len(mejor))
+    kp = cotas[mejor, columnas]
+    abierto = datos.F + kp < 0
+    X = np.zeros(A.shape)
+    for k, sol in enumerate(soluciones):
+        elegidas = abierto & (mejor == k)
+        X[:, elegidas] = sol[:, elegidas]
+
+    reducido = np.where(hoy, mensajeria - lam, 0.0)
+    y = hoy & (reducido < 0)
+    valor = lam[~libre].sum() + np.minimum(reducido, 0.0).sum() + np.minimum(datos.F + kp, 0.0).sum()
+    g = np.where(libre, 0.0, 1.0 - X.sum(axis=1) - y)
+    return valor, g
+
+# ----------------------------------------------------
+# 2) SUBGRADIENTE
+# ----------------------------------------------------
+def cota_lagrangiana(datos, ub=None, iteraciones=ITERACIONES, tiempo_max=TIEMPO_MAX):
+    """Cota inferior del óptimo de una instancia (DatosInstancia).
+
+    'ub' es el valor de una solución factible (la del solver); si no se da,
+    se usa la de enviar todo lo de hoy por mensajería. Devuelve un dict con
+    'cota', 'iteraciones', 'tiempo' y 'multiplicadores' (el lambda de la cota).
+    """
+    inicio = time.perf_counter()
+    coef = coeficientes(datos)
+    A = coef["admisible"]
+    sdelta = datos.s * coef["delta"]
+    c = coef["u"] - sdelta
+    hoy = datos.fecha == datos.fecha_hoy
+    futuro = datos.fecha > datos.fecha_hoy
+    # Pedidos sin restricción de asignación (fechas pasadas): lambda fijo a 0
+    libre = ~hoy & ~futuro
+    pmax = np.minimum(datos.Pmax, len(datos.pedidos)).astype(np.int64)
+    mensajeria = datos.t - sdelta
+
+    # Otros pedidos (ni de hoy ni futuros): mensajería libre y sin asignación
+    constante = np.minimum(np.where(libre, mensajeria, 0.0), 0.0).sum()
+    if ub is None:
+        ub = float(np.where(hoy, mensajeria, 0.0).sum() + constante)
+
+    # Punto de partida: el precio de la mensajería para los de hoy
+    lam = np.where(hoy, mensajeria, 0.0)
+    mejor, theta, sin_mejora = -np.inf, THETA_INICIAL, 0
+    mejor_lam = lam
+    it = 0
+    for it in range(1, iteraciones + 1):
+        valor, g = _evaluar(lam, c, mensajeria, A, datos, hoy, libre, pmax)
+        valor += constante
+        if valor > mejor + 1e-9:
+            mejor, mejor_lam, sin_mejora = valor, lam, 0
+        else:
+            sin_mejora += 1
+            if sin_mejora >= PACIENCIA:
+                theta, sin_mejora = theta / 2, 0
+        norma = float(g @ g)
+        if norma == 0 or ub - mejor <= 1e-6 * max(1.0, abs(ub)) or theta < THETA_MIN:
+            break
+        if time.perf_counter() - inicio > tiempo_max:
+            break
+        lam = lam + theta * max(ub - valor, 1e-6 * max(1.0, abs(ub))) / norma * g
+        lam[futuro] = np.minimum(lam[futuro], 0.0)
+
+    return {"cota": float(mejor), "iteraciones": it, "tiempo": round(time.perf_counter() - inicio, 4),
+            "multiplicadores": mejor_lam}
@@ -0,0 +1,293 @@
+# ====================================================
+#   DESCOMPOSICIÓN EN BLOQUES
+#   Carteras muy grandes (5.000+ pedidos) resueltas por partes en paralelo
+# ====================================================
+
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from instancia import DatosInstancia, coeficientes, construir_modelo, leer_datos
+from heuristica import plan_greedy, aplicar_warmstart, plan_desde_instancia
+from backends import crear_backend
+from motor_lns import resolver_lns
+from insercion import PlanIncremental, mejor_opcion, MENSAJERIA, PENDIENTE
+
+# ----------------------------------------------------
+# 1) CONFIGURACIÓN
+# ----------------------------------------------------
+# Más allá de 400 pedidos el MILP completo no llega a nada en 300 s (y con
+# 5.000 pedidos sólo construir el modelo cuesta ~40 s). Aquí nunca se
+# construye: los pedidos se reparten en bloques de unos TAMANO_BLOQUE. No se
+# corta por bandas de distancia ni se separan los ADR: el coste de un pedido
+# en camión (u_i) no depende de con quién viaje, así que esos bloques sólo se
+# diferenciarían en lo que vale su capacidad (con la flota justa, los lejanos
+# se quedarían sin camiones), y un camión ADR en un bloque sólo ADR llevaría
+# poco más que su ADRmax. Cada bloque toma una franja de los pedidos
+# ordenados por ADR y distancia (la misma mezcla en todos) y los camiones se
+# reparten según la demanda de cada uno: primero los ADR por capacidad ADR,
+# después el resto por volumen, peso y paradas. Cada bloque es una
+# DatosInstancia independiente que se resuelve en un pool de procesos con
+# SUBMOTOR ("milp" desde el greedy, o "lns").
+#
+# Al unir los planes, una pasada de reparación (con PlanIncremental, de
+# insercion.py) aprovecha la capacidad que sobra en los camiones de otros
+# bloques: reinserta los pedidos que salieron por mensajería o quedaron
+# pendientes y cierra los camiones poco cargados cuyos pedidos caben en los
+# demás abiertos, mientras el coste baje.
+#
+# delta depende de la fecha máxima de la instancia: a cada bloque que no la
+# tiene se le añade un pedido ANCLA con esa fecha, que no cabe en ningún
+# camión y cuesta 0, para que los costes de los bloques sean los del global.
+
+TAMANO_BLOQUE = 200
+SUBMOTOR = "milp"
+BACKEND = "highs"
+RATIO = 0.01
+FRACCION_BLOQUES = 0.85   # del tiempo total; el resto, partición y reparación
+SEC_MIN_BLOQUE = 1
+# Construir el modelo de un bloque y su greedy: ~2 ms por pedido, que se
+# descuentan del límite del solver para no pasarse del tiempo total
+SEG_POR_PEDIDO = 0.002
+PASADAS_REPARACION = 3
+ANCLA = "__ancla__"
+EPS = 1e-6
+
+# ----------------------------------------------------
+# 2) PARTICIÓN
+# ----------------------------------------------------
+def particionar(datos, tamano=TAMANO_BLOQUE):
+    """Lista de bloques {"pedidos", "camiones"} con posiciones en 'datos'.
+
+    Los pedidos que no caben en ningún camión no entran en ningún bloque
+    (mensajería u otro día, sin nada que decidir).
+    """
+    coef = coeficientes(datos)
+    es_adr = datos.adr * datos.vol > 0
+    idx = np.flatnonzero(coef["admisible"].any(axis=1))
+    if not len(idx) or not datos.num_camiones:
+        return []
+    n = min(math.ceil(len(idx) / tamano), datos.num_camiones)
+    # Por ADR, distancia y cliente, repartidos en franjas: el bloque k se
+    # lleva los pedidos k, k+n, k+2n... y todos tienen la misma mezcla
+    idx = idx[np.lexsort((datos.cli[idx], coef["dist"][idx], es_adr[idx]))]
+    bloques = [{"pedidos": idx[k::n], "camiones": []} for k in range(n)]
+
+    # Demanda y capacidad en (volumen, peso, paradas, ADR)
+    demanda = np.array([
+        [datos.vol[b["pedidos"]].sum(), datos.pes[b["pedidos"]].sum(), len(b["pedidos"]),
+         (datos.adr * datos.vol)[b["pedidos"]].sum()]
+        for b in bloques
+    ])
+    capacidad = np.column_stack([datos.V, datos.W, datos.Pmax, datos.ADRmax]).astype(float)
+    asignada = np.zeros_like(demanda, dtype=float)
+
+    # Primero los camiones ADR, al bloque con más ADR por cubrir; después el
+    # resto, al que tenga más volumen, peso o paradas por cubrir
+    con_adr = datos.ADRmax > 0
+    for camiones, dims in ((con_adr, [3]), (~con_adr, [0, 1, 2])):
+        for j in np.flatnonzero(camiones)[np.argsort(-datos.V[camiones], kind="stable")]:
+            presion = np.where(demanda[:, dims] > 0, demanda[:, dims] / (asignada[:, dims] + EPS), 0.0).max(axis=1)
+            b = int(presion.argmax())
+            bloques[b]["camiones"].append(int(j))
+            asignada[b] += capacidad[j]
+    return bloques
+
+def subinstancia(datos, pedidos, camiones, Fmax):
+    """DatosInstancia con los pedidos y camiones dados (posiciones) y, si hace falta, el ANCLA."""
+    pedidos = np.asarray(pedidos, dtype=np.int64)
+    camiones = np.asarray(camiones, dtype=np.int64)
+    sub = DatosInstancia(
+        pedidos=[datos.pedidos[k] for k in pedidos],
+        vol=datos.vol[pedidos], pes=datos.pes[pedidos], fecha=datos.fecha[pedidos],
+        adr=datos.adr[pedidos], t=datos.t[pedidos], cli=datos.cli[pedidos],
+        clientes=datos.clientes, dist_c=datos.dist_c,
+        camiones=[datos.camiones[k] for k in camiones],
+        V=datos.V[camiones], W=datos.W[camiones], ADRmax=datos.ADRmax[camiones],
+        Pmax=datos.Pmax[camiones], F=datos.F[camiones],
+        alpha=datos.alpha, s=datos.s, fecha_hoy=datos.fecha_hoy,
+    )
+    if not len(pedidos) or sub.fecha.max() < Fmax:
+        # No cabe en ningún camión; con t = s su mensajería (delta = 1) cuesta 0
+        sub.pedidos.append(ANCLA)
+        sub.vol = np.append(sub.vol, datos.V.max() + 1.0)
+        sub.pes = np.append(sub.pes, 0.0)
+        sub.fecha = np.append(sub.fecha, Fmax)
+        sub.adr = np.append(sub.adr, 0.0)
+        sub.t = np.append(sub.t, datos.s)
+        sub.cli = np.append(sub.cli, 0)
+    return sub
+
+# ----------------------------------------------------
+# 3) RESOLUCIÓN DE UN BLOQUE (en los procesos del pool)
+# ----------------------------------------------------
+def resolver_bloque(sub, motor, backend, sec, ratio, hilos=None, extra=None):
+    """Plan por nombres de un bloque, sin el ANCLA. Parte siempre del greedy."""
+    inicio = time.time()
+    vacio = {"x": set(), "y": set(), "z": set(), "objetivo": 0.0}
+    if not sub.camiones:
+        return vacio, {"estado": "sin camiones", "tiempo": 0.0}
+    instance = construir_modelo(sub)
+    plan = plan_greedy(instance)
+    opt = crear_backend(backend, sec, ratio, hilos, **(extra or {}))
+    if motor == "lns":
+        plan, _ = resolver_lns(instance, opt, sec, plan)
+        estado = "lns"
+    else:
+        aplicar_warmstart(instance, plan)
+        results = opt.resolver(instance, warmstart=True)
+        estado = str(results.solver.termination_condition)
+        if opt.con_solucion:
+            resuelto = plan_desde_instancia(instance)
+            if resuelto["objetivo"] <= plan["objetivo"] + EPS:
+                plan = resuelto
+    plan = {
+        "x": {(i, j) for i, j in plan["x"] if i != ANCLA},
+        "y": plan["y"] - {ANCLA},
+        "z": set(plan["z"]),
+        "objetivo": plan["objetivo"],
+    }
+    return plan, {"estado": estado, "tiempo": round(time.time() - inicio, 3)}
+
+# ----------------------------------------------------
+# 4) REPARACIÓN DEL PLAN UNIDO
+# ----------------------------------------------------
+def _reinsertar(inc, i):
+    r = inc.pedidos[i]
+    inc.retirar(i)
+    inc.insertar(i, r[0], r[1], r[8], r[3], inc.clientes[r[5]], fecha=r[4])
+
+def _simular_cierre(inc, j, carga):
+    """Variación del objetivo al vaciar el camión j y reinsertar 'carga' en orden (None si reabre alguno)."""
+    d = inc.datos
+    res = [r.copy() for r in (inc.res_v, inc.res_w, inc.res_a, inc.res_p)]
+    for r, total in zip(res, (d.V, d.W, d.ADRmax, d.Pmax)):
+        r[j] = total[j]
+    abierto = inc.abierto.copy()
+    abierto[j] = False
+    variacion = -float(d.F[j])
+    for i in carga:
+        r = inc.pedidos[i]
+        coste, k = mejor_opcion(r, *res, abierto, d.F, d.fecha_hoy)
+        if k is not None and not abierto[k]:
+            return None
+        variacion += coste - (r[6] - r[7])
+        if k is not None:
+            for resto, consumo in zip(res, (r[0], r[1], r[2], 1.0)):
+                resto[k] -= consumo
+    return variacion
+
+def reparar(datos, plan, pasadas=PASADAS_REPARACION):
+    """Mejora el plan unido con la capacidad libre de todos los camiones.
+
+    1. Pedidos por mensajería o pendientes: se retiran y se reinsertan por la
+       opción más barata (nunca peor: la de antes sigue entre las opciones).
+    2. Camiones abiertos, del menos al más cargado: si todos sus pedidos caben
+       en otros abiertos (o salen por mensajería) y el coste baja, se cierra.
+    Devuelve (plan, resumen).
+    """
+    inc = PlanIncremental(datos, plan, auto=False)
+    inicial = inc.objetivo
+    reinsertados = cerrados = 0
+    for _ in range(pasadas):
+        previo = inc.objetivo
+        fuera = []
+        for i, destino in inc.destino.items():
+            if destino in (MENSAJERIA, PENDIENTE):
+                vol, pes, vadr, t, fecha, _, u, sdelta, _ = inc.pedidos[i]
+                ganancia = (t - sdelta if fecha <= datos.fecha_hoy else 0.0) - (u - sdelta)
+                if ganancia > EPS:
+                    fuera.append((-ganancia, i))
+        for _, i in sorted(fuera):
+            antes = inc.objetivo
+            _reinsertar(inc, i)
+            reinsertados += inc.objetivo < antes - EPS
+
+        ocupacion = np.maximum.reduce([1 - inc.res_v / datos.V, 1 - inc.res_w / datos.W,
+                                       1 - inc.res_p / np.maximum(datos.Pmax, 1)])
+        for j in np.argsort(np.where(inc.abierto, ocupacion, np.inf), kind="stable"):
+            if not inc.abierto[j]:
+                break
+            carga = sorted(inc.carga[j], key=lambda i: -inc.pedidos[i][0])
+            variacion = _simular_cierre(inc, j, carga)
+            if variacion is None or variacion >= -EPS:
+                continue
+            registros = [inc.pedidos[i] for i in carga]
+            for i in carga:
+                inc.retirar(i)
+            for i, r in zip(carga, registros):
+                inc.insertar(i, r[0], r[1], r[8], r[3], inc.clientes[r[5]], fecha=r[4])
+            cerrados += 1
+        if inc.objetivo >= previo - EPS:
+            break
+    return inc.plan(), {"mejora": round(inicial - inc.objetivo, 4), "reinsertados": reinsertados, "cerrados": cerrados}
+
+# ----------------------------------------------------
+# 5) MOTOR COMPLETO
+# ----------------------------------------------------
+def resolver_descomposicion(datos, tiempo_total, ratio=RATIO, procesos=None, motor=SUBMOTOR,
+                            backend=BACKEND, tamano=TAMANO_BLOQUE, **extra):
+    """Plan por nombres de 'datos' (DatosInstancia) sin construir el modelo completo.
+
+    Los bloques se resuelven en 'procesos' procesos (por defecto, uno por
+    núcleo); cada uno con el tiempo que le toca según las rondas que hagan
+    falta. 'extra' son opciones del backend (p. ej. el ejecutable de CBC).
+    Devuelve (plan, resumen).
+    """
+    inicio = time.time()
+    procesos = max(1, procesos or os.cpu_count() or 1)
+    bloques = particionar(datos, tamano)
+    Fmax = float(datos.fecha.max())
+    subs = [subinstancia(datos, b["pedidos"], b["camiones"], Fmax) for b in bloques]
+    t_particion = time.time() - inicio
+
+    rondas = math.ceil(len(subs) / procesos) if subs else 1
+    mayor = max((len(sub.pedidos) for sub in subs), default=0)
+    sec = max(SEC_MIN_BLOQUE, (tiempo_total * FRACCION_BLOQUES - t_particion) / rondas - SEG_POR_PEDIDO * mayor)
+    # Los bloques grandes primero, para que no queden para el final
+    orden = sorted(range(len(subs)), key=lambda b: -len(subs[b].pedidos))
+    argumentos = [(subs[b], motor, backend, sec, ratio, 1 if procesos > 1 else None, extra) for b in orden]
+    if procesos == 1 or len(subs) <= 1:
+        resultados = [resolver_bloque(*a) for a in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(subs))) as pool:
+            resultados = list(pool.map(resolver_bloque, *zip(*argumentos)))
+    t_bloques = time.time() - inicio - t_particion
+
+    unido = {"x": set(), "y": set(), "z": set()}
+    for plan, _ in resultados:
+        for clave in unido:
+            unido[clave] |= plan[clave]
+    suma_bloques = sum(plan["objetivo"] for plan, _ in resultados)
+
+    plan, reparacion = reparar(datos, unido)
+    resumen = {
+        "bloques": len(subs),
+        "procesos": procesos,
+        "sec_bloque": round(sec, 2),
+        "objetivo_bloques": round(suma_bloques, 4),
+        "t_particion": round(t_particion, 3),
+        "t_bloques": round(t_bloques, 3),
+        "t_reparacion": round(time.time() - inicio - t_particion - t_bloques, 3),
+        "tiempo": round(time.time() - inicio, 3),
+        **reparacion,
+    }
+    return plan, resumen
+
+if __name__ == "__main__":
+    # python descomposicion.py instancia.(dat|npz) [segundos] [procesos]
+    if len(sys.argv) < 2:
+        print("Uso: python descomposicion.py instancia.dat [segundos] [procesos]")
+        sys.exit(1)
+    datos = leer_datos(sys.argv[1])
+    sec = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    procesos = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    print(f"📂 {sys.argv[1]}: {datos.num_pedidos} pedidos, {datos.num_camiones} camiones")
+    plan, resumen = resolver_descomposicion(datos, sec, procesos=procesos)
+    print(f"🧩 {resumen['bloques']} bloques en {resumen['procesos']} procesos ({resumen['sec_bloque']} s por bloque)")
+    print(f"🔧 Reparación: -{resumen['mejora']} ({resumen['reinsertados']} reinsertados, {resumen['cerrados']} camiones cerrados)")
+    print(f"✅ Objetivo: {plan['objetivo']:.2f} en {resumen['tiempo']} s ({len(plan['z'])} camiones, {len(plan['y'])} por mensajería)")
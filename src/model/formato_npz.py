@@ -0,0 +1,98 @@
+# ====================================================
+#   FORMATO BINARIO DE INSTANCIAS (.npz)
+#   Columnas NumPy comprimidas: se cargan sin tokenizar texto
+# ====================================================
+
+import os
+import sys
+
+import numpy as np
+
+from instancia import DatosInstancia
+
+# ----------------------------------------------------
+# 1) ESQUEMA
+# ----------------------------------------------------
+# Un .npz (zip de .npy) con una columna por parámetro, en el orden de los
+# conjuntos. El generador (src/generator/generador_masivo.py) también
+# escribe con guardar_npz().
+#   version                      -> VERSION
+#   pedidos, clientes, camiones  -> nombres (arrays de texto)
+#   vol, pes, fecha, adr, t      -> por pedido (float64)
+#   cli                          -> posición del cliente de cada pedido en 'clientes' (int32)
+#   dist_c                       -> por cliente (float64)
+#   V, W, ADRmax, Pmax, F        -> por camión (float64)
+#   globales                     -> [alpha, s, fecha_hoy]
+VERSION = 1
+
+POR_PEDIDO = ("vol", "pes", "fecha", "adr", "t")
+POR_CAMION = ("V", "W", "ADRmax", "Pmax", "F")
+
+# ----------------------------------------------------
+# 2) ESCRITURA / LECTURA
+# ----------------------------------------------------
+def guardar_npz(datos, ruta):
+    columnas = {nombre: np.asarray(getattr(datos, nombre), dtype=np.float64) for nombre in POR_PEDIDO + POR_CAMION}
+    np.savez_compressed(
+        ruta,
+        version=np.array(VERSION),
+        pedidos=np.array([str(p) for p in datos.pedidos]),
+        clientes=np.array([str(c) for c in datos.clientes]),
+        camiones=np.array([str(j) for j in datos.camiones]),
+        cli=np.asarray(datos.cli, dtype=np.int32),
+        dist_c=np.asarray(datos.dist_c, dtype=np.float64),
+        globales=np.array([datos.alpha, datos.s, datos.fecha_hoy], dtype=np.float64),
+        **columnas,
+    )
+
+def cargar_npz(ruta):
+    """DatosInstancia de un .npz (los nombres vuelven como str, igual que en el .dat)."""
+    with np.load(ruta) as z:
+        version = int(z["version"])
+        if version != VERSION:
+            raise ValueError(f"{ruta}: versión de formato {version} no soportada (se esperaba {VERSION})")
+        alpha, s, fecha_hoy = z["globales"].tolist()
+        return DatosInstancia(
+            pedidos=z["pedidos"].tolist(),
+            clientes=z["clientes"].tolist(),
+            camiones=z["camiones"].tolist(),
+            cli=z["cli"].astype(np.int64),
+            dist_c=z["dist_c"],
+            alpha=alpha, s=s, fecha_hoy=fecha_hoy,
+            **{nombre: z[nombre] for nombre in POR_PEDIDO + POR_CAMION},
+        )
+
+def tamanos_npz(ruta):
+    """(pedidos, camiones) leyendo sólo esas dos columnas."""
+    with np.load(ruta) as z:
+        return len(z["pedidos"]), len(z["camiones"])
+
+# ----------------------------------------------------
+# 3) CONVERSOR DE BATERÍAS
+# ----------------------------------------------------
+def convertir_carpeta(carpeta, sobrescribir=False):
+    """Crea un .npz junto a cada .dat de 'carpeta' (recursivo). Devuelve los creados."""
+    from instancia import desde_dat
+
+    creados = []
+    for raiz, _, ficheros in os.walk(carpeta):
+        for nombre in sorted(ficheros):
+            if not nombre.endswith(".dat") or nombre.endswith("_temp.dat"):
+                continue
+            origen = os.path.join(raiz, nombre)
+            destino = os.path.splitext(origen)[0] + ".npz"
+            if os.path.exists(destino) and not sobrescribir:
+                continue
+            guardar_npz(desde_dat(origen), destino)
+            creados.append(destino)
+    return creados
+
+if __name__ == "__main__":
+    # python formato_npz.py data/instances [--sobrescribir]
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else "."
+    creados = convertir_carpeta(carpeta, sobrescribir="--sobrescribir" in sys.argv)
+    tam_dat = sum(os.path.getsize(os.path.splitext(r)[0] + ".dat") for r in creados)
+    tam_npz = sum(os.path.getsize(r) for r in creados)
+    print(f"✅ {len(creados)} instancias convertidas en '{carpeta}'")
+    if creados:
+        print(f"   .dat: {tam_dat / 1024:.0f} KB -> .npz: {tam_npz / 1024:.0f} KB")
@@ -0,0 +1,170 @@
+# ====================================================
+#   HEURÍSTICA CONSTRUCTIVA (GREEDY)
+#   Plan factible en milisegundos y arranque en caliente para CBC
+# ====================================================
+
+from pyomo.environ import value
+
+from model import clases_camiones
+
+# ----------------------------------------------------
+# 1) AHORROS POR PEDIDO
+# ----------------------------------------------------
+def ahorros(instance):
+    """Ahorro de llevar cada pedido en camión frente a su alternativa.
+
+    - Pedido de hoy: la alternativa es mensajería -> t_i - u_i
+    - Pedido futuro: la alternativa es no enviarlo -> s * delta_i - u_i
+    (el coste fijo F_j del camión se descuenta después, por camión)
+    """
+    fecha_hoy = value(instance.fecha_hoy)
+    s = value(instance.s)
+    res = {}
+    for i in instance.I:
+        if value(instance.fecha[i]) == fecha_hoy:
+            res[i] = value(instance.t[i]) - value(instance.u[i])
+        else:
+            res[i] = s * value(instance.delta[i]) - value(instance.u[i])
+    return res
+
+# ----------------------------------------------------
+# 2) CONSTRUCCIÓN DEL PLAN
+# ----------------------------------------------------
+def plan_greedy(instance):
+    """Asignación greedy que respeta volumen, peso, ADRmax y Pmax.
+
+    Los camiones se abren de más barato a más caro por m3 y cada uno se llena
+    con los pedidos de mayor ahorro que caben (a igualdad, los más
+    voluminosos primero, como en first-fit decreasing). Un camión sólo se
+    queda abierto si lo que ahorra su carga compensa su coste fijo. Los
+    pedidos de hoy que no entran en ningún camión van por mensajería.
+
+    Devuelve {"x": set((i, j)), "y": set(i), "z": set(j), "objetivo": float}.
+    """
+    fecha_hoy = value(instance.fecha_hoy)
+    ahorro = ahorros(instance)
+    vol = {i: value(instance.vol[i]) for i in instance.I}
+    pes = {i: value(instance.pes[i]) for i in instance.I}
+    adr = {i: value(instance.adr[i]) * vol[i] for i in instance.I}
+
+    # Sólo compensa subir al camión lo que ahorra algo
+    pendientes = sorted(
+        (i for i in instance.I if ahorro[i] > 0),
+        key=lambda i: (-ahorro[i], -vol[i])
+    )
+    camiones = sorted(
+        instance.J,
+        key=lambda j: (value(instance.F[j]) / max(value(instance.V[j]), 1e-9), -value(instance.Pmax[j]))
+    )
+
+    x, z = set(), set()
+    for j in camiones:
+        if not pendientes:
+            break
+        res_v = value(instance.V[j])
+        res_w = value(instance.W[j])
+        res_a = value(instance.ADRmax[j])
+        res_p = value(instance.Pmax[j])
+
+        carga = []
+        for i in pendientes:
+            if res_p < 1:
+                break
+            if vol[i] <= res_v and pes[i] <= res_w and adr[i] <= res_a:
+                carga.append(i)
+                res_v -= vol[i]
+                res_w -= pes[i]
+                res_a -= adr[i]
+                res_p -= 1
+
+        if sum(ahorro[i] for i in carga) > value(instance.F[j]):
+            z.add(j)
+            x.update((i, j) for i in carga)
+            cargados = set(carga)
+            pendientes = [i for i in pendientes if i not in cargados]
+
+    en_camion = {i for i, _ in x}
+    y = {i for i in instance.I if value(instance.fecha[i]) == fecha_hoy and i not in en_camion}
+
+    plan = {"x": x, "y": y, "z": z}
+    plan["objetivo"] = coste_plan(instance, plan)
+    return plan
+
+def coste_plan(instance, plan):
+    """Valor de la función objetivo del modelo para un plan dado."""
+    s = value(instance.s)
+    coste = sum(value(instance.F[j]) for j in plan["z"])
+    for i, _ in plan["x"]:
+        coste += value(instance.u[i]) - s * value(instance.delta[i])
+    for i in plan["y"]:
+        coste += value(instance.t[i]) - s * value(instance.delta[i])
+    return coste
+
+def plan_desde_instancia(instance):
+    """Lee el plan (x, y, z) que tenga cargado la instancia tras un solve."""
+    plan = {
+        "x": {(i, j) for (i, j), var in instance.x.items() if (var.value or 0) > 0.5},
+        "y": {i for i, var in instance.y.items() if (var.value or 0) > 0.5},
+        "z": {j for j, var in instance.z.items() if (var.value or 0) > 0.5},
+    }
+    plan["objetivo"] = coste_plan(instance, plan)
+    return plan
+
+def plan_canonico(instance, plan):
+    """Reasigna las cargas del plan para cumplir romper_simetria().
+
+    Dentro de cada clase, las cargas con más paradas van a los camiones con
+    más Pmax (siempre es factible: la clase está ordenada por Pmax) y, entre
+    camiones con el mismo Pmax, de mayor a menor volumen. El coste no cambia.
+    """
+    carga = {}
+    for i, j in plan["x"]:
+        carga.setdefault(j, []).append(i)
+    nuevo_x = {(i, j) for i, j in plan["x"]}
+    nuevo_z = set(plan["z"])
+
+    for clase in clases_camiones(instance):
+        usados = [j for j in clase if j in plan["z"]]
+        cargas = sorted((carga.get(j, []) for j in usados), key=len, reverse=True)
+        destino = clase[:len(cargas)]
+        # Bloques de camiones con el mismo Pmax: dentro, por volumen
+        pos = 0
+        while pos < len(destino):
+            fin = pos
+            while fin < len(destino) and value(instance.Pmax[destino[fin]]) == value(instance.Pmax[destino[pos]]):
+                fin += 1
+            cargas[pos:fin] = sorted(cargas[pos:fin], key=lambda c: sum(value(instance.vol[i]) for i in c), reverse=True)
+            pos = fin
+
+        nuevo_x -= {(i, j) for i, j in plan["x"] if j in clase}
+        nuevo_z -= set(clase)
+        for j, c in zip(destino, cargas):
+            nuevo_z.add(j)
+            nuevo_x.update((i, j) for i in c)
+
+    return {"x": nuevo_x, "y": set(plan["y"]), "z": nuevo_z, "objetivo": plan["objetivo"]}
+
+# ----------------------------------------------------
+# 3) ARRANQUE EN CALIENTE
+# ----------------------------------------------------
+def aplicar_warmstart(instance, plan):
+    """Carga el plan como valores iniciales de x, y, z (solve(warmstart=True))."""
+    for (i, j), var in instance.x.items():
+        var.set_value(1 if (i, j) in plan["x"] else 0)
+    for i, var in instance.y.items():
+        var.set_value(1 if i in plan["y"] else 0)
+    for j, var in instance.z.items():
+        var.set_value(1 if j in plan["z"] else 0)
+
+if __name__ == "__main__":
+    # Plan de emergencia sin solver: python heuristica.py instancia.dat
+    import sys
+    import time
+    from model import model
+
+    instance = model.create_instance(sys.argv[1])
+    inicio = time.time()
+    plan = plan_greedy(instance)
+    duracion = (time.time() - inicio) * 1000
+    print(f"✅ Z={plan['objetivo']:.2f} | Camiones={len(plan['z'])} | "
+          f"Mensajería={len(plan['y'])} | {duracion:.1f} ms")
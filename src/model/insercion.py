@@ -0,0 +1,375 @@
+# ====================================================
+#   INSERCIÓN EN LÍNEA SOBRE UN PLAN RESUELTO
+#   Pedidos urgentes en microsegundos, sin volver a lanzar el MILP
+# ====================================================
+
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from instancia import DatosInstancia, construir_modelo
+from backends import crear_backend
+from motor_lns import resolver_lns
+
+# ----------------------------------------------------
+# 1) CONFIGURACIÓN
+# ----------------------------------------------------
+# Sobre un plan ya resuelto (el del MILP, el ALNS o el greedy) se guarda, por
+# camión, la capacidad que le queda en volumen, peso, ADR y paradas. Insertar
+# un pedido es elegir la opción más barata, con los costes del modelo:
+#   - un camión abierto donde quepa:  u_i - s*delta_i
+#   - un camión cerrado donde quepa:  F_j + u_i - s*delta_i  (el de menor F_j)
+#   - mensajería (pedidos de hoy):    t_i - s*delta_i
+#   - dejarlo para otro día (futuros): 0
+# Entre los camiones abiertos se elige el de menor volumen libre (best fit),
+# para dejar los huecos grandes a los pedidos que vengan después.
+#
+# Cada inserción paga, sobre la mejor opción sin límites de capacidad, lo que
+# cuesta que no quepa donde más conviene (abrir un camión, mensajería más cara
+# que el camión...). Esa DERIVA se acumula y, cuando pasa de UMBRAL_DERIVA
+# veces el coste del plan, se re-optimiza en segundo plano con el ALNS
+# (motor_lns.py) sobre una copia; al terminar se adopta el plan nuevo y se
+# repiten encima las inserciones y retiradas hechas mientras tanto.
+#
+# Como en el modelo, Fmax es la fecha máxima de los pedidos del plan: si una
+# inserción la sube (o una retirada la baja), se recalcula el s*delta de
+# todos los pedidos, y el ALNS ve el mismo Fmax.
+
+UMBRAL_DERIVA = 0.02     # fracción de |objetivo| (al menos DERIVA_MINIMA)
+DERIVA_MINIMA = 100.0
+SEC_REOPTIMIZACION = 10
+BACKEND = "highs"
+RATIO = 0.01
+MENSAJERIA = "mensajeria"
+PENDIENTE = "pendiente"
+EPS = 1e-6
+
+def mejor_opcion(r, res_v, res_w, res_a, res_p, abierto, F, fecha_hoy):
+    """(coste, camión) más barato para el registro 'r' de un pedido, con las capacidades dadas.
+
+    camión None = mensajería (hoy) o pendiente (futuro). También lo usa
+    descomposicion.py para simular cambios antes de aplicarlos.
+    """
+    vol, pes, vadr, t, fecha, _, u, sdelta, _ = r
+    # Índice de capacidad residual: camiones donde cabe, de una vez
+    cabe = (res_v >= vol) & (res_w >= pes) & (res_a >= vadr) & (res_p >= 1)
+    abiertos = cabe & abierto
+    cerrados = cabe & ~abierto
+    opciones = [(t - sdelta if fecha <= fecha_hoy else 0.0, None)]
+    if abiertos.any():
+        libre = np.where(abiertos, res_v - vol, np.inf)
+        opciones.append((u - sdelta, int(libre.argmin())))
+    if cerrados.any():
+        j = int(np.where(cerrados, F, np.inf).argmin())
+        opciones.append((F[j] + u - sdelta, j))
+    return min(opciones, key=lambda o: o[0])
+
+class PlanIncremental:
+    """Plan de un día (DatosInstancia + plan por nombres) que admite cambios sueltos.
+
+    'plan' tiene la forma de heuristica.plan_desde_instancia: {"x": {(i, j)},
+    "y": {i}, "z": {j}}, con los nombres de 'datos'. Los pedidos futuros que
+    no están en x quedan pendientes.
+    """
+
+    def __init__(self, datos, plan, umbral=UMBRAL_DERIVA, auto=True, sec=SEC_REOPTIMIZACION, backend=BACKEND):
+        self.datos = datos
+        self.umbral = umbral
+        self.auto = auto
+        self.sec = sec
+        self.backend = backend
+        self.Fmax = float(datos.fecha.max()) if len(datos.fecha) else 0.0
+        self.clientes = list(datos.clientes)
+        self.dist_c = list(datos.dist_c.tolist())
+        self._pos_cliente = {c: k for k, c in enumerate(self.clientes)}
+        self.camiones = list(datos.camiones)
+        self._pos_camion = {j: k for k, j in enumerate(self.camiones)}
+
+        # Pedidos: nombre -> (vol, pes, vol_adr, t, fecha, cli, u, s*delta, adr)
+        self.pedidos = {}
+        for k, i in enumerate(datos.pedidos):
+            self.pedidos[i] = self._registro(datos.vol[k], datos.pes[k], datos.adr[k], datos.t[k],
+                                             datos.fecha[k], int(datos.cli[k]))
+        self._por_fecha = Counter(r[4] for r in self.pedidos.values())
+        self._cargar(plan)
+
+        self.lock = threading.RLock()
+        self.version = 0
+        self._registro_ops = None    # operaciones desde la copia (re-optimización en curso)
+        self._hilo = None
+        self.reoptimizaciones = 0
+        self.fallos = 0              # re-optimizaciones que acabaron en error
+        self.ultimo_error = None
+
+    def _registro(self, vol, pes, adr, t, fecha, cli):
+        d = fecha - self.datos.fecha_hoy
+        delta = (self.Fmax - d) / self.Fmax if self.Fmax > 0 else 1.0
+        u = self.datos.alpha * self.dist_c[cli]
+        return (float(vol), float(pes), float(adr * vol), float(t), float(fecha), cli, float(u),
+                float(self.datos.s * delta), float(adr))
+
+    def _fijar_fmax(self, Fmax):
+        """Cambia Fmax y recalcula los registros de todos los pedidos y el objetivo."""
+        self.Fmax = Fmax
+        for i, r in self.pedidos.items():
+            self.pedidos[i] = self._registro(r[0], r[1], r[8], r[3], r[4], r[5])
+        self.objetivo = self._recalcular()
+
+    def _cargar(self, plan):
+        """Capacidades residuales, destinos y objetivo a partir de un plan por nombres."""
+        d = self.datos
+        self.res_v, self.res_w = d.V.astype(float).copy(), d.W.astype(float).copy()
+        self.res_a, self.res_p = d.ADRmax.astype(float).copy(), d.Pmax.astype(float).copy()
+        self.abierto = np.zeros(len(self.camiones), dtype=bool)
+        self.carga = [set() for _ in self.camiones]
+        self.destino = dict.fromkeys(self.pedidos, PENDIENTE)
+        for i, j in plan["x"]:
+            if i in self.pedidos:
+                self._meter(i, self._pos_camion[j])
+        for j in plan["z"]:
+            self.abierto[self._pos_camion[j]] = True
+        for i in plan["y"]:
+            if i in self.pedidos:
+                self.destino[i] = MENSAJERIA
+        # Los de hoy que el plan no lleva (p. ej. pedidos añadidos tras él) van por mensajería
+        for i, destino in self.destino.items():
+            if destino == PENDIENTE and self._es_hoy(i):
+                self.destino[i] = MENSAJERIA
+        self.objetivo = self._recalcular()
+        self.base = self.objetivo
+        self.deriva = 0.0
+
+    def _es_hoy(self, i):
+        return self.pedidos[i][4] <= self.datos.fecha_hoy
+
+    def _meter(self, i, j):
+        vol, pes, vadr = self.pedidos[i][:3]
+        self.res_v[j] -= vol
+        self.res_w[j] -= pes
+        self.res_a[j] -= vadr
+        self.res_p[j] -= 1
+        self.carga[j].add(i)
+        self.destino[i] = j
+
+    def _sacar(self, i, j):
+        vol, pes, vadr = self.pedidos[i][:3]
+        self.res_v[j] += vol
+        self.res_w[j] += pes
+        self.res_a[j] += vadr
+        self.res_p[j] += 1
+        self.carga[j].discard(i)
+
+    def _recalcular(self):
+        """Objetivo del modelo (como heuristica.coste_plan) del estado actual."""
+        coste = float(self.datos.F[self.abierto].sum())
+        for i, destino in self.destino.items():
+            r = self.pedidos[i]
+            if destino == MENSAJERIA:
+                coste += r[3] - r[7]
+            elif destino != PENDIENTE:
+                coste += r[6] - r[7]
+        return coste
+
+    # ------------------------------------------------
+    # 2) INSERCIÓN Y RETIRADA
+    # ------------------------------------------------
+    def insertar(self, pedido, vol, pes, adr, t, cliente, fecha=None, dist=None):
+        """Añade un pedido al plan por la opción más barata y la aplica.
+
+        'fecha' por defecto es hoy (urgente); 'dist' sólo hace falta si el
+        cliente no está en la instancia. Devuelve {"pedido", "destino"
+        (nombre del camión, MENSAJERIA o PENDIENTE), "coste" (variación del
+        objetivo), "deriva", "reoptimizando"}.
+        """
+        with self.lock:
+            if pedido in self.pedidos:
+                raise ValueError(f"El pedido {pedido} ya está en el plan")
+            antes = self.objetivo
+            if cliente not in self._pos_cliente:
+                if dist is None:
+                    raise ValueError(f"Cliente desconocido sin distancia: {cliente}")
+                self._pos_cliente[cliente] = len(self.clientes)
+                self.clientes.append(cliente)
+                self.dist_c.append(float(dist))
+            fecha = self.datos.fecha_hoy if fecha is None else fecha
+            operacion = ("insertar", (pedido, vol, pes, adr, t, cliente, fecha, dist))
+            if fecha > self.Fmax:
+                self._fijar_fmax(float(fecha))
+            self.pedidos[pedido] = r = self._registro(vol, pes, adr, t, fecha, self._pos_cliente[cliente])
+            self._por_fecha[r[4]] += 1
+            t, u, sdelta = r[3], r[6], r[7]
+            coste, j = mejor_opcion(r, self.res_v, self.res_w, self.res_a, self.res_p, self.abierto,
+                                    self.datos.F, self.datos.fecha_hoy)
+            alternativa = t - sdelta if fecha <= self.datos.fecha_hoy else 0.0
+
+            if j is None:
+                self.destino[pedido] = MENSAJERIA if fecha <= self.datos.fecha_hoy else PENDIENTE
+            else:
+                self.abierto[j] = True
+                self._meter(pedido, j)
+            self.objetivo += coste
+            self.deriva += max(0.0, coste - min(u - sdelta, alternativa))
+            self._anotar(operacion)
+            destino = self.camiones[j] if j is not None else self.destino[pedido]
+            variacion = self.objetivo - antes
+        return {"pedido": pedido, "destino": destino, "coste": float(variacion), "deriva": self.deriva,
+                "reoptimizando": self._quizas_reoptimizar()}
+
+    def retirar(self, pedido):
+        """Quita un pedido del plan (cancelado); si su camión queda vacío, se cierra.
+
+        Devuelve la variación del objetivo.
+        """
+        with self.lock:
+            antes = self.objetivo
+            r = self.pedidos[pedido]
+            destino = self.destino.pop(pedido)
+            coste = 0.0
+            if destino == MENSAJERIA:
+                coste = -(r[3] - r[7])
+            elif destino != PENDIENTE:
+                self._sacar(pedido, destino)
+                coste = -(r[6] - r[7])
+                if not self.carga[destino]:
+                    self.abierto[destino] = False
+                    coste -= self.datos.F[destino]
+            del self.pedidos[pedido]
+            self.objetivo += coste
+            self._por_fecha[r[4]] -= 1
+            if not self._por_fecha[r[4]]:
+                del self._por_fecha[r[4]]
+                if r[4] >= self.Fmax:
+                    self._fijar_fmax(max(self._por_fecha, default=0.0))
+            self._anotar(("retirar", pedido))
+            variacion = self.objetivo - antes
+        return float(variacion)
+
+    def _anotar(self, operacion):
+        self.version += 1
+        if self._registro_ops is not None:
+            self._registro_ops.append(operacion)
+
+    def plan(self):
+        """Plan actual por nombres (forma de plan_desde_instancia)."""
+        with self.lock:
+            return {
+                "x": {(i, self.camiones[j]) for i, j in self.destino.items() if j not in (MENSAJERIA, PENDIENTE)},
+                "y": {i for i, j in self.destino.items() if j == MENSAJERIA},
+                "z": {self.camiones[j] for j in np.nonzero(self.abierto)[0].tolist()},
+                "objetivo": self.objetivo,
+            }
+
+    def residuales(self):
+        """Capacidad libre de cada camión: {camión: (volumen, peso, ADR, paradas, abierto)}."""
+        with self.lock:
+            return {j: (self.res_v[k], self.res_w[k], self.res_a[k], int(self.res_p[k]), bool(self.abierto[k]))
+                    for k, j in enumerate(self.camiones)}
+
+    # ------------------------------------------------
+    # 3) RE-OPTIMIZACIÓN EN SEGUNDO PLANO
+    # ------------------------------------------------
+    def _quizas_reoptimizar(self):
+        limite = max(self.umbral * abs(self.base), DERIVA_MINIMA)
+        if self.auto and self.deriva > limite:
+            return self.reoptimizar() is not None
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def datos_actuales(self):
+        """DatosInstancia con los pedidos que hay ahora en el plan."""
+        with self.lock:
+            nombres = list(self.pedidos)
+            col = np.array([self.pedidos[i] for i in nombres], dtype=float).reshape(-1, 9)
+            d = self.datos
+            return DatosInstancia(
+                pedidos=nombres, vol=col[:, 0], pes=col[:, 1],
+                fecha=col[:, 4], adr=col[:, 8], t=col[:, 3],
+                cli=col[:, 5].astype(np.int64), clientes=list(self.clientes), dist_c=np.array(self.dist_c),
+                camiones=list(self.camiones), V=d.V, W=d.W, ADRmax=d.ADRmax, Pmax=d.Pmax, F=d.F,
+                alpha=d.alpha, s=d.s, fecha_hoy=d.fecha_hoy,
+            )
+
+    def reoptimizar(self, esperar=False):
+        """Lanza el ALNS sobre una copia del plan actual (si no hay uno en marcha).
+
+        Devuelve el hilo (None si ya había uno); con 'esperar', lo espera.
+        """
+        with self.lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return None
+            datos, plan = self.datos_actuales(), self.plan()
+            pedidos = dict(self.pedidos)
+            self._registro_ops = []
+            self._hilo = threading.Thread(target=self._reoptimizar, args=(datos, plan, pedidos, self.Fmax, self.deriva),
+                                          daemon=True)
+            self._hilo.start()
+        if esperar:
+            self._hilo.join()
+        return self._hilo
+
+    def _reoptimizar(self, datos, plan, pedidos, Fmax, deriva):
+        try:
+            instance = construir_modelo(datos)
+            opt = crear_backend(self.backend, self.sec, RATIO)
+            nuevo, _ = resolver_lns(instance, opt, self.sec, plan=plan)
+        except Exception as e:
+            # El plan actual sigue valiendo; el fallo queda contado
+            print(f"⚠️  Re-optimización fallida ({type(e).__name__}): {e}")
+            nuevo = None
+            with self.lock:
+                self.fallos += 1
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+        with self.lock:
+            operaciones, self._registro_ops = self._registro_ops, None
+            if nuevo is None or nuevo["objetivo"] >= plan["objetivo"] - EPS:
+                # Sin mejora: la deriva vuelve a contar desde la copia
+                self.deriva -= deriva
+                self.base = plan["objetivo"]
+                return
+            # Se adopta el plan nuevo sobre los pedidos de la copia y se
+            # repiten encima los cambios hechos mientras se calculaba
+            self.pedidos = pedidos
+            self.Fmax = Fmax  # el de la copia; las operaciones repetidas lo vuelven a mover
+            self._por_fecha = Counter(r[4] for r in pedidos.values())
+            self._cargar(nuevo)
+            self.reoptimizaciones += 1
+            for tipo, args in operaciones:
+                if tipo == "insertar":
+                    self._reinsertar(*args)
+                else:
+                    self.retirar(args)
+            self.version += 1
+
+    def _reinsertar(self, pedido, vol, pes, adr, t, cliente, fecha, dist):
+        auto, self.auto = self.auto, False
+        try:
+            self.insertar(pedido, vol, pes, adr, t, cliente, fecha, dist)
+        finally:
+            self.auto = auto
+
+if __name__ == "__main__":
+    # Demostración: python insercion.py instancia.dat [pedidos urgentes]
+    import sys
+    from instancia import leer_datos
+    from heuristica import plan_greedy
+
+    datos = leer_datos(sys.argv[1])
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    plan = plan_greedy(construir_modelo(datos))
+    incremental = PlanIncremental(datos, plan)
+    print(f"📦 Plan inicial: Z={incremental.objetivo:.2f}, {int(incremental.abierto.sum())} camiones abiertos")
+
+    # Pedidos urgentes: copias de pedidos existentes con otro nombre
+    rng = np.random.default_rng(0)
+    tiempos = []
+    for k in rng.integers(0, datos.num_pedidos, size=n).tolist():
+        inicio = time.perf_counter()
+        r = incremental.insertar(f"URG{len(tiempos) + 1}", datos.vol[k], datos.pes[k], datos.adr[k], datos.t[k],
+                                 datos.clientes[datos.cli[k]])
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    if incremental._hilo is not None:
+        incremental._hilo.join()
+    print(f"✅ {n} inserciones: mediana {np.median(tiempos):.1f} µs, máx. {max(tiempos):.1f} µs | "
+          f"Z={incremental.objetivo:.2f} | deriva {incremental.deriva:.1f} | "
+          f"re-optimizaciones {incremental.reoptimizaciones} (fallidas {incremental.fallos})")
@@ -0,0 +1,264 @@
+# ====================================================
+#   INSTANCIAS EN MEMORIA
+#   Datos como arrays NumPy -> ConcreteModel sin pasar por .dat
+# ====================================================
+
+from dataclasses import dataclass
+
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel, Set, Param, Var, Objective, Constraint, BuildAction,
+    Binary, Reals, minimize,
+)
+from pyomo.common.gc_manager import PauseGC
+from pyomo.core.expr import LinearExpression, MonomialTermExpression
+
+import model as formulacion
+
+# ----------------------------------------------------
+# 1) DATOS DE UNA INSTANCIA
+# ----------------------------------------------------
+@dataclass
+class DatosInstancia:
+    """Pedidos, camiones y clientes de un día, en arrays alineados.
+
+    'cli' guarda el índice (0..|C|-1) del cliente de cada pedido en 'clientes'.
+    """
+    # Pedidos
+    pedidos: list
+    vol: np.ndarray
+    pes: np.ndarray
+    fecha: np.ndarray
+    adr: np.ndarray
+    t: np.ndarray
+    cli: np.ndarray
+    # Clientes
+    clientes: list
+    dist_c: np.ndarray
+    # Camiones
+    camiones: list
+    V: np.ndarray
+    W: np.ndarray
+    ADRmax: np.ndarray
+    Pmax: np.ndarray
+    F: np.ndarray
+    # Globales
+    alpha: float
+    s: float
+    fecha_hoy: float
+
+    @property
+    def num_pedidos(self):
+        return len(self.pedidos)
+
+    @property
+    def num_camiones(self):
+        return len(self.camiones)
+
+# ----------------------------------------------------
+# 2) COEFICIENTES VECTORIZADOS
+# ----------------------------------------------------
+def coeficientes(datos):
+    """Parámetros derivados del modelo (misma definición que model.py).
+
+    Devuelve un dict con dist, u, d, Fmax, delta y la matriz booleana
+    'admisible' (|I| x |J|) del presolve de parejas (pedido, camión).
+    """
+    dist = datos.dist_c[datos.cli]
+    u = datos.alpha * dist
+    d = datos.fecha - datos.fecha_hoy
+    Fmax = float(datos.fecha.max()) if len(datos.fecha) else 0.0
+    if Fmax > 0:
+        delta = (Fmax - d) / Fmax
+    else:
+        delta = np.ones(len(datos.fecha))
+
+    futuro = datos.fecha > datos.fecha_hoy
+    adelantable = ~futuro | (datos.s * delta > u)
+    admisible = (
+        (datos.vol[:, None] <= datos.V[None, :])
+        & (datos.pes[:, None] <= datos.W[None, :])
+        & ((datos.adr * datos.vol)[:, None] <= datos.ADRmax[None, :])
+        & (datos.Pmax[None, :] >= 1)
+        & adelantable[:, None]
+    )
+    return {"dist": dist, "u": u, "d": d, "Fmax": Fmax, "delta": delta, "admisible": admisible}
+
+# ----------------------------------------------------
+# 3) CONSTRUCCIÓN DEL MODELO
+# ----------------------------------------------------
+def _por_nombre(nombres, valores):
+    return dict(zip(nombres, valores.tolist()))
+
+def construir_modelo(datos):
+    """ConcreteModel equivalente a model.create_instance() sobre los mismos datos.
+
+    Mismos nombres de componentes (I, J, C, IJ, x, y, z, OBJ, parámetros...),
+    así que la heurística, el ALNS y obtener_datos_resultado funcionan igual.
+    Los coeficientes se calculan con NumPy y cada fila se monta directamente
+    como LinearExpression, sin evaluar las reglas de model.py término a término.
+    """
+    # Como create_instance: sin el recolector de basura mientras se crean
+    # decenas de miles de objetos (casi duplica el tiempo en 400x40)
+    with PauseGC():
+        return _construir(datos)
+
+def _construir(datos):
+    coef = coeficientes(datos)
+    I, J, C = datos.pedidos, datos.camiones, datos.clientes
+    filas, cols = np.nonzero(coef["admisible"])
+
+    m = ConcreteModel()
+    m.I = Set(initialize=I)
+    m.J = Set(initialize=J)
+    m.C = Set(initialize=C)
+
+    # --- parámetros de pedidos, clientes, camiones y globales
+    m.vol = Param(m.I, initialize=_por_nombre(I, datos.vol))
+    m.pes = Param(m.I, initialize=_por_nombre(I, datos.pes))
+    m.fecha = Param(m.I, within=Reals, initialize=_por_nombre(I, datos.fecha))
+    m.adr = Param(m.I, initialize=_por_nombre(I, datos.adr))
+    m.t = Param(m.I, initialize=_por_nombre(I, datos.t))
+    m.cli = Param(m.I, within=m.C, initialize={i: C[k] for i, k in zip(I, datos.cli.tolist())})
+    m.dist_c = Param(m.C, within=Reals, initialize=_por_nombre(C, datos.dist_c))
+    m.V = Param(m.J, initialize=_por_nombre(J, datos.V))
+    m.W = Param(m.J, initialize=_por_nombre(J, datos.W))
+    m.ADRmax = Param(m.J, initialize=_por_nombre(J, datos.ADRmax))
+    m.Pmax = Param(m.J, initialize=_por_nombre(J, datos.Pmax))
+    m.F = Param(m.J, within=Reals, initialize=_por_nombre(J, datos.F))
+    m.alpha = Param(within=Reals, initialize=datos.alpha)
+    m.s = Param(within=Reals, initialize=datos.s)
+    m.fecha_hoy = Param(within=Reals, initialize=datos.fecha_hoy)
+
+    # --- derivados (ya calculados en bloque)
+    m.dist = Param(m.I, initialize=_por_nombre(I, coef["dist"]))
+    m.u = Param(m.I, initialize=_por_nombre(I, coef["u"]))
+    m.d = Param(m.I, initialize=_por_nombre(I, coef["d"]))
+    m.Fmax = Param(initialize=coef["Fmax"])
+    m.delta = Param(m.I, initialize=_por_nombre(I, coef["delta"]))
+
+    # --- presolve: parejas admisibles (sin 'within': ya vienen de I y J)
+    pares = [(I[a], J[b]) for a, b in zip(filas.tolist(), cols.tolist())]
+    J_i = {i: [] for i in I}
+    I_j = {j: [] for j in J}
+    for i, j in pares:
+        J_i[i].append(j)
+        I_j[j].append(i)
+    m.J_i = Set(m.I, initialize=J_i)
+    m.I_j = Set(m.J, initialize=I_j)
+    m.IJ = Set(dimen=2, initialize=pares)
+
+    # --- variables
+    m.x = Var(m.IJ, domain=Binary)
+    m.y = Var(m.I, domain=Binary)
+    m.z = Var(m.J, domain=Binary)
+    m.fijar = BuildAction(rule=formulacion.fijar_rule)
+
+    # --- objetivo: coeficientes netos de cada variable
+    neto = coef["u"] - datos.s * coef["delta"]
+    coef_y = datos.t - datos.s * coef["delta"]
+    m.OBJ = Objective(expr=_lineal(
+        neto[filas].tolist() + coef_y.tolist() + datos.F.tolist(),
+        [m.x[p] for p in pares] + [m.y[i] for i in I] + [m.z[j] for j in J],
+    ), sense=minimize)
+
+    # --- restricciones: las mismas que model.py, con las filas ya montadas
+    hoy = dict(zip(I, (datos.fecha == datos.fecha_hoy).tolist()))
+    futuro = dict(zip(I, (datos.fecha > datos.fecha_hoy).tolist()))
+    vol, pes = _por_nombre(I, datos.vol), _por_nombre(I, datos.pes)
+    adr_vol = _por_nombre(I, datos.adr * datos.vol)
+    V, W = _por_nombre(J, datos.V), _por_nombre(J, datos.W)
+    ADRmax, Pmax = _por_nombre(J, datos.ADRmax), _por_nombre(J, datos.Pmax)
+
+    def hoy_rule(m, i):
+        if hoy[i]:
+            return _lineal([1] * (len(J_i[i]) + 1), [m.x[i, j] for j in J_i[i]] + [m.y[i]]) == 1
+        return Constraint.Skip
+
+    def futuro_rule(m, i):
+        if futuro[i] and J_i[i]:
+            return _lineal([1] * len(J_i[i]), [m.x[i, j] for j in J_i[i]]) <= 1
+        return Constraint.Skip
+
+    def linking_rule(m, i, j):
+        return _lineal([1, -1], [m.x[i, j], m.z[j]]) <= 0
+
+    def fila_camion(coefs, limite):
+        def regla(m, j):
+            filas_j = [i for i in I_j[j] if coefs[i] != 0]
+            if not filas_j:
+                return Constraint.Skip
+            return _lineal([coefs[i] for i in filas_j], [m.x[i, j] for i in filas_j]) <= limite[j]
+        return regla
+
+    m.envio_hoy = Constraint(m.I, rule=hoy_rule)
+    m.envio_fut = Constraint(m.I, rule=futuro_rule)
+    m.link = Constraint(m.IJ, rule=linking_rule)
+    m.volumen = Constraint(m.J, rule=fila_camion(vol, V))
+    m.peso = Constraint(m.J, rule=fila_camion(pes, W))
+    m.adr_limit = Constraint(m.J, rule=fila_camion(adr_vol, ADRmax))
+    m.paradas = Constraint(m.J, rule=fila_camion(dict.fromkeys(I, 1), Pmax))
+    return m
+
+def _lineal(coefs, variables):
+    return LinearExpression([
+        v if c == 1 else MonomialTermExpression((c, v))
+        for c, v in zip(coefs, variables)
+    ])
+
+# ----------------------------------------------------
+# 4) ADAPTADORES .dat / .npz
+# ----------------------------------------------------
+def desde_dat(ruta):
+    """Lee un .dat del generador con el DataPortal de Pyomo -> DatosInstancia."""
+    from pyomo.dataportal import DataPortal
+
+    d = DataPortal(model=formulacion.model, filename=ruta)
+    I, J, C = list(d['I']), list(d['J']), list(d['C'])
+    pos_cliente = {c: k for k, c in enumerate(C)}
+
+    def por_pedido(nombre):
+        return np.array([d[nombre][i] for i in I], dtype=float)
+
+    def por_camion(nombre):
+        return np.array([d[nombre][j] for j in J], dtype=float)
+
+    return DatosInstancia(
+        pedidos=I,
+        vol=por_pedido('vol'),
+        pes=por_pedido('pes'),
+        fecha=por_pedido('fecha'),
+        adr=por_pedido('adr'),
+        t=por_pedido('t'),
+        cli=np.array([pos_cliente[d['cli'][i]] for i in I], dtype=np.int64),
+        clientes=C,
+        dist_c=np.array([d['dist_c'][c] for c in C], dtype=float),
+        camiones=J,
+        V=por_camion('V'),
+        W=por_camion('W'),
+        ADRmax=por_camion('ADRmax'),
+        Pmax=por_camion('Pmax'),
+        F=por_camion('F'),
+        alpha=float(d['alpha']),
+        s=float(d['s']),
+        fecha_hoy=float(d['fecha_hoy']),
+    )
+
+def leer_datos(ruta):
+    """DatosInstancia de un .npz (formato_npz.py) o de un .dat.
+
+    Los .dat se leen con el parser de una pasada (parser_dat.py); si usan
+    sintaxis AMPL que éste no admite, con el DataPortal de Pyomo.
+    """
+    if ruta.endswith(".npz"):
+        from formato_npz import cargar_npz
+        return cargar_npz(ruta)
+    from parser_dat import leer_dat, FormatoNoSoportado
+    try:
+        return leer_dat(ruta)
+    except FormatoNoSoportado:
+        return desde_dat(ruta)
+
+def crear_instancia(ruta):
+    """Atajo equivalente a model.create_instance(ruta), vía DatosInstancia."""
+    return construir_modelo(leer_datos(ruta))
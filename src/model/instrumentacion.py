@@ -0,0 +1,80 @@
+# ====================================================
+#   INSTRUMENTACIÓN DEL BATCH
+#   Tiempo por fase, memoria pico y tamaño del modelo por trabajo
+# ====================================================
+
+import time
+from contextlib import contextmanager
+
+from pyomo.environ import Var, Constraint
+from pyomo.core.expr.visitor import identify_variables
+
+try:
+    import resource  # No existe en Windows: allí la memoria queda a None
+except ImportError:
+    resource = None
+
+# ----------------------------------------------------
+# 1) CRONÓMETRO POR FASES
+# ----------------------------------------------------
+class Fases:
+    """Acumula el tiempo de reloj de cada fase de un trabajo.
+
+    Uso:
+        fases = Fases()
+        with fases("carga"):
+            instance = ...
+        fases.como_dict()  # {"t_carga": 0.21, ...}
+    """
+
+    def __init__(self):
+        self.tiempos = {}
+
+    @contextmanager
+    def __call__(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    def como_dict(self):
+        return {f"t_{nombre}": round(t, 4) for nombre, t in self.tiempos.items()}
+
+# ----------------------------------------------------
+# 2) MEMORIA PICO
+# ----------------------------------------------------
+def _a_mb(ru_maxrss):
+    # Linux da KB; macOS, bytes
+    import sys
+    return round(ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def memoria_pico():
+    """RSS pico en MB de este proceso y del mayor hijo terminado (el solver).
+
+    Son máximos desde que arrancó el proceso: en el pool, el de un trabajador
+    incluye los trabajos anteriores que resolvió.
+    """
+    if resource is None:
+        return {"rss_pico_mb": None, "rss_pico_solver_mb": None}
+    return {
+        "rss_pico_mb": _a_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        "rss_pico_solver_mb": _a_mb(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss),
+    }
+
+# ----------------------------------------------------
+# 3) TAMAÑO DEL MODELO
+# ----------------------------------------------------
+def tamano_modelo(instance):
+    """Variables, restricciones y no-ceros que llegan al solver.
+
+    Sólo cuenta variables libres y restricciones activas (lo fijado por el
+    presolve no se envía como columna).
+    """
+    variables = sum(1 for v in instance.component_data_objects(Var, active=True) if not v.fixed)
+    restricciones = 0
+    no_ceros = 0
+    for c in instance.component_data_objects(Constraint, active=True):
+        restricciones += 1
+        no_ceros += sum(1 for _ in identify_variables(c.body, include_fixed=False))
+    return {"variables": variables, "restricciones": restricciones, "no_ceros": no_ceros}
@@ -0,0 +1,186 @@
+# ====================================================
+#   LECTURA DEL LOG DE CBC
+#   Incumbente y cota a lo largo de una resolución
+# ====================================================
+
+import io
+import re
+
+# ----------------------------------------------------
+# 1) PATRONES DEL LOG (CBC 2.10)
+# ----------------------------------------------------
+NUM = r"(-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)"
+
+# Tiempo al final de la línea: "... (4.39 seconds)"
+RE_TIEMPO = re.compile(r"\(" + NUM + r" seconds\)")
+# LP inicial: "Continuous objective value is 11564.4 - 0.09 seconds"
+RE_CONTINUO = re.compile(r"Continuous objective value is " + NUM + r" - " + NUM + r" seconds")
+# Nueva incumbente: "Cbc0012I Integer solution of 19196.5 found by ..."
+RE_INCUMBENTE = re.compile(r"Integer solution of " + NUM + r" found")
+# Raíz: "Cbc0013I At root node, 23 cuts changed objective from 11574.8 to 14715.9 in 11 passes"
+RE_RAIZ = re.compile(r"At root node, .* to " + NUM + r" in \d+ passes")
+# Árbol: "Cbc0010I After 0 nodes, 1 on tree, 19196.5 best solution, best possible 14715.9 (4.12 seconds)"
+RE_NODOS = re.compile(r"After \d+ nodes, \d+ on tree, " + NUM + r" best solution, best possible " + NUM)
+# Final parcial: "Cbc0005I Partial search - best objective 17040.5 (best possible 14715.9), took ..."
+RE_PARCIAL = re.compile(r"best objective " + NUM + r" \(best possible " + NUM + r"\)")
+# Final completo: "Cbc0001I Search completed - best objective 1950.5, took ..."
+RE_COMPLETO = re.compile(r"Search completed - best objective " + NUM)
+
+# CBC escribe 1e+50 cuando todavía no tiene incumbente
+SIN_VALOR = 1e49
+
+# ----------------------------------------------------
+# 2) PARSER
+# ----------------------------------------------------
+class ParserLogCBC:
+    """Parser incremental: se le pasan las líneas según llegan.
+
+    'eventos' es la trayectoria [(segundos, incumbente, cota), ...]: cada
+    evento lleva la mejor incumbente y la mejor cota conocidas hasta ese
+    instante (None si aún no hay). Problema de minimización.
+    """
+
+    def __init__(self):
+        self.eventos = []
+        self.t = 0.0
+        self.incumbente = None
+        self.cota = None
+
+    def alimentar(self, linea):
+        """Procesa una línea; devuelve el evento nuevo o None si no cambia nada."""
+        m_t = RE_TIEMPO.search(linea)
+        if m_t:
+            self.t = float(m_t.group(1))
+
+        nueva_inc = None
+        nueva_cota = None
+
+        m = RE_CONTINUO.search(linea)
+        if m:
+            nueva_cota, self.t = float(m.group(1)), float(m.group(2))
+        elif RE_INCUMBENTE.search(linea):
+            nueva_inc = float(RE_INCUMBENTE.search(linea).group(1))
+        elif RE_RAIZ.search(linea):
+            nueva_cota = float(RE_RAIZ.search(linea).group(1))
+        elif RE_NODOS.search(linea):
+            m = RE_NODOS.search(linea)
+            nueva_inc, nueva_cota = float(m.group(1)), float(m.group(2))
+        elif RE_PARCIAL.search(linea):
+            m = RE_PARCIAL.search(linea)
+            nueva_inc, nueva_cota = float(m.group(1)), float(m.group(2))
+        elif RE_COMPLETO.search(linea):
+            # Búsqueda terminada: la cota alcanza a la incumbente
+            nueva_inc = float(RE_COMPLETO.search(linea).group(1))
+            nueva_cota = nueva_inc
+
+        if nueva_inc is not None and nueva_inc >= SIN_VALOR:
+            nueva_inc = None
+
+        cambio = False
+        if nueva_inc is not None and (self.incumbente is None or nueva_inc < self.incumbente):
+            self.incumbente = nueva_inc
+            cambio = True
+        if nueva_cota is not None and (self.cota is None or nueva_cota > self.cota):
+            self.cota = nueva_cota
+            cambio = True
+        if not cambio:
+            return None
+        evento = (self.t, self.incumbente, self.cota)
+        self.eventos.append(evento)
+        return evento
+
+def parsear_log_cbc(lineas):
+    """Devuelve la trayectoria [(segundos, incumbente, cota), ...] del log."""
+    parser = ParserLogCBC()
+    for linea in lineas:
+        parser.alimentar(linea)
+    return parser.eventos
+
+def leer_log_cbc(ruta):
+    """Atajo: trayectoria de un fichero de log completo."""
+    with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+        return parsear_log_cbc(f)
+
+def estado_en(eventos, segundos):
+    """(incumbente, cota) conocidas en el instante indicado."""
+    incumbente, cota = None, None
+    for t, inc, lb in eventos:
+        if t > segundos:
+            break
+        incumbente, cota = inc, lb
+    return incumbente, cota
+
+# ----------------------------------------------------
+# 3) LECTURA EN VIVO
+# ----------------------------------------------------
+class FlujoLog(io.TextIOBase):
+    """Flujo de texto que va parseando la salida de CBC mientras resuelve.
+
+    Se usa como destino del 'tee' de Pyomo (ver BackendCBC.resolver): cada
+    línea completa pasa por el parser y se descarta, así que no hace falta
+    fichero de log ni guardar el log entero en memoria. 'al_evento' (opcional)
+    se llama con cada evento nuevo.
+
+    Los tiempos de la trayectoria son los que CBC escribe en el log (segundos
+    de CPU, o de reloj con timeMode=elapsed), no el momento en que llega la
+    línea: CBC no vacía su salida al escribir en una tubería y las líneas
+    llegan a bloques.
+    """
+
+    def __init__(self, al_evento=None):
+        self.parser = ParserLogCBC()
+        self.al_evento = al_evento
+        self._pendiente = ""
+
+    @property
+    def eventos(self):
+        return self.parser.eventos
+
+    def writable(self):
+        return True
+
+    def write(self, texto):
+        lineas = (self._pendiente + texto).split("\n")
+        self._pendiente = lineas.pop()
+        for linea in lineas:
+            self._procesar(linea)
+        return len(texto)
+
+    def flush(self):
+        pass
+
+    def cerrar(self):
+        """Procesa la última línea sin salto final y devuelve la trayectoria."""
+        if self._pendiente:
+            self._procesar(self._pendiente)
+            self._pendiente = ""
+        return self.eventos
+
+    def _procesar(self, linea):
+        evento = self.parser.alimentar(linea)
+        if evento is not None and self.al_evento is not None:
+            self.al_evento(evento)
+
+# ----------------------------------------------------
+# 4) FICHEROS DE TRAYECTORIA
+# ----------------------------------------------------
+# Un CSV por trabajo (segundos;incumbente;cota), con coma decimal como el CSV
+# de resultados. Las celdas vacías son "todavía sin incumbente/cota".
+def _celda(valor):
+    return "" if valor is None else str(valor).replace(".", ",")
+
+def guardar_trayectoria(ruta, eventos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("t;incumbente;cota\n")
+        for t, inc, cota in eventos:
+            f.write(f"{_celda(t)};{_celda(inc)};{_celda(cota)}\n")
+
+def leer_trayectoria(ruta):
+    eventos = []
+    with open(ruta, encoding="utf-8") as f:
+        next(f, None)
+        for linea in f:
+            celdas = [c.replace(",", ".") for c in linea.rstrip("\n").split(";")]
+            t, inc, cota = (float(c) if c else None for c in celdas)
+            eventos.append((t, inc, cota))
+    return eventos
@@ -80,22 +80,59 @@ def delta_rule(m, i):
         return 1.0
 model.delta = Param(model.I, initialize=delta_rule)
 
+# ----------------------------------------------------
+# 4b) PRESOLVE: PAREJAS (PEDIDO, CAMIÓN) ADMISIBLES
+# ----------------------------------------------------
+# Sólo se crean x[i,j] para las parejas que pueden darse en alguna solución:
+#  - el pedido cabe solo en el camión (volumen, peso, ADR, al menos 1 parada)
+#    -> descarta, p. ej., pedidos ADR en camiones con ADRmax = 0
+#  - un pedido futuro sólo se adelanta si compensa (s·delta > u); si no,
+#    subirlo al camión nunca mejora el objetivo y se descarta (dominado)
+# J_i: camiones admisibles para cada pedido; I_j: pedidos admisibles por camión
+def J_i_rule(m, i):
+    if m.fecha[i] > m.fecha_hoy and m.s * m.delta[i] <= m.u[i]:
+        return []
+    vol, pes, adr_vol = m.vol[i], m.pes[i], m.adr[i] * m.vol[i]
+    return [j for j in m.J
+            if vol <= m.V[j] and pes <= m.W[j] and adr_vol <= m.ADRmax[j] and m.Pmax[j] >= 1]
+model.J_i = Set(model.I, within=model.J, initialize=J_i_rule)
+
+def I_j_rule(m, j):
+    return [i for i in m.I if j in m.J_i[i]]
+model.I_j = Set(model.J, within=model.I, initialize=I_j_rule)
+
+def IJ_rule(m):
+    return [(i, j) for i in m.I for j in m.J_i[i]]
+model.IJ = Set(dimen=2, within=model.I * model.J, initialize=IJ_rule)
+
 # ----------------------------------------------------
 # 5) VARIABLES
 # ----------------------------------------------------
-model.x = Var(model.I, model.J, domain=Binary)   # pedido i va en camión j
+model.x = Var(model.IJ, domain=Binary)          # pedido i va en camión j (sólo parejas admisibles)
 model.y = Var(model.I, domain=Binary)            # pedido i va por mensajería
 model.z = Var(model.J, domain=Binary)            # camión usado
 
+# Variables fijadas antes de escribir el LP (el writer las trata como constantes):
+#  - los envíos futuros NO se envían por mensajería -> y_i = 0
+#  - un camión sin ningún pedido admisible no se usa -> z_j = 0
+def fijar_rule(m):
+    for i in m.I:
+        if m.fecha[i] > m.fecha_hoy:
+            m.y[i].fix(0)
+    for j in m.J:
+        if len(m.I_j[j]) == 0:
+            m.z[j].fix(0)
+model.fijar = BuildAction(rule=fijar_rule)
+
 # ----------------------------------------------------
 # 6) FUNCIÓN OBJETIVO
 # ----------------------------------------------------
 def obj_rule(m):
     return (
-        sum(m.u[i] * m.x[i, j] for i in m.I for j in m.J)        # coste variable camión
+        sum(m.u[i] * m.x[i, j] for (i, j) in m.IJ)               # coste variable camión
         + sum(m.t[i] * m.y[i] for i in m.I)                      # mensajería
         + sum(m.F[j] * m.z[j] for j in m.J)                      # coste fijo camión
-        - sum(m.s * m.delta[i] * (sum(m.x[i, j] for j in m.J) + m.y[i]) 
+        - sum(m.s * m.delta[i] * (sum(m.x[i, j] for j in m.J_i[i]) + m.y[i]) 
               for i in m.I)                                      # adelanto
     )
 model.OBJ = Objective(rule=obj_rule, sense=minimize)
@@ -107,49 +144,86 @@ model.OBJ = Objective(rule=obj_rule, sense=minimize)
 # A) Todos los pedidos del día se envían
 def hoy_rule(m, i):
     if m.fecha[i] == m.fecha_hoy:
-        return sum(m.x[i, j] for j in m.J) + m.y[i] == 1
+        return sum(m.x[i, j] for j in m.J_i[i]) + m.y[i] == 1
     return Constraint.Skip
 model.envio_hoy = Constraint(model.I, rule=hoy_rule)
 
 # B) Pedidos futuros: envío opcional
 def futuro_rule(m, i):
-    if m.fecha[i] > m.fecha_hoy:
-        return sum(m.x[i, j] for j in m.J)<= 1
+    if m.fecha[i] > m.fecha_hoy and len(m.J_i[i]) > 0:
+        return sum(m.x[i, j] for j in m.J_i[i])<= 1
     return Constraint.Skip
 model.envio_fut = Constraint(model.I, rule=futuro_rule)
 
-# Los envíos futuros NO se envían por mensajería
-def futuro_mens_rule(m, i):
-    if m.fecha[i] > m.fecha_hoy:
-        return m.y[i] == 0
-    return Constraint.Skip
-model.futuro_mens = Constraint(model.I, rule=futuro_mens_rule)
+# Los envíos futuros NO se envían por mensajería: y_i fijada a 0 en 'fijar'
 
 # C) Solo cargar camión si se usa
 def linking_rule(m, i, j):
     return m.x[i, j] <= m.z[j]
-model.link = Constraint(model.I, model.J, rule=linking_rule)
+model.link = Constraint(model.IJ, rule=linking_rule)
 
 # D) Capacidad volumen
 def volumen_rule(m, j):
-    return sum(m.vol[i] * m.x[i, j] for i in m.I) <= m.V[j]
+    if len(m.I_j[j]) == 0:
+        return Constraint.Skip
+    return sum(m.vol[i] * m.x[i, j] for i in m.I_j[j]) <= m.V[j]
 model.volumen = Constraint(model.J, rule=volumen_rule)
 
 # E) Capacidad peso
 def peso_rule(m, j):
-    return sum(m.pes[i] * m.x[i, j] for i in m.I) <= m.W[j]
+    if len(m.I_j[j]) == 0:
+        return Constraint.Skip
+    return sum(m.pes[i] * m.x[i, j] for i in m.I_j[j]) <= m.W[j]
 model.peso = Constraint(model.J, rule=peso_rule)
 
-# F) ADR máximo
+# F) ADR máximo (sólo los pedidos ADR aportan)
 def adr_rule(m, j):
-    return sum(m.adr[i] * m.vol[i] * m.x[i, j] for i in m.I) <= m.ADRmax[j]
+    adr_j = [i for i in m.I_j[j] if m.adr[i] != 0]
+    if not adr_j:
+        return Constraint.Skip
+    return sum(m.adr[i] * m.vol[i] * m.x[i, j] for i in adr_j) <= m.ADRmax[j]
 model.adr_limit = Constraint(model.J, rule=adr_rule)
 
 # G) Paradas máximas
 def paradas_rule(m, j):
-    return sum(m.x[i, j] for i in m.I) <= m.Pmax[j]
+    if len(m.I_j[j]) == 0:
+        return Constraint.Skip
+    return sum(m.x[i, j] for i in m.I_j[j]) <= m.Pmax[j]
 model.paradas = Constraint(model.J, rule=paradas_rule)
 
-
-
-
+# ----------------------------------------------------
+# 8) RUPTURA DE SIMETRÍA (OPCIONAL)
+# ----------------------------------------------------
+# La flota sale de unos pocos tipos de camión: dentro de un tipo sólo cambia
+# Pmax, así que CBC explora muchas permutaciones de camiones idénticos.
+# Se aplica sobre una instancia ya construida: romper_simetria(instance).
+
+def clases_camiones(m):
+    """Clases de camiones intercambiables (mismos V, W, ADRmax y F).
+
+    Cada clase va ordenada por Pmax descendente (a igualdad, orden de J):
+    un camión puede llevar cualquier carga de los que le siguen en su clase.
+    """
+    clases = {}
+    for j in m.J:
+        clave = (value(m.V[j]), value(m.W[j]), value(m.ADRmax[j]), value(m.F[j]))
+        clases.setdefault(clave, []).append(j)
+    return [sorted(js, key=lambda j: -value(m.Pmax[j])) for js in clases.values() if len(js) > 1]
+
+def romper_simetria(m):
+    """Añade el orden lexicográfico dentro de cada clase de camiones.
+
+    - z[a] >= z[b]: los camiones usados de una clase son los primeros
+    - con el mismo Pmax, además, carga en volumen no creciente
+    Devuelve el número de restricciones añadidas.
+    """
+    m.simetria = ConstraintList()
+    for clase in clases_camiones(m):
+        for a, b in zip(clase, clase[1:]):
+            m.simetria.add(m.z[a] >= m.z[b])
+            if value(m.Pmax[a]) == value(m.Pmax[b]) and len(m.I_j[a]) > 0:
+                m.simetria.add(
+                    sum(m.vol[i] * m.x[i, a] for i in m.I_j[a])
+                    >= sum(m.vol[i] * m.x[i, b] for i in m.I_j[b])
+                )
+    return len(m.simetria)
@@ -0,0 +1,560 @@
+# ====================================================
+#   MOTOR DE GENERACIÓN DE COLUMNAS (SET PARTITIONING)
+#   Cargas completas de camión como columnas, sembradas con el ALNS
+# ====================================================
+
+import time
+
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel, Var, Objective, Constraint, Suffix,
+    Binary, UnitInterval, minimize, value,
+)
+
+from instancia import coeficientes, construir_modelo
+from cotas import cota_lagrangiana, _mochila_fraccionaria
+from motor_lns import resolver_lns
+from cache_soluciones import plan_a_posiciones, plan_desde_posiciones
+
+# ----------------------------------------------------
+# 1) FORMULACIÓN
+# ----------------------------------------------------
+# Una columna es una carga factible (conjunto de pedidos) para un TIPO de
+# camión: camiones con los mismos V, W, ADRmax y F admiten las mismas cargas
+# al mismo coste salvo por las paradas, así que basta un pricing por tipo y
+# no hay simetría entre camiones intercambiables. Las paradas se cuentan por
+# niveles p_1 < ... < p_m (los Pmax distintos del tipo): las cargas con más de
+# p_(l-1) paradas no pueden superar a los camiones con Pmax >= p_l. Como los
+# conjuntos están anidados, eso basta para repartir las cargas entre camiones.
+# El maestro restringido es:
+#   min  sum_k coste_k lam_k + sum_i (t_i - s*delta_i) y_i
+#   hoy:     sum_{k con i} lam_k + y_i == 1             (precio pi_i libre)
+#   resto:   sum_{k con i} lam_k (+ y_i) <= 1           (pi_i <= 0)
+#   flota:   sum_{k del tipo t, > p_(l-1) paradas} lam_k <= cupo_tl   (mu_tl <= 0)
+# con coste_k = F_t + sum_{i en k} (u_i - s*delta_i). Los pedidos futuros no
+# tienen y (no enviarlos cuesta 0).
+#
+# Pricing (por tipo): min F_t + sum_i (c_i - pi_i) x_i - sum_{l: p_(l-1) < paradas} mu_tl
+# con volumen, peso, ADR y paradas. Se resuelve con una DP 0/1 en (paradas,
+# volumen, ADR, peso), con cada recurso en unidades enteras:
+#   - para la COTA, redondeando consumos hacia abajo: es una relajación, y
+#     con pi da la cota lagrangiana L(pi) (como cotas.py, pero con una
+#     mochila mucho más ajustada)
+#   - para las COLUMNAS, redondeando hacia arriba: toda carga que sale es
+#     factible (con volúmenes y ADR enteros, la DP es exacta en ellos; el
+#     peso va en CELDAS_PESO unidades y puede dejar fuera alguna carga)
+# Cuando la DP no encuentra columnas, un MILP por tipo y nivel lo confirma.
+
+FRACCION_LNS = 0.6      # parte del límite para el ALNS que siembra las columnas
+FRACCION_RAIZ = 0.8      # hasta aquí (acumulado), generación en la raíz
+FRACCION_CG = 0.8        # hasta aquí, inmersión; el resto, maestro entero
+MAX_RONDAS = 500
+COLUMNAS_POR_TIPO = 30   # cargas nuevas por tipo y ronda (las de coste reducido más negativo)
+CELDAS = 100             # resolución máxima de la DP en volumen y en ADR
+CELDAS_PESO = 40         # y en peso (redondeado: ver _discretizar)
+FIJAR = 0.9              # en la inmersión se fijan todas las columnas con lam >= FIJAR
+PASO_INMERSION = 0.1     # y esta fracción de las fraccionarias (las de mayor lam), al menos una
+RONDAS_INMERSION = 3     # rondas de pricing tras cada fijación
+SUAVIZADO = 0.5          # peso del centro en los precios de la raíz
+EPS = 1e-6
+
+def tipos_camion(datos):
+    """Índices de los camiones de cada tipo (mismos V, W, ADRmax y F), por Pmax descendente."""
+    claves = np.column_stack([datos.V, datos.W, datos.ADRmax, datos.F])
+    if not len(claves):
+        return []
+    _, tipo = np.unique(claves, axis=0, return_inverse=True)
+    tipo = tipo.ravel()
+    return [js[np.argsort(-datos.Pmax[js], kind='stable')]
+            for js in (np.nonzero(tipo == k)[0] for k in range(tipo.max() + 1))]
+
+# ----------------------------------------------------
+# 2) MOCHILA POR PROGRAMACIÓN DINÁMICA
+# ----------------------------------------------------
+def _dp(r, consumo, capacidad, P, reconstruir=False):
+    """min sum r_n sobre subconjuntos de <= P elementos que caben en 'capacidad'.
+
+    'consumo' es una matriz entera (elementos x recursos) y 'capacidad' el
+    entero disponible de cada recurso. Devuelve la tabla de valores, indexada
+    por (elementos tomados, consumo de cada recurso), y, si 'reconstruir', qué
+    elementos mejoraron cada estado (matriz elementos x estados aplanados).
+    """
+    val = np.full((P + 1,) + tuple(c + 1 for c in capacidad), np.inf)
+    val[(0,) * val.ndim] = 0.0
+    toma = np.zeros((len(r),) + val.shape, dtype=bool) if reconstruir else None
+    for n in range(len(r)):
+        origen = (slice(None, -1),) + tuple(slice(0, c + 1 - q) for q, c in zip(consumo[n], capacidad))
+        destino = (slice(1, None),) + tuple(slice(q, None) for q in consumo[n])
+        candidato = val[origen] + r[n]
+        mejora = candidato < val[destino]
+        val[destino][mejora] = candidato[mejora]
+        if reconstruir:
+            toma[n][destino] = mejora
+    return val, (toma.reshape(len(r), -1) if reconstruir else None)
+
+def _reconstruir(toma, consumo, forma, estado):
+    """Posiciones (en la lista de la DP) de los elementos del estado dado.
+
+    El último elemento que mejoró el estado está en la carga; se resta su
+    consumo y se sigue con los anteriores a él.
+    """
+    paso = np.cumprod((forma[1:] + (1,))[::-1])[::-1]
+    plano = int(np.ravel_multi_index(estado, forma))
+    elegidos, limite = [], len(toma)
+    while plano:
+        n = int(np.flatnonzero(toma[:limite, plano])[-1])
+        elegidos.append(n)
+        plano -= int(np.r_[1, consumo[n]] @ paso)
+        limite = n
+    return elegidos
+
+def _mejores_por_clase(r, consumo, cuantos):
+    """Los 'cuantos' de menor r entre los elementos con el mismo consumo.
+
+    Una carga óptima nunca usa de una clase más elementos que paradas caben,
+    ni otros que no sean los mejores de la clase.
+    """
+    if not len(r):
+        return np.arange(0)
+    _, clase = np.unique(consumo, axis=0, return_inverse=True)
+    clase = clase.ravel()
+    orden = np.lexsort((r, clase))
+    rango = np.arange(len(orden)) - np.searchsorted(clase[orden], clase[orden], side='left')
+    return orden[rango < cuantos]
+
+# ----------------------------------------------------
+# 3) GENERADOR
+# ----------------------------------------------------
+class GeneradorColumnas:
+    """Columnas generadas y maestro restringido de una instancia (DatosInstancia).
+
+    Todo en índices posicionales: pedido i = fila de los arrays de 'datos',
+    camión j = posición en datos.camiones.
+    """
+
+    def __init__(self, datos):
+        coef = coeficientes(datos)
+        sdelta = datos.s * coef["delta"]
+        self.datos = datos
+        self.c = coef["u"] - sdelta
+        self.mensajeria = datos.t - sdelta
+        self.hoy = datos.fecha == datos.fecha_hoy
+        self.futuro = datos.fecha > datos.fecha_hoy
+        # Fechas pasadas: en model.py no tienen restricción de asignación; aquí
+        # se limitan a una vez (como en plantilla.py), pero la cota no lo usa
+        self.libre = ~self.hoy & ~self.futuro
+        self.con_y = ~self.futuro
+        self.vol_adr = datos.adr * datos.vol
+
+        self.tipos = tipos_camion(datos)
+        rep = np.array([js[0] for js in self.tipos], dtype=np.int64)
+        self.A = coef["admisible"][:, rep]
+        self.V, self.W = datos.V[rep], datos.W[rep]
+        self.ADRmax, self.F = datos.ADRmax[rep], datos.F[rep]
+        self.tipo_de = {int(j): t for t, js in enumerate(self.tipos) for j in js}
+        # Paradas de cada camión del tipo (descendente) y niveles p_1 < ... < p_m
+        self.pmax = [np.minimum(datos.Pmax[js], datos.num_pedidos).astype(np.int64) for js in self.tipos]
+        self.P = np.array([p[0] for p in self.pmax], dtype=np.int64)
+        self.niveles = [np.unique(p) for p in self.pmax]
+        self.cupo = [np.array([(p >= nivel).sum() for nivel in niveles]) for p, niveles in zip(self.pmax, self.niveles)]
+
+        self.columnas = []       # (tipo, tupla de pedidos)
+        self.costes = []
+        self._vistas = {}        # (tipo, carga) -> índice
+        self.iniciales = []      # columnas del plan de partida (arranque en caliente)
+        self.y_inicial = set()
+        self.fijadas = set()     # columnas fijadas a 1 durante la inmersión
+        self.rondas = 0
+        self.cota = -np.inf
+        self.centro = None       # (pi, mu) de la mejor cota
+
+    # --- columnas ---
+    def agregar(self, t, carga):
+        """Añade la carga al tipo t si no estaba. Devuelve su índice (None si ya estaba)."""
+        clave = self._clave(t, carga)
+        if clave in self._vistas:
+            return None
+        self._vistas[clave] = len(self.columnas)
+        self.columnas.append(clave)
+        self.costes.append(float(self.F[t] + self.c[list(clave[1])].sum()))
+        return len(self.columnas) - 1
+
+    @staticmethod
+    def _clave(t, carga):
+        return t, tuple(sorted(int(i) for i in carga))
+
+    def _niveles_de(self, t, paradas):
+        """Niveles de flota del tipo t en los que cuenta una carga con 'paradas' paradas."""
+        previo = np.r_[0, self.niveles[t][:-1]]
+        return np.nonzero(paradas > previo)[0]
+
+    def agregar_plan(self, plan):
+        """Añade las cargas de un plan en posiciones. Devuelve sus índices."""
+        cargas = {}
+        for i, j in plan["x"]:
+            cargas.setdefault(j, []).append(i)
+        indices = []
+        for j, carga in cargas.items():
+            t = self.tipo_de[j]
+            self.agregar(t, carga)
+            indices.append(self._vistas[self._clave(t, carga)])
+        return indices
+
+    def desde_plan(self, plan):
+        """Añade las cargas de un plan en posiciones y lo toma como arranque del maestro entero."""
+        self.iniciales = self.agregar_plan(plan)
+        self.y_inicial = set(plan["y"])
+
+    # --- maestro ---
+    def maestro(self, entero=False):
+        dominio = Binary if entero else UnitInterval
+        K = range(len(self.columnas))
+        incidencia = {}
+        por_nivel = {}
+        for k, (t, carga) in enumerate(self.columnas):
+            for nivel in self._niveles_de(t, len(carga)):
+                por_nivel.setdefault((t, int(nivel)), []).append(k)
+            for i in carga:
+                incidencia.setdefault(i, []).append(k)
+        con_y = np.nonzero(self.con_y)[0].tolist()
+        filas = sorted(set(con_y) | set(incidencia))
+
+        m = ConcreteModel()
+        m.lam = Var(K, domain=dominio)
+        m.y = Var(con_y, domain=dominio)
+        m.OBJ = Objective(sense=minimize, expr=(
+            sum(self.costes[k] * m.lam[k] for k in K)
+            + sum(float(self.mensajeria[i]) * m.y[i] for i in con_y)
+        ))
+
+        def cubrir_rule(m, i):
+            expr = sum(m.lam[k] for k in incidencia.get(i, []))
+            if self.con_y[i]:
+                expr = expr + m.y[i]
+            return expr == 1 if self.hoy[i] else expr <= 1
+        m.cubrir = Constraint(filas, rule=cubrir_rule)
+        m.flota = Constraint(sorted(por_nivel), rule=lambda m, t, l: (
+            sum(m.lam[k] for k in por_nivel[t, l]) <= int(self.cupo[t][l])
+        ))
+        m.dual = Suffix(direction=Suffix.IMPORT)
+        if not entero:
+            for k in self.fijadas:
+                m.lam[k].fix(1)
+        return m
+
+    def precios(self, m):
+        """(pi, mu): precios sombra del maestro LP (0 donde no hay fila).
+
+        mu[t][l] es el de la fila de flota del nivel l del tipo t.
+        """
+        pi = np.zeros(self.datos.num_pedidos)
+        for i, fila in m.cubrir.items():
+            pi[i] = m.dual.get(fila, 0.0)
+        # Las filas <= tienen precio <= 0 (el redondeo del solver puede dar +1e-12)
+        pi[~self.hoy] = np.minimum(pi[~self.hoy], 0.0)
+        mu = [np.zeros(len(niveles)) for niveles in self.niveles]
+        for (t, l), fila in m.flota.items():
+            mu[t][l] = min(m.dual.get(fila, 0.0), 0.0)
+        return pi, mu
+
+    def _penalizacion(self, t, mu):
+        """sum de mu[t][l] en los que cuenta una carga de k paradas, para k = 0..P_t."""
+        paradas = np.arange(self.P[t] + 1)
+        previo = np.r_[0, self.niveles[t][:-1]]
+        return (paradas[:, None] > previo[None, :]) @ mu[t]
+
+    # --- pricing ---
+    def _discretizar(self, t, items, abajo):
+        """Consumo entero (volumen, ADR, peso) de 'items' en el tipo t y capacidades.
+
+        Hacia abajo, cualquier carga factible sigue cabiendo (relajación, para
+        la cota); hacia arriba, lo que cabe es factible (para las columnas).
+        """
+        consumo, capacidad = [], []
+        for cantidad, total, celdas in (
+            (self.datos.vol, self.V[t], CELDAS),
+            (self.vol_adr, self.ADRmax[t], CELDAS),
+            (self.datos.pes, self.W[t], CELDAS_PESO),
+        ):
+            unidad = max(1.0, total / celdas)
+            q = cantidad[items] / unidad
+            consumo.append(np.floor(q + 1e-9) if abajo else np.ceil(q - 1e-9))
+            capacidad.append(int(np.floor(total / unidad + 1e-9)))
+        consumo = np.column_stack(consumo).astype(np.int64) if len(items) else np.zeros((0, 3), dtype=np.int64)
+        return consumo, tuple(capacidad)
+
+    def _kp_relajada(self, t, r):
+        """Cota de min sum r_i x_i para cada camión del tipo t (según su Pmax).
+
+        La mejor de la DP redondeando hacia abajo y la mochila fraccionaria en peso.
+        """
+        items = np.nonzero(self.A[:, t] & (r < 0))[0]
+        consumo, capacidad = self._discretizar(t, items, abajo=True)
+        sel = _mejores_por_clase(r[items], consumo, self.P[t])
+        val, _ = _dp(r[items][sel], consumo[sel], capacidad, int(self.P[t]))
+        mejor = np.minimum.accumulate(val.reshape(len(val), -1).min(axis=1))
+        kp_peso, _ = _mochila_fraccionaria(r, self.A[:, [t]], self.datos.pes, self.W[[t]])
+        return np.maximum(mejor[self.pmax[t]], kp_peso[0])
+
+    def _cota(self, pi, kp):
+        """L(pi) con kp[t] <= min sum (c_i - pi_i) x_i de cada camión del tipo t."""
+        return float(
+            pi[self.hoy | self.futuro].sum()
+            + np.minimum(np.where(self.hoy, self.mensajeria - pi, 0.0), 0.0).sum()
+            + np.minimum(np.where(self.libre, self.mensajeria, 0.0), 0.0).sum()
+            + sum(np.minimum(self.F[t] + kp[t], 0.0).sum() for t in range(len(self.tipos)))
+        )
+
+    def _r_cota(self, pi):
+        # Para la cota, las fechas pasadas sin multiplicador (no tienen fila en model.py)
+        return np.where(self.libre, self.c, self.c - pi)
+
+    def pricing(self, pi, mu):
+        """Cargas nuevas con coste reducido negativo (DP) y cota L(pi)."""
+        r = self.c - pi
+        r_cota = self._r_cota(pi)
+        kp = [self._kp_relajada(t, r_cota) for t in range(len(self.tipos))]
+        nuevas = []
+        for t in range(len(self.tipos)):
+            items = np.nonzero(self.A[:, t] & (r < 0))[0]
+            consumo, capacidad = self._discretizar(t, items, abajo=False)
+            cabe = (consumo <= np.array(capacidad)).all(axis=1)
+            items, consumo = items[cabe], consumo[cabe]
+            sel = _mejores_por_clase(r[items], consumo, self.P[t])
+            items, consumo = items[sel], consumo[sel]
+            val, toma = _dp(r[items], consumo, capacidad, int(self.P[t]), reconstruir=True)
+            penal = self._penalizacion(t, mu).reshape((-1,) + (1,) * (val.ndim - 1))
+            reducido = self.F[t] + val - penal
+            for plano in np.argsort(reducido, axis=None)[:COLUMNAS_POR_TIPO]:
+                estado = np.unravel_index(plano, val.shape)
+                if reducido[estado] >= -EPS:
+                    break
+                k = self.agregar(t, items[_reconstruir(toma, consumo, val.shape, estado)])
+                if k is not None:
+                    nuevas.append(k)
+        return nuevas, self._cota(pi, kp)
+
+    def pricing_exacto(self, pi, mu, opt, sec):
+        """Como pricing, pero cada mochila se resuelve como MILP con el backend.
+
+        Se usa cuando la DP ya no encuentra columnas: con el peso redondeado
+        podría dar por convergido un maestro que aún mejora. Un MILP por tipo
+        y nivel de paradas; la cota usa la cota inferior que devuelve el
+        solver para cada uno.
+        """
+        r = self.c - pi
+        r_cota = self._r_cota(pi)
+        kp = [self._kp_relajada(t, r_cota) for t in range(len(self.tipos))]
+        nuevas = []
+        for t in range(len(self.tipos)):
+            items = np.nonzero(self.A[:, t] & (r < 0))[0].tolist()
+            if not items:
+                continue
+            penal = self._penalizacion(t, mu)
+            for nivel in self.niveles[t]:
+                camiones = self.pmax[t] == nivel
+                # Con la cota relajada ya se sabe que no hay columna en este nivel
+                if self.F[t] + kp[t][camiones][0] - penal[nivel] >= -EPS:
+                    continue
+                m = ConcreteModel()
+                m.x = Var(items, domain=Binary)
+                m.OBJ = Objective(expr=sum(float(r[i]) * m.x[i] for i in items), sense=minimize)
+                m.volumen = Constraint(expr=sum(float(self.datos.vol[i]) * m.x[i] for i in items) <= float(self.V[t]))
+                m.peso = Constraint(expr=sum(float(self.datos.pes[i]) * m.x[i] for i in items) <= float(self.W[t]))
+                m.adr_limit = Constraint(expr=sum(float(self.vol_adr[i]) * m.x[i] for i in items) <= float(self.ADRmax[t]))
+                m.paradas = Constraint(expr=sum(m.x[i] for i in items) <= int(nivel))
+                results = opt.resolver(m, sec=sec)
+                if not opt.con_solucion:
+                    continue
+                cota_kp = results.problem[0].lower_bound
+                if isinstance(cota_kp, (int, float)) and np.isfinite(cota_kp) and not self.libre[items].any():
+                    kp[t][camiones] = np.maximum(kp[t][camiones], cota_kp)
+                # La penalización del nivel acota por arriba la de cargas con menos paradas
+                if self.F[t] + value(m.OBJ) - penal[nivel] < -EPS:
+                    k = self.agregar(t, [i for i in items if m.x[i].value > 0.5])
+                    if k is not None:
+                        nuevas.append(k)
+        return nuevas, self._cota(pi, kp)
+
+    def anotar(self, nuevas, cota, duales):
+        """Guarda la cota si mejora (sus duales pasan a ser el centro). Devuelve 'nuevas'."""
+        if cota > self.cota:
+            self.cota, self.centro = cota, duales
+        return nuevas
+
+    # --- inmersión ---
+    def fijar(self, columnas):
+        """Fija a 1 las columnas dadas mientras quepan en la flota de su tipo y
+        no repitan pedidos ya fijados. Devuelve cuántas ha fijado."""
+        usados, cubiertos = {}, set()
+        for k in self.fijadas:
+            t, carga = self.columnas[k]
+            cubiertos.update(carga)
+            for l in self._niveles_de(t, len(carga)):
+                usados[t, l] = usados.get((t, l), 0) + 1
+        antes = len(self.fijadas)
+        for k in columnas:
+            t, carga = self.columnas[k]
+            niveles = self._niveles_de(t, len(carga))
+            if (k not in self.fijadas and cubiertos.isdisjoint(carga)
+                    and all(usados.get((t, l), 0) < self.cupo[t][l] for l in niveles)):
+                self.fijadas.add(k)
+                cubiertos.update(carga)
+                for l in niveles:
+                    usados[t, l] = usados.get((t, l), 0) + 1
+        return len(self.fijadas) - antes
+
+    def fraccionario(self, m):
+        """Columnas con lam fraccionario en el maestro LP resuelto, de mayor a menor."""
+        valores = [(var.value or 0.0, k) for k, var in m.lam.items() if not var.fixed]
+        return [k for v, k in sorted(valores, reverse=True) if EPS < v < 1 - EPS]
+
+    # --- solución ---
+    def plan(self, elegidas):
+        """Plan en posiciones con las columnas 'elegidas' (compatibles entre sí).
+
+        En cada tipo, las cargas con más paradas van a los camiones con más
+        Pmax (las filas de flota garantizan que así caben todas). Los y salen
+        de lo que queda sin cubrir (mensajería para los de hoy y para los de
+        fechas pasadas si sale a cuenta), aunque el LP los deje fraccionarios.
+        """
+        cargas = {}
+        for k in elegidas:
+            t, carga = self.columnas[k]
+            cargas.setdefault(t, []).append(carga)
+        x, z = [], []
+        for t, lista in cargas.items():
+            for j, carga in zip(self.tipos[t], sorted(lista, key=len, reverse=True)):
+                z.append(int(j))
+                x.extend([i, int(j)] for i in carga)
+        cubierto = np.zeros(self.datos.num_pedidos, dtype=bool)
+        cubierto[[i for i, _ in x]] = True
+        y = np.nonzero(~cubierto & (self.hoy | (self.libre & (self.mensajeria < 0))))[0]
+        objetivo = sum(self.costes[k] for k in elegidas) + float(self.mensajeria[y].sum())
+        return {"x": sorted(x), "y": y.tolist(), "z": sorted(z), "objetivo": objetivo}
+
+# ----------------------------------------------------
+# 4) BUCLE PRINCIPAL
+# ----------------------------------------------------
+# 0. Siembra: ALNS (motor_lns.py) sobre el modelo completo desde el plan de
+#    partida. Mejora la incumbente y, sobre todo, deja como columnas las
+#    cargas de cada subproblema resuelto: las columnas de la raíz rara vez
+#    combinan bien en un plan entero, y éstas sí.
+# 1. Generación en la raíz: rondas de maestro LP + pricing por DP; cuando la
+#    DP no encuentra nada, pricing exacto (MILP por tipo). Da la cota.
+# 2. Inmersión (diving): se fijan a 1 las columnas casi enteras y las de mayor
+#    lam fraccionario, y se vuelve a generar (sólo DP) hasta que el LP sale
+#    entero.
+# 3. Maestro entero sobre todas las columnas, partiendo del mejor plan: es
+#    una recombinación de las cargas del ALNS y de la raíz.
+# Los límites son acumulados: el ALNS tiene hasta FRACCION_LNS, la raíz hasta
+# FRACCION_RAIZ y la inmersión hasta FRACCION_CG (aunque la raíz no haya
+# convergido: su LP ya orienta). Por defecto la inmersión no tiene tiempo
+# propio: con las cargas del ALNS, el maestro entero encuentra mejores planes
+# que fijando columnas de la raíz.
+
+def _generar(gen, opt, fin, raiz, rondas=MAX_RONDAS):
+    """Hasta 'rondas' rondas, mientras el pricing dé columnas y no se llegue a 'fin'.
+
+    En la raíz, los precios se suavizan hacia los de la mejor cota (Wentges):
+    se tantea con SUAVIZADO * centro + (1 - SUAVIZADO) * duales y, si ahí no
+    sale nada, con los duales del maestro; si tampoco, pricing exacto.
+    Devuelve (maestro LP resuelto o None, convergido).
+    """
+    m = None
+    for _ in range(rondas):
+        if time.time() >= fin:
+            break
+        m = gen.maestro()
+        opt.resolver(m, sec=max(1, int(fin - time.time())), duales=True)
+        if not opt.con_solucion:
+            return None, False
+        gen.rondas += 1
+        pi, mu = gen.precios(m)
+        nuevas = []
+        if raiz and gen.centro is not None:
+            suave = (
+                SUAVIZADO * gen.centro[0] + (1 - SUAVIZADO) * pi,
+                [SUAVIZADO * c + (1 - SUAVIZADO) * d for c, d in zip(gen.centro[1], mu)],
+            )
+            nuevas = gen.anotar(*gen.pricing(*suave), suave)
+        if not nuevas:
+            nuevas = gen.anotar(*gen.pricing(pi, mu), (pi, mu))
+        if not nuevas and raiz:
+            nuevas = gen.anotar(*gen.pricing_exacto(pi, mu, opt, max(1, int(fin - time.time()))), (pi, mu))
+        if not nuevas:
+            return m, True
+    return m, False
+
+def resolver_columnas(datos, opt, tiempo_total, plan=None):
+    """ALNS, generación de columnas, inmersión y maestro entero (price-and-branch).
+
+    'opt' es un backend ya configurado (ver backends.py); resuelve los
+    subproblemas del ALNS, los maestros LP (con duales), el pricing exacto y
+    el maestro entero. 'plan' (en posiciones) es el arranque del ALNS y da
+    las primeras columnas; sin él, se parte de enviar todo lo de hoy por
+    mensajería.
+
+    Devuelve (plan en posiciones, resumen) con resumen = {"rondas",
+    "columnas", "cota", "lp", "convergido", "tiempo_cg", "tiempo"}.
+    """
+    inicio = time.time()
+    fin_raiz = inicio + FRACCION_RAIZ * tiempo_total
+    fin_cg = inicio + FRACCION_CG * tiempo_total
+    gen = GeneradorColumnas(datos)
+    if plan is None:
+        # Sin plan de partida: todo lo de hoy por mensajería (siempre factible)
+        y = np.nonzero(gen.hoy)[0].tolist()
+        plan = {"x": [], "y": y, "z": [], "objetivo": float(gen.mensajeria[y].sum())}
+    mejor = dict(plan)
+    if FRACCION_LNS > 0 and datos.num_camiones:
+        # ALNS sobre el modelo completo: mejora la incumbente y deja, en las
+        # cargas de todos sus subproblemas, columnas que sí combinan en planes enteros
+        vistos = []
+        final, _ = resolver_lns(construir_modelo(datos), opt, FRACCION_LNS * tiempo_total,
+                                plan_desde_posiciones(plan, datos), al_resolver=vistos.append)
+        for visto in vistos:
+            gen.agregar_plan(plan_a_posiciones(visto, datos))
+        final = plan_a_posiciones(final, datos)
+        if final["objetivo"] < mejor["objetivo"] - EPS:
+            mejor = final
+    gen.desde_plan(mejor)
+    # Los multiplicadores de cotas.py son un buen centro de partida
+    lagrangiana = cota_lagrangiana(datos, ub=mejor["objetivo"])
+    gen.anotar([], lagrangiana["cota"], (lagrangiana["multiplicadores"], [np.zeros(len(n)) for n in gen.niveles]))
+
+    m, convergido = _generar(gen, opt, fin_raiz, raiz=True)
+    lp = value(m.OBJ) if m is not None else None
+
+    while m is not None and time.time() < fin_cg:
+        fraccionarias = gen.fraccionario(m)
+        if not fraccionarias:
+            break
+        paso = max(1, int(np.ceil(PASO_INMERSION * len(fraccionarias))))
+        if not gen.fijar([k for k, var in m.lam.items() if (var.value or 0.0) >= FIJAR] + fraccionarias[:paso]):
+            break
+        m, _ = _generar(gen, opt, fin_cg, raiz=False, rondas=RONDAS_INMERSION)
+    if m is not None:
+        # Lo que esté entero al acabar la inmersión (si se ha cortado por tiempo,
+        # lo fijado más lo ya entero; el resto de hoy, por mensajería)
+        candidato = gen.plan(gen.fijadas | {k for k, var in m.lam.items() if (var.value or 0.0) >= 1 - EPS})
+        if candidato["objetivo"] < mejor["objetivo"] - EPS:
+            mejor = candidato
+    tiempo_cg = time.time() - inicio
+
+    # Maestro entero sobre todas las columnas, desde el mejor plan
+    gen.desde_plan(mejor)
+    m = gen.maestro(entero=True)
+    for k, var in m.lam.items():
+        var.set_value(1 if k in gen.iniciales else 0)
+    for i, var in m.y.items():
+        var.set_value(1 if i in gen.y_inicial else 0)
+    opt.resolver(m, sec=max(1, int(tiempo_total - (time.time() - inicio))), warmstart=True)
+    if opt.con_solucion and value(m.OBJ) < mejor["objetivo"] - EPS:
+        mejor = gen.plan([k for k, var in m.lam.items() if (var.value or 0) > 0.5])
+
+    resumen = {
+        "rondas": gen.rondas, "columnas": len(gen.columnas), "cota": gen.cota, "lp": lp,
+        "convergido": convergido, "tiempo_cg": tiempo_cg, "tiempo": time.time() - inicio,
+    }
+    return mejor, resumen
@@ -0,0 +1,154 @@
+# ====================================================
+#   MOTOR ALNS (Adaptive Large Neighbourhood Search)
+#   Para instancias en las que CBC agota el límite de tiempo
+# ====================================================
+
+import random
+import time
+
+from pyomo.environ import value
+from pyomo.opt import TerminationCondition
+
+from heuristica import plan_greedy, plan_desde_instancia, aplicar_warmstart
+
+# ----------------------------------------------------
+# 1) PARÁMETROS DEL MOTOR
+# ----------------------------------------------------
+TIEMPO_SUBPROBLEMA = 5     # segundos de solver por vecindario
+CAMIONES_LIBRES = 4        # camiones que se liberan en cada iteración
+MARGEN = 1.0               # no se lanza un subproblema con menos de 1 s restante
+
+# Premios del ALNS: nueva mejor solución / iteración sin mejora
+PREMIO_MEJORA = 3.0
+PREMIO_NADA = 0.5
+REACCION = 0.2             # peso de la nueva observación al actualizar pesos
+
+# ----------------------------------------------------
+# 2) OPERADORES DE DESTRUCCIÓN
+# ----------------------------------------------------
+# Cada operador devuelve el conjunto de camiones que se liberan. Los pedidos
+# de esos camiones, los de mensajería y los futuros no enviados se
+# re-optimizan; el resto del plan queda fijo.
+
+def op_aleatorio(instance, plan, rng, k):
+    camiones = list(instance.J)
+    return set(rng.sample(camiones, min(k, len(camiones))))
+
+def op_peores(instance, plan, rng, k):
+    """Camiones abiertos con menos carga por euro de coste fijo + uno cerrado."""
+    carga = {j: 0.0 for j in plan["z"]}
+    for i, j in plan["x"]:
+        carga[j] += value(instance.vol[i])
+    peores = sorted(carga, key=lambda j: carga[j] / max(value(instance.F[j]), 1e-9))
+    libres = set(peores[:max(1, k - 1)])
+    cerrados = [j for j in instance.J if j not in plan["z"]]
+    if cerrados:
+        libres.add(rng.choice(cerrados))
+    return libres
+
+def op_cliente(instance, plan, rng, k):
+    """Camiones que visitan a un cliente al azar (completado con aleatorios)."""
+    cliente = rng.choice(list(instance.C))
+    libres = {j for i, j in plan["x"] if value(instance.cli[i]) == cliente}
+    libres = set(rng.sample(sorted(libres), min(k, len(libres))))
+    resto = [j for j in instance.J if j not in libres]
+    libres.update(rng.sample(resto, min(k - len(libres), len(resto))))
+    return libres
+
+OPERADORES = {
+    "aleatorio": op_aleatorio,
+    "peores": op_peores,
+    "cliente": op_cliente,
+}
+
+# ----------------------------------------------------
+# 3) FIJAR / LIBERAR VARIABLES
+# ----------------------------------------------------
+def fijar_vecindario(instance, plan, libres):
+    """Fija todo el plan salvo los camiones 'libres' y sus pedidos candidatos.
+
+    Devuelve las variables fijadas aquí, para liberar sólo ésas después (las
+    que el presolve del modelo ya trae fijadas deben seguir fijas).
+    """
+    fijadas = []
+    def fijar(var, valor):
+        if not var.fixed:
+            var.fix(valor)
+            fijadas.append(var)
+
+    fijos = {i for i, j in plan["x"] if j not in libres}
+    for (i, j), var in instance.x.items():
+        if i in fijos:
+            fijar(var, 1 if (i, j) in plan["x"] else 0)
+        elif j not in libres:
+            fijar(var, 0)
+    for i in fijos:
+        fijar(instance.y[i], 0)
+    for j, var in instance.z.items():
+        if j not in libres:
+            fijar(var, 1 if j in plan["z"] else 0)
+    return fijadas
+
+def liberar(fijadas):
+    for var in fijadas:
+        var.unfix()
+
+# ----------------------------------------------------
+# 4) BUCLE PRINCIPAL
+# ----------------------------------------------------
+def resolver_lns(instance, opt, tiempo_total, plan=None, semilla=None, al_resolver=None):
+    """Mejora un plan inicial destruyendo y re-optimizando vecindarios.
+
+    'opt' es un backend ya configurado (ver backends.py); aquí sólo se ajusta
+    su límite de tiempo para cada subproblema. Al terminar, la instancia queda con
+    el mejor plan cargado, de modo que value(instance.OBJ) es su coste.
+
+    Un subproblema sin solución (infactible, sin incumbente en el tiempo dado)
+    sólo cuenta como iteración sin mejora; los errores del backend (p. ej. el
+    ejecutable no existe) se propagan. 'al_resolver(plan)', si se da, recibe
+    la solución de cada subproblema resuelto, mejore o no (motor_columnas.py
+    guarda sus cargas).
+
+    Devuelve (plan, resumen) con resumen = {"iteraciones", "mejoras",
+    "resueltos" (subproblemas que dieron solución), "tiempo"}.
+    """
+    inicio = time.time()
+    rng = random.Random(semilla)
+    plan = plan or plan_greedy(instance)
+    pesos = {nombre: 1.0 for nombre in OPERADORES}
+    iteraciones = mejoras = resueltos = 0
+
+    while True:
+        restante = tiempo_total - (time.time() - inicio)
+        if restante < MARGEN:
+            break
+
+        nombre = rng.choices(list(pesos), weights=list(pesos.values()))[0]
+        libres = OPERADORES[nombre](instance, plan, rng, CAMIONES_LIBRES)
+
+        aplicar_warmstart(instance, plan)
+        fijadas = fijar_vecindario(instance, plan, libres)
+        sec = max(1, int(min(TIEMPO_SUBPROBLEMA, restante)))
+        try:
+            results = opt.resolver(instance, sec=sec, warmstart=True)
+            candidato = None
+            if opt.con_solucion and results.solver.termination_condition != TerminationCondition.infeasible:
+                candidato = plan_desde_instancia(instance)
+                resueltos += 1
+                if al_resolver is not None:
+                    al_resolver(candidato)
+        finally:
+            liberar(fijadas)
+
+        iteraciones += 1
+        if candidato is not None and candidato["objetivo"] < plan["objetivo"] - 1e-6:
+            plan = candidato
+            mejoras += 1
+            premio = PREMIO_MEJORA
+        else:
+            premio = PREMIO_NADA
+        pesos[nombre] = (1 - REACCION) * pesos[nombre] + REACCION * premio
+
+    aplicar_warmstart(instance, plan)
+    resumen = {"iteraciones": iteraciones, "mejoras": mejoras, "resueltos": resueltos, "tiempo": time.time() - inicio}
+    return plan, resumen
@@ -0,0 +1,147 @@
+# ====================================================
+#   PARSER DE .dat EN UNA PASADA
+#   Dialecto del generador -> DatosInstancia sin DataPortal
+# ====================================================
+
+import numpy as np
+
+from instancia import DatosInstancia
+
+# ----------------------------------------------------
+# 1) DIALECTO ADMITIDO
+# ----------------------------------------------------
+# Lo que escribe src/generator/generador_masivo.py (y AMPL "plano"):
+#   # comentario
+#   param alpha := 0.5;                    (escalar)
+#   set I := P1 P2 P3;                     (miembros con o sin comillas)
+#   param vol :=  'P1' 2  'P2' 1 ... ;     (pares índice valor, uno o varios por línea)
+# Las sentencias terminan en ';' y pueden ocupar varias líneas. Cualquier
+# otra forma (tablas 'param: ...', índices múltiples, 'default'...) lanza
+# FormatoNoSoportado y leer_datos() recurre al DataPortal de Pyomo.
+
+class FormatoNoSoportado(ValueError):
+    pass
+
+def _valor(token):
+    """Como Pyomo: entre comillas -> texto; si no, int, float o texto."""
+    if token[0] in "'\"":
+        return token[1:-1]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+def _clave(token):
+    return token[1:-1] if token[0] in "'\"" else _valor(token)
+
+# ----------------------------------------------------
+# 2) LECTURA POR SENTENCIAS
+# ----------------------------------------------------
+def sentencias(f):
+    """Genera la lista de tokens de cada sentencia, leyendo línea a línea."""
+    tokens = []
+    for linea in f:
+        if "#" in linea:
+            linea = linea[:linea.index("#")]
+        if ";" not in linea:
+            tokens.extend(linea.split())
+            continue
+        *completas, resto = linea.split(";")
+        for trozo in completas:
+            tokens.extend(trozo.split())
+            if tokens:
+                yield tokens
+            tokens = []
+        tokens.extend(resto.split())
+    if tokens:
+        raise FormatoNoSoportado("Sentencia sin ';' final")
+
+def parsear_dat(f, solo=None):
+    """(conjuntos, parámetros) de un flujo .dat.
+
+    conjuntos: {nombre: [miembros]}
+    parámetros: {nombre: valor} (escalares) o {nombre: (claves, valores)}
+    'solo': conjunto de nombres de 'set' a partir del cual se puede parar
+    en cuanto estén todos leídos (para consultar tamaños sin leer el resto).
+    """
+    conjuntos, parametros = {}, {}
+    for tokens in sentencias(f):
+        tipo = tokens[0]
+        if tipo in ("data", "end", "model"):
+            continue
+        if len(tokens) < 3 or tokens[2] != ":=" or tipo not in ("set", "param"):
+            raise FormatoNoSoportado(f"Sentencia no soportada: {' '.join(tokens[:4])} ...")
+        nombre, resto = tokens[1], tokens[3:]
+        if tipo == "set":
+            conjuntos[nombre] = [_clave(t) for t in resto]
+            if solo is not None and solo <= conjuntos.keys():
+                break
+        elif len(resto) == 1:
+            parametros[nombre] = _valor(resto[0])
+        elif len(resto) % 2 == 0:
+            parametros[nombre] = ([_clave(t) for t in resto[0::2]], resto[1::2])
+        else:
+            raise FormatoNoSoportado(f"param {nombre}: número impar de tokens")
+    return conjuntos, parametros
+
+# ----------------------------------------------------
+# 3) A DatosInstancia
+# ----------------------------------------------------
+def _columna(parametros, nombre, orden, numerico=True):
+    """Valores de un parámetro indexado en el orden del conjunto."""
+    if nombre not in parametros:
+        raise FormatoNoSoportado(f"Falta param {nombre}")
+    claves, valores = parametros[nombre]
+    if claves != orden:
+        # Orden distinto al del set: se reordena (falta algún índice -> KeyError)
+        por_clave = dict(zip(claves, valores))
+        valores = [por_clave[k] for k in orden]
+    if not numerico:
+        return [_clave(v) for v in valores]
+    return np.array(valores, dtype=float)
+
+def _escalar(parametros, nombre):
+    if not isinstance(parametros.get(nombre), (int, float)):
+        raise FormatoNoSoportado(f"Falta param {nombre} (escalar)")
+    return float(parametros[nombre])
+
+def leer_dat(ruta):
+    """DatosInstancia de un .dat del generador, leyendo el fichero una vez."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        conjuntos, parametros = parsear_dat(f)
+    try:
+        I, J, C = conjuntos["I"], conjuntos["J"], conjuntos["C"]
+    except KeyError as e:
+        raise FormatoNoSoportado(f"Falta set {e}")
+    pos_cliente = {c: k for k, c in enumerate(C)}
+
+    return DatosInstancia(
+        pedidos=I,
+        vol=_columna(parametros, "vol", I),
+        pes=_columna(parametros, "pes", I),
+        fecha=_columna(parametros, "fecha", I),
+        adr=_columna(parametros, "adr", I),
+        t=_columna(parametros, "t", I),
+        cli=np.array([pos_cliente[c] for c in _columna(parametros, "cli", I, numerico=False)], dtype=np.int64),
+        clientes=C,
+        dist_c=_columna(parametros, "dist_c", C),
+        camiones=J,
+        V=_columna(parametros, "V", J),
+        W=_columna(parametros, "W", J),
+        ADRmax=_columna(parametros, "ADRmax", J),
+        Pmax=_columna(parametros, "Pmax", J),
+        F=_columna(parametros, "F", J),
+        alpha=_escalar(parametros, "alpha"),
+        s=_escalar(parametros, "s"),
+        fecha_hoy=_escalar(parametros, "fecha_hoy"),
+    )
+
+def tamanos_dat(ruta):
+    """(pedidos, camiones) exactos; para en cuanto ha leído 'set I' y 'set J'."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        conjuntos, _ = parsear_dat(f, solo={"I", "J"})
+    return len(conjuntos["I"]), len(conjuntos["J"])
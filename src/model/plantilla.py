@@ -0,0 +1,178 @@
+# ====================================================
+#   PLANTILLA DE MODELO REUTILIZABLE
+#   Variables y restricciones una vez por forma (|I|, |J|, |C|);
+#   entre instancias sólo cambian los valores de los Param mutables
+# ====================================================
+
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel, RangeSet, Param, Var, Objective, Constraint,
+    Binary, Any, minimize,
+)
+from pyomo.common.collections import ComponentSet
+from pyomo.common.gc_manager import PauseGC
+
+from instancia import coeficientes
+
+# ----------------------------------------------------
+# 1) FORMULACIÓN CON PARÁMETROS MUTABLES
+# ----------------------------------------------------
+# Igual que model.py, salvo que lo que allí depende de los datos al construir
+# (qué pedidos son de hoy, qué parejas son admisibles) aquí se expresa con
+# parámetros o fijando variables en cada actualización:
+#   - es_hoy[i] = 1 si el pedido sale hoy: sum_j x[i,j] + y[i] >= es_hoy[i]
+#   - sum_j x[i,j] + y[i] <= 1 para todos (los futuros, a lo sumo una vez)
+#   - y[i] de pedidos futuros y x[i,j] no admisibles se fijan a 0
+# Los huecos sobrantes (instancias con menos pedidos/camiones que la
+# plantilla) y los pedidos marcados como inactivos quedan inertes:
+# coeficientes a 0 y variables fijadas a 0.
+
+def _declarar(m, num_pedidos, num_camiones, num_clientes):
+    m.I = RangeSet(0, num_pedidos - 1)
+    m.J = RangeSet(0, num_camiones - 1)
+    m.C = RangeSet(0, max(num_clientes, 1) - 1)
+
+    mutable = dict(mutable=True, initialize=0, within=Any)
+    for nombre in ("vol", "pes", "adr", "t", "fecha", "u", "delta", "es_hoy", "cli"):
+        setattr(m, nombre, Param(m.I, **mutable))
+    for nombre in ("V", "W", "ADRmax", "Pmax", "F"):
+        setattr(m, nombre, Param(m.J, **mutable))
+    m.dist_c = Param(m.C, **mutable)
+    for nombre in ("alpha", "s", "fecha_hoy"):
+        setattr(m, nombre, Param(**mutable))
+
+    m.x = Var(m.I, m.J, domain=Binary)
+    m.y = Var(m.I, domain=Binary)
+    m.z = Var(m.J, domain=Binary)
+
+    m.OBJ = Objective(sense=minimize, expr=(
+        sum(m.u[i] * m.x[i, j] for i in m.I for j in m.J)
+        + sum(m.t[i] * m.y[i] for i in m.I)
+        + sum(m.F[j] * m.z[j] for j in m.J)
+        - sum(m.s * m.delta[i] * (sum(m.x[i, j] for j in m.J) + m.y[i]) for i in m.I)
+    ))
+
+    m.envio_max = Constraint(m.I, rule=lambda m, i: sum(m.x[i, j] for j in m.J) + m.y[i] <= 1)
+    m.envio_hoy = Constraint(m.I, rule=lambda m, i: sum(m.x[i, j] for j in m.J) + m.y[i] >= m.es_hoy[i])
+    m.link = Constraint(m.I, m.J, rule=lambda m, i, j: m.x[i, j] <= m.z[j])
+    m.volumen = Constraint(m.J, rule=lambda m, j: sum(m.vol[i] * m.x[i, j] for i in m.I) <= m.V[j])
+    m.peso = Constraint(m.J, rule=lambda m, j: sum(m.pes[i] * m.x[i, j] for i in m.I) <= m.W[j])
+    m.adr_limit = Constraint(m.J, rule=lambda m, j: sum(m.adr[i] * m.vol[i] * m.x[i, j] for i in m.I) <= m.ADRmax[j])
+    m.paradas = Constraint(m.J, rule=lambda m, j: sum(m.x[i, j] for i in m.I) <= m.Pmax[j])
+
+# ----------------------------------------------------
+# 2) PLANTILLA
+# ----------------------------------------------------
+class PlantillaModelo:
+    """Modelo construido una vez y re-parametrizado para cada instancia.
+
+    Los índices son posicionales (0..n-1); 'pedidos' y 'camiones' guardan
+    los nombres de la última instancia cargada, en el mismo orden.
+    """
+
+    def __init__(self, num_pedidos, num_camiones, num_clientes):
+        self.forma = (num_pedidos, num_camiones, num_clientes)
+        self.modelo = ConcreteModel()
+        with PauseGC():
+            _declarar(self.modelo, num_pedidos, num_camiones, num_clientes)
+        self.fijadas = ComponentSet()
+        self._escrito = {}       # parámetro -> valores en el modelo
+        self.pedidos = []
+        self.camiones = []
+
+    def admite(self, datos):
+        n_i, n_j, n_c = self.forma
+        return datos.num_pedidos <= n_i and datos.num_camiones <= n_j and len(datos.clientes) <= n_c
+
+    def _escribir(self, nombre, valores):
+        """Guarda en el Param 'nombre' sólo los valores que han cambiado."""
+        valores = np.asarray(valores)
+        previos = self._escrito.get(nombre)
+        cambiados = np.arange(len(valores)) if previos is None else np.nonzero(valores != previos)[0]
+        if len(cambiados):
+            getattr(self.modelo, nombre).store_values(dict(zip(cambiados.tolist(), valores[cambiados].tolist())))
+        self._escrito[nombre] = valores
+        return len(cambiados)
+
+    def actualizar(self, datos, activos=None):
+        """Carga los datos de una instancia y devuelve el modelo listo para resolver.
+
+        'activos' (máscara sobre los pedidos de 'datos') marca los que
+        cuentan; los demás quedan inertes como los huecos del final, así que
+        un pedido puede conservar su posición de una llamada a otra (ver
+        simulacion.py). Sólo se escriben los parámetros y fijaciones que
+        cambian respecto a la llamada anterior.
+        """
+        if not self.admite(datos):
+            raise ValueError(f"La instancia no cabe en la plantilla {self.forma}")
+        m = self.modelo
+        n_i, n_j, n_c = self.forma
+        k_i, k_j = datos.num_pedidos, datos.num_camiones
+        coef = coeficientes(datos)
+        activo = np.zeros(n_i, dtype=bool)
+        activo[:k_i] = True if activos is None else activos
+
+        def relleno(valores, n, defecto=0):
+            out = np.full(n, defecto, dtype=float)
+            out[:len(valores)] = valores
+            if n == n_i:
+                out[~activo] = defecto
+            return out
+
+        # Huecos: pedidos "futuros" sin incentivo ni coste, camiones sin capacidad
+        fecha_hueco = datos.fecha_hoy + 1
+        self._escribir("vol", relleno(datos.vol, n_i))
+        self._escribir("pes", relleno(datos.pes, n_i))
+        self._escribir("adr", relleno(datos.adr, n_i))
+        self._escribir("t", relleno(datos.t, n_i))
+        self._escribir("fecha", relleno(datos.fecha, n_i, fecha_hueco))
+        self._escribir("u", relleno(coef["u"], n_i))
+        self._escribir("delta", relleno(coef["delta"], n_i))
+        self._escribir("es_hoy", relleno((datos.fecha == datos.fecha_hoy).astype(float), n_i))
+        self._escribir("cli", relleno(datos.cli, n_i).astype(np.int64))
+        self._escribir("dist_c", relleno(datos.dist_c, n_c))
+        self._escribir("V", relleno(datos.V, n_j))
+        self._escribir("W", relleno(datos.W, n_j))
+        self._escribir("ADRmax", relleno(datos.ADRmax, n_j))
+        self._escribir("Pmax", relleno(datos.Pmax, n_j))
+        self._escribir("F", relleno(datos.F, n_j))
+        m.alpha.set_value(datos.alpha)
+        m.s.set_value(datos.s)
+        m.fecha_hoy.set_value(datos.fecha_hoy)
+
+        # Fijaciones del presolve: se deshacen las que ya no tocan y se
+        # añaden las nuevas; los valores de la instancia anterior se borran
+        admisible = np.zeros((n_i, n_j), dtype=bool)
+        admisible[:k_i, :k_j] = coef["admisible"]
+        admisible[~activo] = False
+        futuro = ~activo
+        futuro[:k_i] |= datos.fecha > datos.fecha_hoy
+
+        fijadas = ComponentSet()
+        fijadas.update(m.x[int(i), int(j)] for i, j in zip(*np.nonzero(~admisible)))
+        fijadas.update(m.y[i] for i in np.nonzero(futuro)[0].tolist())
+        fijadas.update(m.z[j] for j in np.nonzero(~admisible.any(axis=0))[0].tolist())
+        for var in self.fijadas - fijadas:
+            var.unfix()
+        for var in m.component_data_objects(Var):
+            if not var.fixed:
+                var.set_value(None, skip_validation=True)
+        for var in fijadas - self.fijadas:
+            var.fix(0)
+        self.fijadas = fijadas
+
+        self.pedidos = list(datos.pedidos)
+        self.camiones = list(datos.camiones)
+        return m
+
+# ----------------------------------------------------
+# 3) CACHÉ DE PLANTILLAS POR FORMA
+# ----------------------------------------------------
+_PLANTILLAS = {}
+
+def instancia_desde_plantilla(datos):
+    """Modelo para 'datos' reutilizando la plantilla de su forma (si existe)."""
+    forma = (datos.num_pedidos, datos.num_camiones, len(datos.clientes))
+    if forma not in _PLANTILLAS:
+        _PLANTILLAS[forma] = PlantillaModelo(*forma)
+    return _PLANTILLAS[forma].actualizar(datos)
@@ -0,0 +1,211 @@
+# ====================================================
+#   PORTAFOLIO DE SOLVERS
+#   Varias configuraciones en carrera sobre la misma instancia
+# ====================================================
+
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+from pyomo.common.tempfiles import TempfileManager
+
+from instancia import construir_modelo, leer_datos
+from heuristica import plan_greedy, aplicar_warmstart, plan_desde_instancia
+from backends import crear_backend, disponible
+from cache_soluciones import plan_a_posiciones, plan_desde_posiciones
+
+# ----------------------------------------------------
+# 1) CONFIGURACIÓN
+# ----------------------------------------------------
+# Instancias del mismo escenario dan tiempos muy distintos: unas CBC las
+# cierra en menos de un segundo y otras agotan el límite con gaps altos, y
+# qué solver (o qué semilla) va bien cambia de una a otra. Aquí cada miembro
+# del PORTAFOLIO resuelve la misma instancia en su propio proceso y:
+#   - todos parten de la misma incumbente (el greedy o el plan dado), salvo
+#     GLPK, que no la admite; con los solvers en marcha no hay forma de
+#     pasarles soluciones desde Pyomo
+#   - en cuanto uno demuestra el óptimo (con el 'ratio' pedido), o la mejor
+#     solución llegada y la mejor cota de cualquiera de ellos ya cierran el
+#     gap, se paran los demás
+#   - si no, todos acaban con el límite de tiempo y gana la mejor solución
+#     (a igualdad, la que llegó antes)
+# El resultado lleva el ganador y lo que devolvió cada miembro. Los miembros
+# cuyo solver no está instalado se saltan. Cada miembro escribe sus ficheros
+# temporales (LP, solución de CBC/GLPK) en una carpeta propia que se borra al
+# acabar la carrera: los que se paran con SIGKILL no pueden limpiar los suyos.
+
+PORTAFOLIO = [
+    {"nombre": "cbc", "backend": "cbc"},
+    {"nombre": "highs", "backend": "highs"},
+    {"nombre": "glpk", "backend": "glpk"},
+    {"nombre": "cbc_semilla", "backend": "cbc", "opciones": {"randomCbcSeed": 20240601, "randomSeed": 20240601}},
+]
+# "opciones" van al solver tal cual (CBC/GLPK: opt.options; HiGHS:
+# highs_options, p. ej. {"random_seed": 7})
+# Para cerrar la carrera si algún miembro se pasa del límite (escribir el
+# LP, leer la solución...)
+MARGEN = 10
+EPS = 1e-9
+
+def _opciones(opt, opciones):
+    destino = opt.opt.highs_options if opt.nombre == "highs" else opt.options
+    for clave, valor in opciones.items():
+        destino[clave] = valor
+
+def correr(miembro, datos, limite, ratio, inicial, hilos, cola, ruta_cbc=None, temporales=None):
+    """Un miembro del portafolio (en su propio proceso): resuelve y deja el resultado en 'cola'.
+
+    'limite' es la hora (time.time()) a la que debe haber terminado;
+    'temporales', la carpeta para los ficheros de Pyomo (la borra el padre).
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # su propio grupo: al pararlo cae también el proceso del solver
+    if temporales is not None:
+        TempfileManager.tempdir = temporales
+    inicio = time.time()
+    nombre = miembro["nombre"]
+    try:
+        instance = construir_modelo(datos)
+        if inicial is not None:
+            aplicar_warmstart(instance, plan_desde_posiciones(inicial, datos))
+        extra = {"ejecutable": ruta_cbc} if miembro["backend"] == "cbc" and ruta_cbc else {}
+        sec = max(1.0, limite - time.time())
+        opt = crear_backend(miembro["backend"], sec, ratio, hilos, **extra)
+        if opt.nombre == "cbc":
+            # Límite en segundos de reloj: con los miembros compartiendo
+            # núcleos, el de CPU se alargaría
+            opt.options['timeMode'] = "elapsed"
+        _opciones(opt, miembro.get("opciones", {}))
+        results = opt.resolver(instance, warmstart=inicial is not None)
+        condicion = str(results.solver.termination_condition)
+        cota = results.problem[0].lower_bound
+        cota = float(cota) if isinstance(cota, (int, float)) and math.isfinite(cota) else None
+        plan = plan_a_posiciones(plan_desde_instancia(instance), datos) if opt.con_solucion else None
+        if condicion == "optimal" and plan is not None:
+            cota = plan["objetivo"]  # como en el batch: óptimo (dentro de 'ratio') = gap 0
+        cola.put({
+            "nombre": nombre,
+            "estado": f"{results.solver.status}/{condicion}",
+            "optimo": condicion == "optimal" and plan is not None,
+            "objetivo": plan["objetivo"] if plan is not None else None,
+            "cota": cota,
+            "plan": plan,
+            "tiempo": round(time.time() - inicio, 3),
+        })
+    except Exception as e:
+        cola.put({"nombre": nombre, "estado": "error", "error": str(e), "optimo": False,
+                  "objetivo": None, "cota": None, "plan": None, "tiempo": round(time.time() - inicio, 3)})
+
+def _parar(proceso):
+    if not proceso.is_alive():
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proceso.pid, signal.SIGKILL)
+        else:
+            proceso.terminate()  # En Windows el cbc hijo acaba con su propio límite
+    except ProcessLookupError:
+        pass
+    proceso.join()
+
+# ----------------------------------------------------
+# 2) CARRERA
+# ----------------------------------------------------
+def resolver_portafolio(datos, tiempo_total, ratio, plan=None, miembros=None, hilos=None, ruta_cbc=None):
+    """Lanza los miembros en paralelo y devuelve (plan, resumen) del ganador.
+
+    'plan' es la incumbente común (por posiciones, ver cache_soluciones.py);
+    sin él, se calcula el greedy y se da a todos. El plan devuelto también
+    es por posiciones. resumen = {"ganador", "parada" ("optimo", "gap" o
+    "tiempo"), "estado", "cota" (la mayor de todos), "corredores", "omitidos"
+    (sin solver instalado), "tiempo"}.
+    """
+    inicio = time.time()
+    todos = miembros or PORTAFOLIO
+    miembros = [m for m in todos if disponible(m["backend"], ruta_cbc if m["backend"] == "cbc" else None)]
+    if not miembros:
+        raise RuntimeError("Ningún solver del portafolio está disponible")
+    if plan is None:
+        plan = plan_a_posiciones(plan_greedy(construir_modelo(datos)), datos)
+    hilos_miembro = max(1, (hilos or os.cpu_count() or 1) // len(miembros))
+    limite = inicio + tiempo_total
+
+    cola = multiprocessing.Queue()
+    temporales = [tempfile.mkdtemp(prefix=f"portafolio_{m['nombre']}_") for m in miembros]
+    procesos = [
+        multiprocessing.Process(target=correr, args=(m, datos, limite, ratio, plan, hilos_miembro, cola, ruta_cbc, t))
+        for m, t in zip(miembros, temporales)
+    ]
+    llegados = {}
+    parada = "tiempo"
+    try:
+        for p in procesos:
+            p.start()
+        while len(llegados) < len(procesos):
+            restante = limite + MARGEN - time.time()
+            if restante <= 0:
+                break
+            try:
+                r = cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            r["llegada"] = round(time.time() - inicio, 3)
+            llegados[r["nombre"]] = r
+            if r["optimo"]:
+                parada = "optimo"
+                break
+            # Gap conjunto: la mejor solución y la mejor cota pueden ser de miembros distintos
+            mejor = min((x["objetivo"] for x in llegados.values() if x["objetivo"] is not None), default=None)
+            cota = max((x["cota"] for x in llegados.values() if x["cota"] is not None), default=None)
+            if mejor is not None and cota is not None and (mejor - cota) / max(abs(mejor), EPS) <= ratio:
+                parada = "gap"
+                break
+    finally:
+        for p in procesos:
+            _parar(p)
+        cola.close()
+        for t in temporales:
+            shutil.rmtree(t, ignore_errors=True)
+
+    con_plan = [r for r in llegados.values() if r["plan"] is not None]
+    ganador = min(con_plan, key=lambda r: (r["objetivo"], r["llegada"]), default=None)
+    if ganador is not None and ganador["objetivo"] > plan["objetivo"] + EPS:
+        ganador = None  # nadie mejoró la incumbente de partida
+    if parada != "tiempo":
+        estado = "ok/optimal"
+    else:
+        estado = ganador["estado"] if ganador else "aborted/maxTimeLimit"
+    corredores = {}
+    for m in miembros:
+        r = llegados.get(m["nombre"], {"estado": "parado"})
+        corredores[m["nombre"]] = {k: r[k] for k in ("estado", "objetivo", "cota", "tiempo", "llegada", "error")
+                                   if r.get(k) is not None}
+    cotas = [r["cota"] for r in llegados.values() if r["cota"] is not None]
+    resumen = {
+        "ganador": ganador["nombre"] if ganador else "incumbente",
+        "parada": parada,
+        "estado": estado,
+        "cota": max(cotas) if cotas else None,
+        "corredores": corredores,
+        "omitidos": [m["nombre"] for m in todos if m not in miembros],
+        "tiempo": round(time.time() - inicio, 3),
+    }
+    return (ganador["plan"] if ganador else plan), resumen
+
+if __name__ == "__main__":
+    # python portafolio.py instancia.(dat|npz) [segundos]
+    if len(sys.argv) < 2:
+        print("Uso: python portafolio.py instancia.dat [segundos]")
+        sys.exit(1)
+    datos = leer_datos(sys.argv[1])
+    sec = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    plan, resumen = resolver_portafolio(datos, sec, 0.01)
+    print(f"🏁 Ganador: {resumen['ganador']} ({resumen['parada']}) Z={plan['objetivo']:.2f} en {resumen['tiempo']} s")
+    for nombre, r in resumen["corredores"].items():
+        print(f"   - {nombre}: {r}")
@@ -0,0 +1,335 @@
+# ====================================================
+#   SERVICIO DE RESOLUCIÓN
+#   Proceso residente con Pyomo, modelos y backends ya cargados
+# ====================================================
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import batch_plem_final_gap as batch
+from instancia import DatosInstancia, leer_datos
+from instrumentacion import Fases
+from heuristica import plan_desde_instancia, coste_plan
+from cache_soluciones import plan_a_posiciones
+
+# ----------------------------------------------------
+# 1) CONFIGURACIÓN
+# ----------------------------------------------------
+# Cada ejecución de batch_plem_final_gap.py paga de nuevo la importación de
+# Pyomo, la declaración del modelo y el arranque del backend; con los días
+# pequeños del ERP eso es casi toda la latencia. El servicio arranca una vez
+# un pool de TRABAJADORES procesos, cada uno con sus importaciones, sus
+# plantillas de modelo (PLANTILLA: una por forma |I|, |J|, |C|) y sus
+# backends persistentes, y resuelve en ellos las peticiones que llegan por
+# HTTP (JSON de entrada, asignación de salida). Las peticiones se encolan y
+# se resuelven a la vez hasta TRABAJADORES; cada respuesta lleva el tiempo
+# que esperó en cola y el de resolución.
+#
+# Rutas:
+#   POST /resolver        -> resuelve y responde con la asignación (espera)
+#   POST /trabajos        -> encola y responde al momento con {"id": n}
+#   GET  /trabajos/<id>   -> estado del trabajo y, si terminó, su resultado
+#   GET  /estado          -> trabajadores, cola y trabajos servidos
+#
+# Cuerpo de una petición: la instancia, en "instancia" (los campos de
+# DatosInstancia como listas; 'cli' con el nombre del cliente de cada pedido
+# o su índice en 'clientes') o en "ruta" (un .dat/.npz visible para el
+# servicio), y opcionalmente "motor", "backend", "sec" y "ratio":
+#   {"ruta": "data/instances/iter01.dat", "sec": 20, "motor": "lns"}
+
+HOST = "127.0.0.1"       # sólo local: el ERP corre en la misma máquina
+PUERTO = 8765
+TRABAJADORES = 2
+MOTOR = "milp"
+BACKEND = "highs"        # persistente en cada trabajador
+PLANTILLA = True         # un modelo declarado por forma, reutilizado
+SEC = 20
+RATIO = 0.01
+RUTA_CBC = None          # None = la del batch
+# La asignación devuelta debe costar lo que dice 'objetivo' (error relativo);
+# si no, el trabajo falla en lugar de responder con un plan que no es el suyo
+TOLERANCIA = 1e-6
+# Trabajos terminados que se guardan para GET /trabajos/<id>
+RETENER = 1000
+
+# ----------------------------------------------------
+# 2) TRABAJADORES (procesos del pool)
+# ----------------------------------------------------
+def _configurar(config):
+    """Opciones del batch en este proceso (en Windows los trabajadores no heredan las del padre)."""
+    batch.MOTOR = config["motor"]
+    batch.BACKEND = config["backend"]
+    batch.PLANTILLA = config["plantilla"]
+    batch.WARMSTART = True
+    batch.TRAYECTORIAS = False
+    batch.CACHE = False
+    if config["ruta_cbc"]:
+        batch.RUTA_CBC = config["ruta_cbc"]
+    batch.PROCESOS_BLOQUES = config["hilos"]  # los núcleos de este trabajador
+
+def _instancia_minima():
+    """Dos pedidos y un camión: basta para cargar los plugins del solver."""
+    return DatosInstancia(
+        pedidos=["p1", "p2"], vol=np.array([1.0, 2.0]), pes=np.array([1.0, 2.0]),
+        fecha=np.array([0.0, 1.0]), adr=np.array([0.0, 0.0]), t=np.array([50.0, 50.0]),
+        cli=np.array([0, 0]), clientes=["c1"], dist_c=np.array([10.0]),
+        camiones=["k1"], V=np.array([10.0]), W=np.array([10.0]), ADRmax=np.array([0.0]),
+        Pmax=np.array([2.0]), F=np.array([20.0]), alpha=1.0, s=0.0, fecha_hoy=0.0,
+    )
+
+def _calentar(config):
+    """Inicializador del pool: configura el proceso y resuelve una instancia mínima."""
+    _configurar(config)
+    inicio = time.perf_counter()
+    datos = _instancia_minima()
+    instance = batch.cargar_instancia(None, datos)
+    batch.MOTORES["milp"](instance, {"sec": 5, "ratio": RATIO, "tag": "calentar"}, config["hilos"], Fases(), datos=datos)
+    print(f"🔥 Trabajador {os.getpid()} listo en {time.perf_counter() - inicio:.2f} s", flush=True)
+
+def _pid(_):
+    return os.getpid()
+
+def datos_desde_json(d):
+    """DatosInstancia a partir del dict "instancia" de una petición."""
+    clientes = [str(c) for c in d["clientes"]]
+    indice = {c: k for k, c in enumerate(clientes)}
+    cli = np.array([indice[str(c)] if isinstance(c, str) else int(c) for c in d["cli"]], dtype=np.int64)
+    por_pedido = lambda nombre: np.asarray(d[nombre], dtype=np.float64)
+    return DatosInstancia(
+        pedidos=[str(p) for p in d["pedidos"]],
+        vol=por_pedido("vol"), pes=por_pedido("pes"), fecha=por_pedido("fecha"),
+        adr=por_pedido("adr"), t=por_pedido("t"), cli=cli,
+        clientes=clientes, dist_c=np.asarray(d["dist_c"], dtype=np.float64),
+        camiones=[str(c) for c in d["camiones"]],
+        V=por_pedido("V"), W=por_pedido("W"), ADRmax=por_pedido("ADRmax"),
+        Pmax=por_pedido("Pmax"), F=por_pedido("F"),
+        alpha=float(d["alpha"]), s=float(d["s"]), fecha_hoy=float(d["fecha_hoy"]),
+    )
+
+def datos_a_json(datos):
+    """Inverso de datos_desde_json (para los clientes del servicio)."""
+    d = {nombre: getattr(datos, nombre) for nombre in DatosInstancia.__dataclass_fields__}
+    return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in d.items()}
+
+def _gap_numerico(gap):
+    try:
+        return float(str(gap).replace(",", "."))
+    except ValueError:
+        return None
+
+def resolver_peticion(peticion, recibido, hilos=None):
+    """Resuelve una petición en un trabajador y devuelve la respuesta (dict).
+
+    'recibido' es el time.time() en que llegó al servicio: la espera en cola
+    es lo que pasa hasta que un trabajador la empieza.
+    """
+    inicio = time.time()
+    fases = Fases()
+    with fases("carga"):
+        datos = leer_datos(peticion["ruta"]) if "ruta" in peticion else datos_desde_json(peticion["instancia"])
+        instance = batch.cargar_instancia(None, datos)
+
+    motor = peticion.get("motor", batch.MOTOR)
+    backend = batch.BACKEND
+    batch.BACKEND = peticion.get("backend", backend)   # un trabajo por proceso a la vez
+    config = {"sec": float(peticion.get("sec", SEC)), "ratio": float(peticion.get("ratio", RATIO)), "tag": "servicio"}
+    try:
+        estado, obj, gap, metricas = batch.MOTORES[motor](instance, config, hilos, fases, datos=datos)
+        gap = batch.completar_gap(datos, obj, gap, metricas, fases)
+    finally:
+        usado, batch.BACKEND = batch.BACKEND, backend
+
+    camiones, mensajeria = {}, []
+    if isinstance(obj, (int, float)) and metricas.get("con_solucion", True):
+        leido = plan_desde_instancia(instance)
+        coste = coste_plan(instance, leido)
+        if abs(coste - obj) > TOLERANCIA * max(1.0, abs(obj)):
+            raise RuntimeError(f"motor {motor}: la asignación cuesta {coste:.4f} y el objetivo es {obj:.4f}")
+        plan = plan_a_posiciones(leido, datos, posicional=batch.PLANTILLA)
+        for i, j in plan["x"]:
+            camiones.setdefault(datos.camiones[j], []).append(datos.pedidos[i])
+        mensajeria = [datos.pedidos[i] for i in plan["y"]]
+    asignados = set(mensajeria).union(*camiones.values())
+    fin = time.time()
+    return {
+        "estado": estado,
+        "objetivo": obj if isinstance(obj, (int, float)) else None,
+        "gap": _gap_numerico(gap),
+        "gap_texto": gap,
+        "motor": motor,
+        "backend": usado,
+        "camiones": camiones,
+        "mensajeria": mensajeria,
+        "pendientes": [p for p in datos.pedidos if p not in asignados],
+        "t_cola": round(inicio - recibido, 4),
+        "t_resolucion": round(fin - inicio, 4),
+        "trabajador": os.getpid(),
+        "metricas": {k: v for k, v in dict(metricas, **fases.como_dict()).items() if k != "trayectoria"},
+    }
+
+# ----------------------------------------------------
+# 3) COLA DE TRABAJOS
+# ----------------------------------------------------
+class Servicio:
+    """Pool de trabajadores ya calentados y registro de los trabajos enviados.
+
+    El pool reparte los trabajos en orden de llegada; lo que no cabe en los
+    trabajadores espera en su cola. 'en_cola' y 'en_curso' se estiman desde
+    el proceso principal (pendientes por encima de TRABAJADORES = en cola).
+    """
+
+    def __init__(self, trabajadores=TRABAJADORES, motor=MOTOR, backend=BACKEND, plantilla=PLANTILLA):
+        self.trabajadores = trabajadores
+        self.hilos = max(1, (os.cpu_count() or 1) // trabajadores)
+        self.motor = motor
+        config = {"motor": motor, "backend": backend, "plantilla": plantilla,
+                  "ruta_cbc": RUTA_CBC, "hilos": self.hilos}
+        _configurar(config)
+        inicio = time.perf_counter()
+        self._pool = ProcessPoolExecutor(max_workers=trabajadores, initializer=_calentar, initargs=(config,))
+        # Los procesos se crean al enviar: se lanzan todos ahora, no con la primera petición
+        list(self._pool.map(_pid, range(trabajadores)))
+        self.t_arranque = round(time.perf_counter() - inicio, 2)
+        self._trabajos = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.terminados = 0
+        self.errores = 0
+
+    def enviar(self, peticion):
+        """Encola una petición y devuelve su id. Valida lo que se puede validar aquí."""
+        if "ruta" not in peticion and "instancia" not in peticion:
+            raise ValueError("falta 'instancia' o 'ruta'")
+        if peticion.get("motor", self.motor) not in batch.MOTORES:
+            raise ValueError(f"motor desconocido: {peticion['motor']}")
+        futuro = self._pool.submit(resolver_peticion, peticion, time.time(), self.hilos)
+        with self._lock:
+            ident = next(self._ids)
+            self._trabajos[ident] = futuro
+            while len(self._trabajos) > RETENER and next(iter(self._trabajos.values())).done():
+                self._trabajos.popitem(last=False)
+        futuro.add_done_callback(self._contar)
+        return ident
+
+    def _contar(self, futuro):
+        with self._lock:
+            if futuro.exception() is None:
+                self.terminados += 1
+            else:
+                self.errores += 1
+
+    def resultado(self, ident, espera=None):
+        """Respuesta del trabajo 'ident' (espera a que termine si 'espera' no es 0)."""
+        with self._lock:
+            futuro = self._trabajos.get(ident)
+        if futuro is None:
+            raise KeyError(ident)
+        if espera == 0 and not futuro.done():
+            return {"id": ident, "trabajo": "pendiente"}
+        try:
+            return dict(futuro.result(timeout=espera), id=ident, trabajo="terminado")
+        except Exception as e:
+            return {"id": ident, "trabajo": "error", "error": str(e)}
+
+    def estado(self):
+        with self._lock:
+            pendientes = sum(not f.done() for f in self._trabajos.values())
+        en_curso = min(pendientes, self.trabajadores)
+        return {"trabajadores": self.trabajadores, "hilos": self.hilos, "t_arranque": self.t_arranque,
+                "en_curso": en_curso, "en_cola": pendientes - en_curso,
+                "terminados": self.terminados, "errores": self.errores}
+
+    def cerrar(self):
+        self._pool.shutdown(cancel_futures=True)
+
+# ----------------------------------------------------
+# 4) HTTP
+# ----------------------------------------------------
+def _a_json(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"no serializable: {type(obj).__name__}")
+
+class _Manejador(BaseHTTPRequestHandler):
+    servicio = None
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo, default=_a_json, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        if self.path not in ("/resolver", "/trabajos"):
+            return self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+        try:
+            longitud = int(self.headers.get("Content-Length", 0))
+            ident = self.servicio.enviar(json.loads(self.rfile.read(longitud)))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._responder(400, {"error": str(e)})
+        if self.path == "/trabajos":
+            return self._responder(202, {"id": ident})
+        respuesta = self.servicio.resultado(ident)
+        print(f"📦 #{ident} {respuesta['trabajo']} cola={respuesta.get('t_cola')} s resolución={respuesta.get('t_resolucion')} s", flush=True)
+        self._responder(500 if respuesta["trabajo"] == "error" else 200, respuesta)
+
+    def do_GET(self):
+        if self.path == "/estado":
+            return self._responder(200, self.servicio.estado())
+        if self.path.startswith("/trabajos/"):
+            try:
+                return self._responder(200, self.servicio.resultado(int(self.path.rsplit("/", 1)[1]), espera=0))
+            except (ValueError, KeyError):
+                return self._responder(404, {"error": f"trabajo desconocido: {self.path}"})
+        self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+
+    def log_message(self, formato, *args):
+        pass  # sin el log de http.server: do_POST imprime una línea con los tiempos
+
+def servir(puerto=PUERTO, trabajadores=TRABAJADORES, host=HOST):
+    """Arranca el servicio y atiende peticiones hasta Ctrl+C."""
+    servicio = Servicio(trabajadores)
+    _Manejador.servicio = servicio
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    print(f"🚀 Servicio en http://{host}:{puerto} ({trabajadores} trabajadores, arranque {servicio.t_arranque} s)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Parando el servicio...")
+    finally:
+        servidor.server_close()
+        servicio.cerrar()
+
+# ----------------------------------------------------
+# 5) CLIENTE
+# ----------------------------------------------------
+def resolver_remoto(instancia, url=f"http://{HOST}:{PUERTO}", **opciones):
+    """Envía una instancia (DatosInstancia o ruta de fichero) y espera la asignación."""
+    if isinstance(instancia, DatosInstancia):
+        peticion = {"instancia": datos_a_json(instancia)}
+    else:
+        peticion = {"ruta": os.path.abspath(instancia)}
+    peticion.update(opciones)
+    solicitud = urllib.request.Request(
+        f"{url}/resolver", data=json.dumps(peticion).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    with urllib.request.urlopen(solicitud) as respuesta:
+        return json.loads(respuesta.read())
+
+if __name__ == "__main__":
+    # python servicio.py [puerto] [trabajadores]
+    servir(int(sys.argv[1]) if len(sys.argv) > 1 else PUERTO,
+           int(sys.argv[2]) if len(sys.argv) > 2 else TRABAJADORES)
@@ -0,0 +1,252 @@
+# ====================================================
+#   SIMULACIÓN EN HORIZONTE RODANTE
+#   Un plan por día; los pedidos futuros que no salen pasan al siguiente
+# ====================================================
+
+import csv
+import glob
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from instancia import DatosInstancia, coeficientes, construir_modelo, leer_datos
+from plantilla import PlantillaModelo
+from heuristica import plan_greedy, aplicar_warmstart, plan_desde_instancia
+from backends import crear_backend
+
+# ----------------------------------------------------
+# 1) CONFIGURACIÓN
+# ----------------------------------------------------
+# Cada día llega un bloque de pedidos nuevos (un fichero del generador: sus
+# fechas se desplazan al día simulado) y se planifica con model.py sobre los
+# pendientes: los de hoy salen en camión o por mensajería; los futuros, si
+# salen a cuenta. Los que no salen se quedan en la cartera para el día
+# siguiente, con su fecha original.
+#
+# Modo incremental (por defecto): una sola PlantillaModelo (plantilla.py)
+# para toda la simulación. Cada pedido ocupa una posición fija de la
+# plantilla mientras está pendiente, así que de un día para otro sólo se
+# reescriben las posiciones de los pedidos que salen y de los que llegan; con
+# el backend "highs" (persistente) sólo esos cambios llegan al solver. En
+# modo frío se construye cada día el modelo desde cero, para comparar. En los
+# dos modos el plan de partida de cada día es el greedy sobre el modelo del
+# día (las cargas del día anterior ya han salido con sus camiones).
+
+DIAS = 30
+SEC_DIA = 20
+RATIO = 0.01
+BACKEND = "highs"
+# Al quedarse pequeña, la plantilla crece en este factor. Los huecos de más
+# van fijados a 0 y el presolve los quita: con HiGHS, 10 días de ~60-85
+# pendientes y los dos modos partiendo del greedy, el solver sumó 35,0 s con
+# 1.5 (1 reconstrucción), 42,6 s con 1.0 (4) y 35,8 s en frío.
+HOLGURA = 1.5
+SALIDA_CSV = "simulacion_diaria.csv"
+
+def llegadas_desde_ficheros(rutas, dias=None):
+    """DatosInstancia de cada día, leídos de los ficheros en orden (cíclico si hay menos que días)."""
+    rutas = list(rutas)
+    for dia in range(dias if dias is not None else len(rutas)):
+        yield leer_datos(rutas[dia % len(rutas)])
+
+# ----------------------------------------------------
+# 2) CARTERA DE PEDIDOS PENDIENTES
+# ----------------------------------------------------
+class HorizonteRodante:
+    """Estado de la simulación: cartera de pendientes, día actual y modelo.
+
+    Los pedidos pendientes viven en posiciones fijas ('huecos') de unos
+    arrays que crecen según hace falta; un hueco libre tiene nombre None.
+    """
+
+    def __init__(self, opt, incremental=True, holgura=HOLGURA):
+        self.opt = opt
+        self.incremental = incremental
+        self.holgura = holgura
+        self.hoy = None
+        self.dia = 0
+        self.nombres = []
+        self.vol = self.pes = self.adr = self.t = self.fecha = np.zeros(0)
+        self.cli = np.zeros(0, dtype=np.int64)
+        self.clientes, self.dist_c, self._pos_cliente = [], np.zeros(0), {}
+        self.plantilla = None
+        self.acumulado = 0.0
+
+    @property
+    def activo(self):
+        return np.array([n is not None for n in self.nombres], dtype=bool)
+
+    def _crecer(self, n):
+        extra = n - len(self.nombres)
+        if extra <= 0:
+            return
+        self.nombres += [None] * extra
+        for nombre in ("vol", "pes", "adr", "t", "fecha"):
+            setattr(self, nombre, np.concatenate([getattr(self, nombre), np.zeros(extra)]))
+        self.cli = np.concatenate([self.cli, np.zeros(extra, dtype=np.int64)])
+
+    def recibir(self, llegada):
+        """Mete en la cartera los pedidos de 'llegada' con las fechas desplazadas al día actual."""
+        if self.hoy is None:
+            self.hoy = llegada.fecha_hoy
+        # Clientes: por nombre; la distancia, la del último día
+        for k, c in enumerate(llegada.clientes):
+            if c not in self._pos_cliente:
+                self._pos_cliente[c] = len(self.clientes)
+                self.clientes.append(c)
+                self.dist_c = np.append(self.dist_c, 0.0)
+            self.dist_c[self._pos_cliente[c]] = llegada.dist_c[k]
+        cli = np.array([self._pos_cliente[c] for c in llegada.clientes], dtype=np.int64)
+
+        libres = [h for h, n in enumerate(self.nombres) if n is None]
+        if len(libres) < llegada.num_pedidos:
+            inicio = len(self.nombres)
+            self._crecer(inicio + llegada.num_pedidos - len(libres))
+            libres += list(range(inicio, len(self.nombres)))
+        huecos = np.array(libres[:llegada.num_pedidos], dtype=np.int64)
+        for h, p in zip(huecos.tolist(), llegada.pedidos):
+            self.nombres[h] = f"D{self.dia + 1}_{p}"
+        self.vol[huecos] = llegada.vol
+        self.pes[huecos] = llegada.pes
+        self.adr[huecos] = llegada.adr
+        self.t[huecos] = llegada.t
+        self.fecha[huecos] = self.hoy + (llegada.fecha - llegada.fecha_hoy)
+        self.cli[huecos] = cli[llegada.cli]
+        return len(huecos)
+
+    def datos(self, flota, activo=None):
+        """DatosInstancia de la cartera con la flota del día.
+
+        Con 'activo' (incremental), todos los huecos en su posición; los
+        libres llevan fecha de hoy para no mover Fmax (la plantilla los deja
+        inertes). Sin él, sólo los pendientes, con su nombre.
+        """
+        sel = self.activo if activo is None else np.ones(len(self.nombres), dtype=bool)
+        fecha = self.fecha if activo is None else np.where(activo, self.fecha, self.hoy)
+        return DatosInstancia(
+            pedidos=[n for n, s in zip(self.nombres, sel) if s] if activo is None else list(range(len(self.nombres))),
+            vol=self.vol[sel], pes=self.pes[sel], fecha=fecha[sel], adr=self.adr[sel], t=self.t[sel],
+            cli=self.cli[sel], clientes=list(self.clientes), dist_c=self.dist_c.copy(),
+            camiones=flota.camiones, V=flota.V, W=flota.W, ADRmax=flota.ADRmax, Pmax=flota.Pmax, F=flota.F,
+            alpha=flota.alpha, s=flota.s, fecha_hoy=self.hoy,
+        )
+
+    # ------------------------------------------------
+    # 3) UN DÍA
+    # ------------------------------------------------
+    def _modelo(self, flota):
+        """(modelo, datos, huecos de cada pedido del modelo, plantilla reconstruida)."""
+        activo = self.activo
+        if not self.incremental:
+            datos = self.datos(flota)
+            return construir_modelo(datos), datos, np.nonzero(activo)[0], False
+        datos = self.datos(flota, activo)
+        reconstruida = self.plantilla is None or not self.plantilla.admite(datos)
+        if reconstruida:
+            forma = (datos.num_pedidos, datos.num_camiones, len(datos.clientes))
+            self.plantilla = PlantillaModelo(*(math.ceil(n * self.holgura) for n in forma))
+        return self.plantilla.actualizar(datos, activo), datos, np.arange(len(self.nombres)), reconstruida
+
+    def avanzar(self, llegada):
+        """Recibe los pedidos del día, planifica, despacha y pasa al día siguiente.
+
+        'llegada' (DatosInstancia) trae los pedidos nuevos y la flota del día.
+        Devuelve un dict con el resumen del día.
+        """
+        inicio = time.time()
+        nuevos = self.recibir(llegada)
+        pendientes = int(self.activo.sum())
+        instance, datos, huecos, reconstruida = self._modelo(llegada)
+        t_modelo = time.time() - inicio
+
+        # Plan de partida: greedy sobre el modelo ya actualizado
+        plan = plan_greedy(instance)
+        aplicar_warmstart(instance, plan)
+        inicio_solver = time.time()
+        results = self.opt.resolver(instance, warmstart=True)
+        t_solver = time.time() - inicio_solver
+        estado = f"{results.solver.status}/{results.solver.termination_condition}"
+        if self.opt.con_solucion:
+            plan = plan_desde_instancia(instance)
+
+        # Despacho: lo que sale hoy deja la cartera
+        # (en la plantilla, índices 0..n-1; en frío, los nombres, en el mismo orden)
+        posicion = {i: k for k, i in enumerate(instance.I)}
+        pos_camion = {j: k for k, j in enumerate(instance.J)}
+        en_camion = np.array([posicion[i] for i, _ in plan["x"]], dtype=np.int64)
+        mensajeria = np.array([posicion[i] for i in plan["y"]], dtype=np.int64)
+        abiertos = np.array([pos_camion[j] for j in plan["z"]], dtype=np.int64)
+        u = coeficientes(datos)["u"]
+        coste = float(datos.F[abiertos].sum() + u[en_camion].sum() + datos.t[mensajeria].sum())
+        for h in huecos[np.concatenate([en_camion, mensajeria])].tolist():
+            self.nombres[h] = None
+        self.acumulado += coste
+
+        self.dia += 1
+        resumen = {
+            "dia": self.dia, "fecha": self.hoy, "nuevos": nuevos, "pendientes": pendientes,
+            "camion": len(en_camion), "mensajeria": len(mensajeria), "pospuestos": int(self.activo.sum()),
+            "camiones": len(abiertos), "coste": coste, "coste_acumulado": self.acumulado,
+            "objetivo": plan["objetivo"], "estado": estado, "reconstruida": reconstruida,
+            "t_modelo": t_modelo, "t_solver": t_solver, "t_dia": time.time() - inicio,
+        }
+        self.hoy += 1
+        return resumen
+
+# ----------------------------------------------------
+# 4) SIMULACIÓN COMPLETA
+# ----------------------------------------------------
+def simular(llegadas, opt, incremental=True, holgura=HOLGURA, verbose=True):
+    """Simula un día por cada DatosInstancia de 'llegadas'.
+
+    Devuelve (lista de resúmenes diarios, totales) con totales = {"dias",
+    "coste", "t_total", "t_medio", "t_max", "reconstrucciones", "pendientes"}.
+    """
+    horizonte = HorizonteRodante(opt, incremental, holgura)
+    dias = []
+    for llegada in llegadas:
+        r = horizonte.avanzar(llegada)
+        dias.append(r)
+        if verbose:
+            print(f"📅 Día {r['dia']:>3}: {r['pendientes']:>4} pendientes (+{r['nuevos']}) | "
+                  f"camión {r['camion']}, mensajería {r['mensajeria']}, pospuestos {r['pospuestos']} | "
+                  f"coste {r['coste']:.1f} (acum. {r['coste_acumulado']:.1f}) | {r['t_dia']:.2f} s")
+    tiempos = [r["t_dia"] for r in dias]
+    totales = {
+        "dias": len(dias), "coste": horizonte.acumulado,
+        "t_total": sum(tiempos), "t_medio": float(np.mean(tiempos)) if tiempos else 0.0,
+        "t_max": max(tiempos, default=0.0), "reconstrucciones": sum(r["reconstruida"] for r in dias),
+        "pendientes": int(horizonte.activo.sum()),
+    }
+    return dias, totales
+
+def guardar_csv(dias, ruta=SALIDA_CSV):
+    """Un día por fila, con el formato de los CSV del batch (';' y coma decimal)."""
+    columnas = ["dia", "fecha", "nuevos", "pendientes", "camion", "mensajeria", "pospuestos", "camiones",
+                "coste", "coste_acumulado", "objetivo", "estado", "t_modelo", "t_solver", "t_dia"]
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow([c.capitalize() for c in columnas])
+        for r in dias:
+            w.writerow([str(round(r[c], 4)).replace(".", ",") if isinstance(r[c], float) else r[c] for c in columnas])
+
+if __name__ == "__main__":
+    # python simulacion.py <carpeta o fichero> [días] [--frio]
+    origen = sys.argv[1] if len(sys.argv) > 1 else "bateria_pruebas"
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else DIAS
+    incremental = "--frio" not in sys.argv
+    rutas = sorted(glob.glob(os.path.join(origen, "*.dat"))) if os.path.isdir(origen) else [origen]
+    if not rutas:
+        print(f"❌ No hay instancias en '{origen}'")
+        sys.exit(1)
+
+    opt = crear_backend(BACKEND, SEC_DIA, RATIO)
+    print(f"🚀 {dias} días con {len(rutas)} fichero(s) de llegadas ({'incremental' if incremental else 'en frío'}, {BACKEND})")
+    resultados, totales = simular(llegadas_desde_ficheros(rutas, dias), opt, incremental)
+    guardar_csv(resultados)
+    print(f"\n✅ Coste acumulado {totales['coste']:.1f} | {totales['t_total']:.1f} s "
+          f"(media {totales['t_medio']:.2f} s/día, máx. {totales['t_max']:.2f} s) | "
+          f"{totales['pendientes']} pendientes al final. Detalle en '{SALIDA_CSV}'")
@@ -1,5 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+import os
 
 # ==========================================
 # 1. DATOS EXACTOS
@@ -21,11 +23,38 @@ stats_data = [
     {'label': '40', 'mean': 6921.54, 'std': 3968.02, 'min': 1072.01, 'max': 19343.0, 'tiempo': 298.23}
 ]
 
+# Si existe el resumen de percentiles (src/analysis/analizador_cuantiles.py),
+# las cajas usan los cuartiles y la mediana reales de cada escenario; si no,
+# se aproximan a partir de la media y la desviación de la tabla anterior.
+ARCHIVO_CUANTILES = "resumen_cuantiles.csv"
+CONFIG = "Limite_300s"
+
+cuantiles = None
+if os.path.exists(ARCHIVO_CUANTILES):
+    cuantiles = pd.read_csv(ARCHIVO_CUANTILES, sep=';').set_index(['Escenario', 'Config', 'Variable'])
+    print(f"📦 Cuartiles leídos de '{ARCHIVO_CUANTILES}'")
+
 # Preparamos la estructura para que Matplotlib dibuje la caja sin inventar datos
 box_data = []
 tiempos = []
 
 for s in stats_data:
+    clave = (f"run_400p_{s['label']}c", CONFIG)
+    if cuantiles is not None and clave + ('Objetivo',) in cuantiles.index:
+        c = cuantiles.loc[clave + ('Objetivo',)]
+        tiempos.append(cuantiles.loc[clave + ('Tiempo',), 'media'])
+        box_data.append({
+            'label': s['label'],
+            'mean': c['media'],
+            'med': c['p50'],     # Mediana real
+            'q1': c['p25'],      # Cuartiles reales
+            'q3': c['p75'],
+            'whislo': c['min'],  # Bigote inferior: MÍNIMO REAL
+            'whishi': c['max'],  # Bigote superior: MÁXIMO REAL
+            'fliers': []
+        })
+        continue
+
     tiempos.append(s['tiempo'])
     
     # CÁLCULO ESTADÍSTICO DE LA CAJA (Q1 y Q3)
@@ -1,5 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+import os
 
 # ==========================================
 # 1. DATOS REALES (Extraídos manualmente de las tablas de análisis - Limite 300s)
@@ -8,6 +10,7 @@ stats_data = [
     # --- ESCENARIO NORMAL ---
     {
         'label': 'Escenario Base\n(Normal)',
+        'escenario': 'run_200p_normal',
         'mean': 8829.40, 
         'std': 2283.27, 
         'min': 5466.5, 
@@ -16,6 +19,7 @@ stats_data = [
     # --- ESCENARIO ADR ---
     {
         'label': 'ADR Extremo\n(Peligroso)',
+        'escenario': 'run_200p_ADR',
         'mean': 15204.15, 
         'std': 2151.88, 
         'min': 10572.52, 
@@ -24,6 +28,7 @@ stats_data = [
     # --- ESCENARIO PESADO ---
     {
         'label': 'Carga Pesada\n(Saturación)',
+        'escenario': 'run_200p_pesado',
         'mean': 26359.77, 
         'std': 2452.44, 
         'min': 20729.0, 
@@ -34,9 +39,36 @@ stats_data = [
 # ==========================================
 # 2. CÁLCULO DE LA CAJA
 # ==========================================
+# Con el resumen de percentiles (src/analysis/analizador_cuantiles.py) la caja
+# es la real (cuartiles y mediana); sin él, se estima con la media y la std.
+ARCHIVO_CUANTILES = "resumen_cuantiles.csv"
+CONFIG = "Limite_300s"
+
+cuantiles = None
+if os.path.exists(ARCHIVO_CUANTILES):
+    cuantiles = pd.read_csv(ARCHIVO_CUANTILES, sep=';').set_index(['Escenario', 'Config', 'Variable'])
+    print(f"📦 Cuartiles leídos de '{ARCHIVO_CUANTILES}'")
+
 box_data = []
 
 for s in stats_data:
+    clave = (s['escenario'], CONFIG, 'Objetivo')
+    if cuantiles is not None and clave in cuantiles.index:
+        c = cuantiles.loc[clave]
+        # Las etiquetas de media de más abajo usan también los datos reales
+        s.update({'mean': c['media'], 'std': c['std'], 'min': c['min'], 'max': c['max']})
+        box_data.append({
+            'label': s['label'],
+            'mean': c['media'],
+            'med': c['p50'],     # Mediana real
+            'q1': c['p25'],
+            'q3': c['p75'],
+            'whislo': c['min'],
+            'whishi': c['max'],
+            'fliers': []
+        })
+        continue
+
     # Estimación de cuartiles (Q1 y Q3) usando distribución normal
     # Q1 = Media - 0.67 * Std
     # Q3 = Media + 0.67 * Std